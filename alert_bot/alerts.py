@@ -0,0 +1,195 @@
+# alerts.py — 알림 종류별 라우팅 테이블 (본문 매핑 → embed 템플릿 → webhook 대상 / 우선순위 lane)
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import templates
+
+LANE_HIGH = "high"
+LANE_NORMAL = "normal"
+LANE_LOW = "low"
+LANES = (LANE_HIGH, LANE_NORMAL, LANE_LOW)  # 우선순위 순
+DEFAULT_LANE_WEIGHTS = "high=8,normal=3,low=1"
+
+Values = Tuple[Dict[str, str], List[templates.ExtraField]]
+Mapper = Callable[[Dict[str, Any], bytes], Values]          # (파싱된 본문, 원본 bytes) → (값, 추가 필드)
+TimeFn = Callable[[Any], str]                                # iso(value)
+
+
+def pick(d: Dict[str, Any], *names, default=None):
+    for n in names:
+        if n in d and d[n] is not None:
+            return d[n]
+    return default
+
+
+def _text(v: Any, default: str = "-") -> str:
+    return default if v is None or v == "" else str(v)
+
+
+class AlertRoute:
+    """
+    name      : URL 경로 (/alert/{name}) 겸 spool/큐에 기록되는 종류
+    mapper    : 본문 → 템플릿 값
+    url       : 보낼 webhook (종류별로 채널을 나눌 수 있음)
+    lane      : 기본 우선순위 (high | normal | low)
+    dedup_key : 값 → 중복 판정 key (None 이면 중복 검사 안 함)
+    lane_fn   : 값 → lane (이벤트마다 다른 우선순위, None 을 돌려주면 기본 lane)
+    """
+
+    def __init__(self, name: str, template: templates.EmbedTemplate, mapper: Mapper, url: str,
+                 lane: str = LANE_NORMAL,
+                 dedup_key: Optional[Callable[[Dict[str, str]], Optional[tuple]]] = None,
+                 lane_fn: Optional[Callable[[Dict[str, str]], Optional[str]]] = None):
+        if lane not in LANES:
+            raise ValueError(f"unknown lane for {name}: {lane}")
+        self.name = name
+        self.template = template
+        self.mapper = mapper
+        self.url = url
+        self.lane = lane
+        self.dedup_key = dedup_key
+        self.lane_fn = lane_fn
+
+    def lane_for(self, values: Dict[str, str]) -> str:
+        if self.lane_fn is not None:
+            return self.lane_fn(values) or self.lane
+        return self.lane
+
+
+def parse_lane_weights(spec: str) -> Dict[str, int]:
+    """'high=8,normal=3,low=1' → 우선순위 순 {lane: 가중치} (빠진 lane 은 1)."""
+    given: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, w = part.partition("=")
+        name = name.strip().lower()
+        if name not in LANES:
+            raise ValueError(f"unknown lane: {name}")
+        given[name] = int(w)
+        if given[name] < 1:
+            raise ValueError(f"lane weight must be >= 1: {part.strip()}")
+    return {n: given.get(n, 1) for n in LANES}
+
+
+class Router:
+    def __init__(self, default: str = "ban"):
+        self.default = default
+        self._routes: Dict[str, AlertRoute] = {}
+
+    @staticmethod
+    def _norm(name: str) -> str:
+        return name.strip().lower().replace("_", "-")
+
+    def add(self, route: AlertRoute) -> AlertRoute:
+        self._routes[self._norm(route.name)] = route
+        return route
+
+    def get(self, name: Optional[str]) -> Optional[AlertRoute]:
+        return self._routes.get(self._norm(name or self.default))
+
+    def __iter__(self) -> Iterator[AlertRoute]:
+        return iter(self._routes.values())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 기본 템플릿 / 매핑 (ban 은 IP 마스킹 등 설정이 얽혀 있어 app.py 에서 등록)
+# ─────────────────────────────────────────────────────────────────────────────
+FIRST_BLOOD_TEMPLATE = templates.EmbedTemplate(
+    "🩸 First Blood",
+    [("문제", "problem", False), ("풀이자", "person", True), ("소속", "school", True), ("시각", "solved_at", True)],
+    color=0x3498DB, footer="MSG CTF • First Blood",
+)
+
+SOLVE_TEMPLATE = templates.EmbedTemplate(
+    "✅ Solve",
+    [("문제", "problem", False), ("풀이자", "person", True), ("소속", "school", True),
+     ("점수", "points", True), ("시각", "solved_at", True)],
+    color=0x22C55E, footer="MSG CTF • Solve",
+)
+
+SCOREBOARD_TEMPLATE = templates.EmbedTemplate(
+    "📈 Scoreboard",
+    [("팀", "team", True), ("순위", "rank", True), ("점수", "total", True), ("시각", "changed_at", True)],
+    color=0xF59E0B, footer="MSG CTF • Scoreboard",
+)
+
+HEALTH_TEMPLATE = templates.EmbedTemplate(
+    "🩺 System Health",
+    [("서비스", "service", True), ("상태", "status", True), ("내용", "detail", False), ("시각", "at", True)],
+    color=0x64748B, footer="MSG CTF • Health",
+)
+
+
+def first_blood_mapper(ts: TimeFn) -> Mapper:
+    def mapper(data: Dict[str, Any], raw: bytes) -> Values:
+        return {
+            "problem": _text(pick(data, "first_blood_problem", "problem", "challenge", "problemTitle")),
+            "person": _text(pick(data, "first_blood_person", "person", "loginId", "user", "solver")),
+            "school": _text(pick(data, "first_blood_school", "school", "affiliation", "team")),
+            "solved_at": ts(pick(data, "solvedAt", "solved_at", "time")),
+        }, []
+    return mapper
+
+
+def solve_mapper(ts: TimeFn) -> Mapper:
+    def mapper(data: Dict[str, Any], raw: bytes) -> Values:
+        return {
+            "problem": _text(pick(data, "problem", "challenge", "problemTitle")),
+            "person": _text(pick(data, "person", "loginId", "user", "solver")),
+            "school": _text(pick(data, "school", "affiliation", "team")),
+            "points": _text(pick(data, "points", "point", "score")),
+            "solved_at": ts(pick(data, "solvedAt", "solved_at", "time")),
+        }, []
+    return mapper
+
+
+def scoreboard_mapper(ts: TimeFn) -> Mapper:
+    def mapper(data: Dict[str, Any], raw: bytes) -> Values:
+        rank = pick(data, "rank", "currentRank")
+        prev = pick(data, "previousRank", "prevRank", "prev_rank")
+        rank_text = _text(rank)
+        try:
+            diff = int(prev) - int(rank)
+            if diff:
+                rank_text = f"{prev} → {rank} ({'▲' if diff > 0 else '▼'}{abs(diff)})"
+        except (TypeError, ValueError):
+            pass
+        return {
+            "team": _text(pick(data, "team", "teamName", "affiliation", "loginId")),
+            "rank": rank_text,
+            "total": _text(pick(data, "totalPoint", "total", "score")),
+            "changed_at": ts(pick(data, "changedAt", "updatedAt", "time")),
+        }, []
+    return mapper
+
+
+def health_mapper(ts: TimeFn) -> Mapper:
+    def mapper(data: Dict[str, Any], raw: bytes) -> Values:
+        return {
+            "service": _text(pick(data, "service", "component", "name")),
+            "status": _text(pick(data, "status", "state", "level")).upper(),
+            "detail": _text(pick(data, "detail", "message", "reason"))[:1000],
+            "at": ts(pick(data, "at", "checkedAt", "time")),
+        }, []
+    return mapper
+
+
+def admin_lane(admin: str, auto: str, auto_name: str = "AUTO_BAN_SYSTEM") -> Callable[[Dict[str, str]], str]:
+    """ban: 관리자가 직접 건 차단(bannedByAdminLoginId)은 admin lane, 자동 차단은 auto lane."""
+    for lane in (admin, auto):
+        if lane not in LANES:
+            raise ValueError(f"unknown lane: {lane}")
+
+    def lane_fn(values: Dict[str, str]) -> str:
+        by = values.get("by", "")
+        return auto if not by or by == "-" or by == auto_name else admin
+    return lane_fn
+
+
+def first_blood_key(values: Dict[str, str]) -> Optional[tuple]:
+    # 같은 문제의 first blood 는 하나뿐 (백엔드 재전송 차단)
+    return ("first-blood", values["problem"]) if values["problem"] != "-" else None
+
+
+def solve_key(values: Dict[str, str]) -> Optional[tuple]:
+    return ("solve", values["problem"], values["person"])
@@ -0,0 +1,186 @@
+# allowlist.py — IP 허용 목록 (IPv4/IPv6 CIDR, prefix 길이별 해시 집합으로 미리 컴파일) + 신뢰 프록시 X-Forwarded-For
+#
+# 이종윤/test2.py (FirstBlood relay) 도 sys.path 에 alert_bot 을 넣고 이 모듈을 그대로 쓴다 → 표준 라이브러리만 사용할 것.
+import ipaddress
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_entries(text: str) -> List[Network]:
+    """쉼표/공백/줄바꿈 구분, '#' 뒤는 주석. 각 항목은 IP 또는 CIDR (호스트 비트가 있어도 허용)."""
+    out = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for item in line.replace(",", " ").split():
+            try:
+                out.append(ipaddress.ip_network(item, strict=False))
+            except ValueError:
+                raise ValueError(f"invalid IP/CIDR: {item}")
+    return out
+
+
+def parse_ip(text: str) -> Optional[Tuple[int, int]]:
+    """
+    '1.2.3.4' / '1.2.3.4:5678' / '[::1]:443' / 'fe80::1%eth0' → (버전, 정수). IPv4-mapped IPv6 는 IPv4 로. 아니면 None.
+    ipaddress.ip_address 보다 몇 배 빠른 inet_pton 사용 (요청마다 호출되는 경로).
+    """
+    s = text.strip() if text else ""
+    if s.startswith("["):
+        s = s[1:].split("]", 1)[0]
+    elif s.count(":") == 1:
+        s = s.split(":", 1)[0]
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, s), "big")
+    except OSError:
+        pass
+    try:
+        n = int.from_bytes(socket.inet_pton(socket.AF_INET6, s.split("%", 1)[0]), "big")
+    except OSError:
+        return None
+    if n >> 32 == 0xFFFF:
+        return 4, n & 0xFFFFFFFF
+    return 6, n
+
+
+def format_ip(ip: Tuple[int, int]) -> str:
+    return str(ipaddress.IPv4Address(ip[1]) if ip[0] == 4 else ipaddress.IPv6Address(ip[1]))
+
+
+class CidrSet:
+    """
+    CIDR 집합. prefix 길이마다 '네트워크 주소 >> 호스트 비트' 정수 집합을 두고,
+    조회는 (쓰인 prefix 길이 수)번의 shift + set 조회 → 목록 크기와 무관 (IPv4 최대 33번, 보통 몇 번).
+    """
+
+    def __init__(self, networks: Iterable[Network] = ()):
+        self._tables: Dict[int, List[Tuple[int, Set[int]]]] = {4: [], 6: []}  # version → [(shift, 집합)]
+        self.size = 0
+        by_len: Dict[Tuple[int, int], Set[int]] = {}
+        for net in networks:
+            shift = net.max_prefixlen - net.prefixlen
+            by_len.setdefault((net.version, shift), set()).add(int(net.network_address) >> shift)
+            self.size += 1
+        for (version, shift), keys in by_len.items():
+            self._tables[version].append((shift, keys))
+        for table in self._tables.values():
+            table.sort(key=lambda t: -len(t[1]))  # 큰 집합(자주 맞는 쪽)부터
+
+    def __len__(self) -> int:
+        return self.size
+
+    def contains(self, ip: Tuple[int, int]) -> bool:
+        """ip = parse_ip() 결과 (버전, 정수)."""
+        n = ip[1]
+        for shift, keys in self._tables[ip[0]]:
+            if (n >> shift) in keys:
+                return True
+        return False
+
+    def __contains__(self, text: str) -> bool:
+        ip = parse_ip(text)
+        return ip is not None and self.contains(ip)
+
+
+class Allowlist:
+    """
+    허용 목록 = env 값 + 파일(한 줄에 여러 개 가능). 비어 있으면 전부 허용(enabled=False).
+    - 클라이언트 주소: 직접 연결한 주소(peer)가 trusted_proxies 안이면 X-Forwarded-For 를 오른쪽부터 보며
+      신뢰 프록시가 아닌 첫 주소를 클라이언트로 본다 (그 왼쪽은 클라이언트가 위조할 수 있으므로 보지 않음)
+    - 재로드: reload() 또는 check_interval 초마다 파일 mtime 확인.
+      읽기/파싱에 실패하거나 새 목록이 비었으면 기존 목록 유지 (비어서 전부 허용되는 일이 없도록)
+    """
+
+    def __init__(self, entries: str = "", path: str = "", trusted_proxies: str = "",
+                 check_interval: float = 5.0, log: Optional[logging.Logger] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.entries = entries
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self.log = log or logging.getLogger("allowlist")
+        self.trusted = CidrSet(parse_entries(trusted_proxies))
+        self.networks = CidrSet()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.last_error = ""
+        self.stats: Dict[str, int] = {"allowed": 0, "denied": 0, "reloads": 0, "reload_errors": 0}
+        if not self.reload():
+            raise ValueError(self.last_error)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.networks) > 0
+
+    def reload(self) -> bool:
+        """목록 다시 읽기. 적용했으면 True (실패하면 last_error 에 이유, 기존 목록 유지)."""
+        try:
+            mtime = os.stat(self.path).st_mtime if self.path else None
+            nets = parse_entries(self.entries)
+            if self.path:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    nets += parse_entries(f.read())
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            return self._reject(str(e))
+        if not nets and self.enabled:
+            return self._reject("new list is empty")
+        self.networks = CidrSet(nets)
+        self._mtime = mtime
+        self.stats["reloads"] += 1
+        return True
+
+    def _reject(self, error: str) -> bool:
+        self.stats["reload_errors"] += 1
+        self.last_error = error
+        self.log.warning("allowlist: reload failed, keeping previous list",
+                         extra={"networks": len(self.networks), "error": error})
+        return False
+
+    def maybe_reload(self) -> bool:
+        """check_interval 마다 파일 mtime 확인 → 바뀌었으면 reload. 다시 읽었으면 True."""
+        if not self.path or self.check_interval <= 0:
+            return False
+        now = self.clock()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime or not self.reload():
+            return False
+        self.log.info("allowlist: reloaded", extra={"networks": len(self.networks), "file": self.path})
+        return True
+
+    def _client(self, peer: str, forwarded_for: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+        """(클라이언트 주소 문자열, parse_ip 결과)."""
+        ip = parse_ip(peer)
+        if ip is None or not forwarded_for or not len(self.trusted) or not self.trusted.contains(ip):
+            return peer, ip
+        hops = [h.strip() for h in forwarded_for.split(",") if h.strip()]
+        for hop in reversed(hops):
+            h = parse_ip(hop)
+            if h is None:
+                return hop, None  # 알 수 없는 값 → 그대로 (허용 목록에 걸리지 않음)
+            if not self.trusted.contains(h):
+                return format_ip(h), h
+        return (hops[0], parse_ip(hops[0])) if hops else (peer, ip)  # 전부 신뢰 프록시 → 가장 왼쪽
+
+    def client_ip(self, peer: str, forwarded_for: str = "") -> str:
+        """실제 클라이언트 주소. 신뢰 프록시를 거치지 않았으면 peer 그대로."""
+        return self._client(peer, forwarded_for)[0]
+
+    def check(self, peer: str, forwarded_for: str = "") -> Tuple[bool, str]:
+        """(허용 여부, 클라이언트 주소). 목록이 비어 있으면 항상 허용."""
+        self.maybe_reload()
+        client, ip = self._client(peer, forwarded_for)
+        if not self.enabled:
+            return True, client
+        ok = ip is not None and self.networks.contains(ip)
+        self.stats["allowed" if ok else "denied"] += 1
+        return ok, client
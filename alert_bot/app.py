@@ -1,32 +1,358 @@
 # app.py
-import os, json, gzip, base64, re, ipaddress
+import os, json, base64, asyncio, time, math, signal
 import uvicorn
 from fastapi import FastAPI, Header, HTTPException, Request
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List, Set, Tuple
+from fastapi.responses import JSONResponse, Response
 import httpx
-from datetime import datetime, timezone
+from functools import lru_cache
 from urllib.parse import parse_qs
 
+try:
+    import orjson  # 선택: 설치돼 있으면 JSON 파싱에 사용
+except ImportError:
+    orjson = None
+
+import alerts
+import allowlist
+import auth
+import batcher
+import breaker
+import decoding
+import dedup
+import logs
+import masking
+import metrics
+import shared
+import templates
+import timestamps
+from alerts import AlertRoute, pick
+from delivery import DeliveryQueue, Job, QueueFull, QueueClosed
+from dispatcher import WebhookDispatcher, WebhookError
+from spool import Spool
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Env
 # ─────────────────────────────────────────────────────────────────────────────
-API_KEY = os.getenv("API_KEY", "").strip()
+API_KEY = os.getenv("API_KEY", "").strip()                    # 키 하나 (값 그대로 비교)
+API_KEYS = os.getenv("API_KEYS", "")                            # 선택: 쉼표로 여러 개 (교체 기간에 신·구 키 함께)
+API_KEYS_FILE = os.getenv("API_KEYS_FILE", "").strip()         # 선택: 한 줄에 키 하나 (# 주석), 수정하면 자동 재로드
+API_KEYS_RELOAD_INTERVAL = float(os.getenv("API_KEYS_RELOAD_INTERVAL", "5"))  # 키 파일 mtime 확인 주기(초), SIGHUP 도 가능
+# 인증 단계 한도 (본문을 읽기 전): 키별 초당 요청 수 / 틀린 키는 클라이언트 주소별. 0 = 끔
+AUTH_RATE = float(os.getenv("AUTH_RATE", "200"))
+AUTH_BURST = float(os.getenv("AUTH_BURST", "400"))
+AUTH_FAIL_RATE = float(os.getenv("AUTH_FAIL_RATE", "1"))
+AUTH_FAIL_BURST = float(os.getenv("AUTH_FAIL_BURST", "20"))
+# 접속 허용 IP/CIDR (IPv4/IPv6, 쉼표 구분) + 파일(수정하면 자동 재로드, SIGHUP 도 가능). 둘 다 비우면 제한 없음
+IP_ALLOWLIST = os.getenv("IP_ALLOWLIST", "").strip()
+IP_ALLOWLIST_FILE = os.getenv("IP_ALLOWLIST_FILE", "").strip()
+IP_ALLOWLIST_RELOAD_INTERVAL = float(os.getenv("IP_ALLOWLIST_RELOAD_INTERVAL", "5"))
+# 이 주소(CIDR)에서 온 연결만 X-Forwarded-For 를 믿는다 (리버스 프록시 / Docker 네트워크 게이트웨이)
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "").strip()
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "").strip()
 TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "5"))
+# Webhook 커넥션 풀 (앱 수명 동안 재사용)
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("HTTP2", "false").lower() in ("1", "true", "yes", "y")
+# 429/5xx 재시도 (429 는 retry_after 만큼, 5xx 는 jitter 백오프)
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "3"))
+WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", "0.5"))
+WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", "10"))
+# 회로 차단기: webhook 이 연속 BREAKER_FAILURES 번 실패(연결 오류/타임아웃/5xx)하면 BREAKER_RESET_SECONDS 동안
+# 보내지 않고 바로 대체 경로(FALLBACK_WEBHOOK_URL → FALLBACK_FILE)로. 대체 경로가 없으면 503 (queue 모드는 spool 에 남음)
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+FALLBACK_WEBHOOK_URL = os.getenv("FALLBACK_WEBHOOK_URL", "").strip()
+FALLBACK_FILE = os.getenv("FALLBACK_FILE", "").strip()   # JSONL
 MENTION_ROLE_ID = os.getenv("MENTION_ROLE_ID", "").strip()
+# embed 템플릿 덮어쓰기 (JSON: {"ban": {"title": ..., "color": "#e11d48", "footer": ..., "fields": {"ip": "IP"}}})
+EMBED_TEMPLATES_FILE = os.getenv("EMBED_TEMPLATES_FILE", "").strip()
+# 로그: JSON 한 줄씩 stdout (백그라운드 스레드에서 기록). DEBUG_LOGS=true 는 LOG_SAMPLE="request=1,body=1" 과 같음
 DEBUG_LOGS = os.getenv("DEBUG_LOGS", "false").lower() in ("1", "true", "yes", "y")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", "request=1,body=1" if DEBUG_LOGS else "").strip()  # 예: request=0.1,body=0.01
+LOG_REDACT = os.getenv("LOG_REDACT", "authorization,x-api-key,cookie").strip()        # 값을 가릴 필드 이름 (본문 키 포함)
+LOG_BODY_MAX = int(os.getenv("LOG_BODY_MAX", "1024"))                                 # 파싱 못 한 본문 미리보기 상한(bytes)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))                            # 가득 차면 버림 (대기하지 않음)
+# body 크기 상한: 전송(압축) 크기 / 해제 후 크기. 넘으면 413
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(256 * 1024)))
+MAX_DECOMPRESSED_BYTES = int(os.getenv("MAX_DECOMPRESSED_BYTES", str(1024 * 1024)))
+
+# 전송 모드: sync(웹훅 응답까지 대기) | queue(큐 적재 후 202 즉시 응답)
+DELIVERY_MODE = os.getenv("DELIVERY_MODE", "sync").strip().lower()
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "1000"))
+QUEUE_WORKERS = int(os.getenv("QUEUE_WORKERS", "2"))
+QUEUE_OVERFLOW = os.getenv("QUEUE_OVERFLOW", "reject").strip().lower()  # reject | drop_oldest
+QUEUE_DRAIN_TIMEOUT = float(os.getenv("QUEUE_DRAIN_TIMEOUT", "10"))
+# 우선순위 lane (high | normal | low): 가중치 비율대로 전송, high 는 지연 목표 안에 전송되도록 우선 처리
+LANE_WEIGHTS = os.getenv("LANE_WEIGHTS", alerts.DEFAULT_LANE_WEIGHTS).strip()
+LANE_LATENCY_TARGET_MS = float(os.getenv("LANE_LATENCY_TARGET_MS", "1000"))  # high lane 지연 목표
+# queue 모드 micro-batching: window 동안 모인 이벤트를 embed 10개/6000자 메시지로 묶어 전송 (0 = 끔)
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "0"))
+BATCH_OVERFLOW = os.getenv("BATCH_OVERFLOW", "summary").strip().lower()  # summary("+N more") | split
+BATCH_MAX_EVENTS = int(os.getenv("BATCH_MAX_EVENTS", "100"))            # window 당 최대 이벤트 수
+# /alert/ban/batch 한 요청당 최대 이벤트 수
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# 디스크 spool (queue 모드): 수락 전에 기록 → 재시작 시 재전송. 비우면 사용 안 함
+SPOOL_PATH = os.getenv("SPOOL_PATH", "").strip()
+SPOOL_SYNC = os.getenv("SPOOL_SYNC", "NORMAL").strip().upper()                  # NORMAL | FULL
+SPOOL_REPLAY_INTERVAL = float(os.getenv("SPOOL_REPLAY_INTERVAL", "30"))       # 미전송분 재적재 주기(초)
+SPOOL_COMPACT_INTERVAL = float(os.getenv("SPOOL_COMPACT_INTERVAL", "30"))     # 전송 완료분 정리 주기(초)
+SPOOL_LEASE = float(os.getenv("SPOOL_LEASE", "300"))                          # 워커가 잡은 행을 다른 워커가 못 가져가는 시간(초)
+
+# 멀티 워커: uvicorn 프로세스 수. 2 이상이면 dedup / rate-limit 상태를 공유 store 에 둔다
+WORKERS = int(os.getenv("WORKERS", "1"))
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite" if WORKERS > 1 else "").strip().lower()  # "" | memory | sqlite
+STATE_PATH = os.getenv("STATE_PATH", "alert_state.db").strip()
+
+# 중복 차단 이벤트 억제: off | drop | merge (merge = 큐에 남은 원본에 중복 횟수 표시).
+# 기존 동작(모두 전송)을 바꾸므로 opt-in: 기본 off
+DEDUP_MODE = os.getenv("DEDUP_MODE", "off").strip().lower()
+DEDUP_WINDOW = float(os.getenv("DEDUP_WINDOW", "60"))           # 초: TTL 겸 bannedAt 구간 크기
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "10000"))
 
-# IP 마스킹: A|B|C|NONE|LAST2 (기본 LAST2 = XXX.XXX.C.D)
+# IP 마스킹: A|B|C|NONE|LAST2 (기본 LAST2 = XXX.XXX.C.D) 또는 /N (앞 N비트 유지, 예: /24)
 IP_MASK_MODE  = os.getenv("IP_MASK_MODE", "LAST2").strip().upper()
 IP_MASK_TOKEN = os.getenv("IP_MASK_TOKEN", "XXX").strip()
+IP_MASK_MODE_V6 = os.getenv("IP_MASK_MODE_V6", "").strip().upper()      # 비우면 IP_MASK_MODE 따름 (/N 이면 /48)
+IP_MASK_XFF = os.getenv("IP_MASK_XFF", "first").strip().lower()         # first | all (XFF 체인 전체)
+IP_MASK_CACHE_SIZE = int(os.getenv("IP_MASK_CACHE_SIZE", "65536"))
 
-if not API_KEY:
-    raise RuntimeError("API_KEY env required")
+# 시각 표시: 비우면 기존 그대로(ISO, 받은 오프셋 유지). KST | UTC | +09:00 | Asia/Seoul 등
+TIMESTAMP_TZ = os.getenv("TIMESTAMP_TZ", "").strip()
+TIMESTAMP_SOURCE_TZ = os.getenv("TIMESTAMP_SOURCE_TZ", "UTC").strip()   # 오프셋 없는 값(LocalDateTime)의 기준
+TIMESTAMP_FORMAT = os.getenv("TIMESTAMP_FORMAT", "")                     # strftime 형식, 비우면 ISO 8601
+
+try:
+    log_handler = logs.setup(LOG_LEVEL, LOG_REDACT.split(","), LOG_QUEUE_SIZE)
+    log_sampler = logs.Sampler(logs.parse_rates(LOG_SAMPLE))
+except ValueError as e:
+    raise RuntimeError(f"invalid LOG_LEVEL/LOG_SAMPLE: {e}")
+log = logs.get("app")
+
+if not API_KEY and not API_KEYS.strip() and not API_KEYS_FILE:
+    raise RuntimeError("API_KEY (or API_KEYS / API_KEYS_FILE) env required")
 if not DISCORD_WEBHOOK_URL:
     raise RuntimeError("DISCORD_WEBHOOK_URL env required")
+if DELIVERY_MODE not in ("sync", "queue"):
+    raise RuntimeError("DELIVERY_MODE must be 'sync' or 'queue'")
+if QUEUE_OVERFLOW not in ("reject", "drop_oldest"):
+    raise RuntimeError("QUEUE_OVERFLOW must be 'reject' or 'drop_oldest'")
+if SPOOL_SYNC not in ("NORMAL", "FULL"):
+    raise RuntimeError("SPOOL_SYNC must be 'NORMAL' or 'FULL'")
+if SPOOL_PATH and DELIVERY_MODE != "queue":
+    log.warning("SPOOL_PATH is only used with DELIVERY_MODE=queue; ignoring")
+if STATE_BACKEND and STATE_BACKEND not in shared.BACKENDS:
+    raise RuntimeError(f"STATE_BACKEND must be one of: {', '.join(shared.BACKENDS)}")
+if WORKERS > 1 and STATE_BACKEND in ("", "memory"):
+    raise RuntimeError("WORKERS > 1 requires a shared STATE_BACKEND (e.g. sqlite)")
+if DEDUP_MODE not in (dedup.MODE_OFF, dedup.MODE_DROP, dedup.MODE_MERGE):
+    raise RuntimeError("DEDUP_MODE must be 'off', 'drop' or 'merge'")
+if BATCH_OVERFLOW not in (batcher.OVERFLOW_SUMMARY, batcher.OVERFLOW_SPLIT):
+    raise RuntimeError("BATCH_OVERFLOW must be 'summary' or 'split'")
 
 app = FastAPI(title="MSG Alert Bot", version="1.6.0")
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Metrics (/metrics, Prometheus text format)
+# ─────────────────────────────────────────────────────────────────────────────
+M_REQUESTS = metrics.counter("alert_http_requests_total", "HTTP requests by route and status", ["path", "status"])
+M_REQUEST_SECONDS = metrics.histogram("alert_http_request_seconds", "HTTP request handling time", ["path"])
+M_REQUEST_BYTES = metrics.counter("alert_request_bytes_total", "Request body bytes received (before decoding)", ["path"])
+M_READ_RAW = metrics.histogram("alert_read_raw_seconds", "Time to read and decode the request body")
+M_PARSE = metrics.histogram("alert_parse_body_seconds", "Time to parse the request body")
+M_AUTH = metrics.counter("alert_auth_total", "API key checks by result", ["result"])
+M_ALLOWLIST = metrics.counter("alert_allowlist_total", "IP allowlist checks by result", ["result"])
+M_EVENTS = metrics.counter("alert_events_total", "Accepted (non-duplicate) alerts by type", ["type"])
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "other")
+        M_REQUESTS.inc(path, str(status))
+        M_REQUEST_SECONDS.observe(time.perf_counter() - t0, path)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shared HTTP client (keep-alive pool, optional HTTP/2) + rate-limit dispatcher
+# ─────────────────────────────────────────────────────────────────────────────
+http_client: Optional[httpx.AsyncClient] = None
+dispatcher: Optional[WebhookDispatcher] = None
+
+def _h2_installed() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def build_http_client() -> httpx.AsyncClient:
+    http2 = HTTP2 and _h2_installed()
+    if HTTP2 and not http2:
+        log.warning("HTTP2=true but 'h2' is not installed; using HTTP/1.1")
+    limits = httpx.Limits(
+        max_connections=HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(timeout=TIMEOUT, limits=limits, http2=http2)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Circuit breaker + fallback (webhook URL 별)
+# ─────────────────────────────────────────────────────────────────────────────
+breakers: Dict[str, breaker.CircuitBreaker] = {}
+fallback_file = breaker.FileSink(FALLBACK_FILE) if FALLBACK_FILE else None
+M_FALLBACK = metrics.counter("alert_fallback_total", "Alerts delivered to a fallback sink", ["sink"])
+M_DEAD_LETTER = metrics.counter("alert_dead_letter_total", "Alerts dropped because the webhook rejected them (4xx)",
+                                ["type"])
+
+def breaker_for(url: str) -> breaker.CircuitBreaker:
+    br = breakers.get(url)
+    if br is None:
+        br = breakers[url] = breaker.CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET_SECONDS,
+                                                    BREAKER_HALF_OPEN_PROBES)
+    return br
+
+def is_outage(e: WebhookError) -> bool:
+    # 응답 자체를 못 받았거나 5xx → Discord 쪽 장애. 4xx / 429 소진은 Discord 가 응답한 것
+    return e.status is None or e.status >= 500
+
+def is_rejected(e: WebhookError) -> bool:
+    # 429 가 아닌 4xx (embed 필드 초과 등) → 같은 메시지는 다시 보내도 거절된다
+    return e.status is not None and 400 <= e.status < 500 and e.status != 429
+
+def record_result(url: str, br: breaker.CircuitBreaker, error: Optional[WebhookError]):
+    before = br.state
+    if error is not None and is_outage(error):
+        br.record_failure(str(error))
+    else:
+        br.record_success()
+    if br.state != before:
+        key = dispatcher.bucket(url).key
+        if br.state == breaker.STATE_OPEN:
+            log.warning("webhook circuit opened", extra={"webhook": key, "failures": br.failures,
+                                                         "error": br.last_error})
+        elif br.state == breaker.STATE_CLOSED:
+            log.info("webhook circuit closed", extra={"webhook": key})
+
+async def post_fallback(url: str, content: bytes, error: Optional[WebhookError]) -> Optional[httpx.Response]:
+    """보조 webhook → 파일 순서로. 둘 다 없거나 실패하면 원래 오류(없으면 CircuitOpen)."""
+    if FALLBACK_WEBHOOK_URL and url != FALLBACK_WEBHOOK_URL:
+        fb = breaker_for(FALLBACK_WEBHOOK_URL)
+        if fb.allow():
+            try:
+                r = await dispatcher.send(FALLBACK_WEBHOOK_URL, content=content, headers=JSON_HEADERS)
+                record_result(FALLBACK_WEBHOOK_URL, fb, None)
+                M_FALLBACK.inc("webhook")
+                return r
+            except WebhookError as e:
+                record_result(FALLBACK_WEBHOOK_URL, fb, e)
+    if fallback_file is not None:
+        await asyncio.to_thread(fallback_file.append, dispatcher.bucket(url).key, content)
+        M_FALLBACK.inc("file")
+        return None
+    if error is not None:
+        raise error
+    raise breaker.CircuitOpen(breaker_for(url).retry_after())
+
+async def post_webhook(payload: Optional[Dict[str, Any]] = None, content: Optional[bytes] = None,
+                       url: str = DISCORD_WEBHOOK_URL, priority: bool = False) -> Optional[httpx.Response]:
+    """
+    payload(dict) 또는 이미 직렬화된 content(bytes) 전송. priority: 같은 webhook 의 rate-limit 토큰 우선.
+    회로가 열려 있거나 장애로 실패하면 대체 경로로 (파일로 보냈으면 None).
+    """
+    if content is None:
+        content = templates.dumps(payload)
+    br = breaker_for(url)
+    if not br.allow():
+        return await post_fallback(url, content, None)
+    try:
+        r = await dispatcher.send(url, content=content, headers=JSON_HEADERS, priority=priority)
+    except WebhookError as e:
+        record_result(url, br, e)
+        if is_outage(e):
+            return await post_fallback(url, content, e)
+        raise
+    except BaseException:
+        br.cancel()
+        raise
+    record_result(url, br, None)
+    return r
+
+def batch_parts(jobs: List[Job]) -> List[List[Job]]:
+    """webhook 메시지 하나로 나갈 job 묶음들. split: 한도(embed 10개 / 6000자)에 맞춰 나눔, summary: 전부 하나."""
+    if BATCH_OVERFLOW != batcher.OVERFLOW_SPLIT or len(jobs) == 1:
+        return [jobs]
+    return [[jobs[i] for i in idx] for idx in batcher.group_messages([j.message for j in jobs])]
+
+async def dead_letter(url: str, job: Job, error: WebhookError):
+    """거절된 메시지는 replay 하지 않는다 (FALLBACK_FILE 이 있으면 거기에 남김)."""
+    M_DEAD_LETTER.inc(job.kind)
+    log.error("webhook rejected alert, dropping it", extra={"webhook": dispatcher.bucket(url).key, "type": job.kind,
+                                                            "status": error.status, "error": str(error)[:200]})
+    if fallback_file is not None:
+        await asyncio.to_thread(fallback_file.append, dispatcher.bucket(url).key, templates.dumps(job.message))
+
+async def send_part(url: str, part: List[Job]) -> Optional[WebhookError]:
+    """묶음 하나 전송. 거절(is_rejected)되면 하나씩 다시 보내 거절된 job 만 dead_letter, 그 오류를 반환."""
+    priority = part[0].lane == alerts.LANE_HIGH
+    try:
+        for payload in batcher.pack_messages([j.message for j in part], BATCH_OVERFLOW):
+            await post_webhook(payload, url=url, priority=priority)
+        return None
+    except WebhookError as e:
+        if not is_rejected(e):
+            raise
+        if len(part) == 1:
+            await dead_letter(url, part[0], e)
+            return e
+    rejected = None
+    for j in part:  # 같이 묶인 정상 알림까지 버리지 않도록
+        try:
+            await post_webhook(j.message, url=url, priority=priority)
+        except WebhookError as e:
+            if not is_rejected(e):
+                raise
+            await dead_letter(url, j, e)
+            rejected = e
+    return rejected
+
+async def post_batch(jobs: List[Job]):
+    # 같은 webhook 으로 가는 것끼리 묶어서, webhook 메시지 단위로 보낸 만큼 ack
+    groups: Dict[str, List[Job]] = {}
+    for j in jobs:
+        groups.setdefault(route_of(j.kind).url, []).append(j)
+    done: List[Job] = []
+    rejected = None
+    try:
+        for url, group in groups.items():
+            for part in batch_parts(group):
+                rejected = await send_part(url, part) or rejected
+                if spool is not None:
+                    spool.ack(j.spool_id for j in part)
+                done += part
+    except BaseException:
+        # 실패한 항목은 spool 에 남아 replay 주기에 다시 적재된다 (lease 해제 → 어느 워커든)
+        if spool is not None:
+            spool.release(j.spool_id for j in jobs if j not in done)
+        raise
+    finally:
+        for j in jobs:
+            spool_inflight.discard(j.spool_id)
+    if rejected is not None:
+        raise rejected  # 큐의 failed 통계 / 로그용 (spool 행은 이미 ack)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers: auth key / ISO time / body parsing
 # ─────────────────────────────────────────────────────────────────────────────
@@ -39,129 +365,524 @@ def extract_api_key(x_api_key: Optional[str], authorization: Optional[str]) -> s
             return parts[1].strip()
     return ""
 
+try:
+    keyring = auth.KeyRing([API_KEY] + [k.strip() for k in API_KEYS.split(",")], API_KEYS_FILE,
+                           check_interval=API_KEYS_RELOAD_INTERVAL, rate=AUTH_RATE, burst=AUTH_BURST,
+                           fail_rate=AUTH_FAIL_RATE, fail_burst=AUTH_FAIL_BURST)
+except ValueError as e:
+    raise RuntimeError(f"invalid API key config: {e}")
+
+try:
+    ip_allowlist = allowlist.Allowlist(IP_ALLOWLIST, IP_ALLOWLIST_FILE, TRUSTED_PROXIES,
+                                       check_interval=IP_ALLOWLIST_RELOAD_INTERVAL, log=logs.get("allowlist"))
+except ValueError as e:
+    raise RuntimeError(f"invalid IP_ALLOWLIST/IP_ALLOWLIST_FILE/TRUSTED_PROXIES: {e}")
+
+def authorize(request: Request, x_api_key: Optional[str], authorization: Optional[str]) -> str:
+    """본문을 읽기 전에: 허용 목록 밖 → 403, 틀린 키 → 401, 한도 초과 → 429. 통과하면 key_id."""
+    peer = request.client.host if request.client else ""
+    allowed, client = ip_allowlist.check(peer, request.headers.get("x-forwarded-for", ""))
+    if ip_allowlist.enabled:
+        M_ALLOWLIST.inc("allowed" if allowed else "denied")
+    if not allowed:
+        log.warning("ip not in allowlist", extra={"client": client, "peer": peer})
+        raise HTTPException(status_code=403, detail="forbidden")
+    result, kid = keyring.check(extract_api_key(x_api_key, authorization), client)
+    M_AUTH.inc(result)
+    if result == auth.RESULT_OK:
+        return kid
+    if result == auth.RESULT_INVALID:
+        raise HTTPException(status_code=401, detail="invalid api key")
+    limiter = keyring.limiter if result == auth.RESULT_LIMITED else keyring.fail_limiter
+    retry = max(1, math.ceil(limiter.retry_after(kid or client)))
+    raise HTTPException(status_code=429, detail="too many requests", headers={"Retry-After": str(retry)})
+
+try:
+    ts_normalizer = timestamps.TimestampNormalizer(
+        display_tz=timestamps.parse_tz(TIMESTAMP_TZ),
+        source_tz=timestamps.parse_tz(TIMESTAMP_SOURCE_TZ) or timestamps.UTC,
+        fmt=TIMESTAMP_FORMAT,
+    )
+except Exception as e:
+    raise RuntimeError(f"invalid TIMESTAMP_TZ/TIMESTAMP_SOURCE_TZ: {e}")
+
 def iso(v: Any) -> str:
-    if v is None or v == "":
-        return "-"
-    if isinstance(v, str):
-        s = v.strip().replace(" ", "T")
-        try:
-            return datetime.fromisoformat(s.replace("Z", "+00:00")).isoformat()
-        except Exception:
-            return v
-    if isinstance(v, (int, float)):
-        try:
-            ts = float(v)
-            if ts > 1e12:  # ms → s
-                ts /= 1000.0
-            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
-        except Exception:
-            return str(v)
-    if isinstance(v, (list, tuple)) and len(v) >= 3:
-        try:
-            y, mo, d, hh, mm, ss = [int(x or 0) for x in list(v)[:6]]
-            return datetime(y, mo, d, hh, mm, ss, tzinfo=timezone.utc).isoformat()
-        except Exception:
-            return str(v)
-    if isinstance(v, dict):
-        try:
-            y, mo, d = v.get("year"), v.get("month"), v.get("day")
-            hh, mm, ss = v.get("hour", 0), v.get("minute", 0), v.get("second", 0)
-            if y and mo and d:
-                return datetime(int(y), int(mo), int(d), int(hh), int(mm), int(ss),
-                                tzinfo=timezone.utc).isoformat()
-        except Exception:
-            pass
-        return json.dumps(v, ensure_ascii=False)
-    return str(v)
-
-def pick(d: Dict[str, Any], *names, default=None):
-    for n in names:
-        if n in d and d[n] is not None:
-            return d[n]
-    return default
+    return ts_normalizer(v)
+
+LOG_HEADERS = ("content-type", "content-encoding", "content-length", "expect", "connection", "user-agent",
+               "x-forwarded-for")
+
+def body_preview(raw: bytes) -> str:
+    head = raw[:LOG_BODY_MAX]
+    try:
+        return head.decode("utf-8")
+    except UnicodeDecodeError:
+        return "b64:" + base64.b64encode(head).decode()
+
+def log_request(request: Request, raw: bytes, data: Any = None, **fields):
+    """
+    LOG_SAMPLE 의 request / body 비율만큼만 기록 (둘 다 안 걸리면 아무것도 하지 않음).
+    body 가 걸리면 파싱된 본문(LOG_REDACT 로 키별 가림), 파싱 실패면 원문 미리보기를 붙인다.
+    """
+    with_body = log_sampler.hit("body")
+    if not with_body and not log_sampler.hit("request"):
+        return
+    h = request.headers
+    rec: Dict[str, Any] = {"path": request.url.path, "bytes": len(raw),
+                           "headers": {k: h[k] for k in LOG_HEADERS if k in h}, **fields}
+    if with_body:
+        rec["body"] = data if data else body_preview(raw)
+    log.info("request", extra=rec)
 
 async def read_raw(request: Request) -> bytes:
-    raw = await request.body()
-    enc = request.headers.get("content-encoding", "").lower()
-    if enc == "gzip" and raw:
+    """
+    body 를 스트림으로 읽으며 Content-Encoding(gzip/deflate/br) 을 바로 해제.
+    전송 크기 > MAX_BODY_BYTES 또는 해제 크기 > MAX_DECOMPRESSED_BYTES 면 413.
+    해제에 실패하면 받은 그대로(압축 상태) 돌려준다.
+    """
+    clen = request.headers.get("content-length", "")
+    if clen.isdigit() and int(clen) > MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="request body too large")
+    enc = request.headers.get("content-encoding", "")
+    dec = decoding.decoder_for(enc, MAX_DECOMPRESSED_BYTES)
+    wire: List[bytes] = []
+    wire_size = 0
+    failed = False
+    try:
+        async for chunk in request.stream():
+            if not chunk:
+                continue
+            wire_size += len(chunk)
+            if wire_size > MAX_BODY_BYTES:
+                raise HTTPException(status_code=413, detail="request body too large")
+            wire.append(chunk)
+            if dec is not None and not failed:
+                try:
+                    dec.feed(chunk)
+                except decoding.DecodeError:
+                    failed = True
+        if dec is None or failed or not wire:
+            return b"".join(wire)
         try:
-            raw = gzip.decompress(raw)
-        except Exception:
-            pass
-    return raw
+            return dec.finish()
+        except decoding.DecodeError:
+            return b"".join(wire)
+    except decoding.BodyTooLarge:
+        raise HTTPException(status_code=413, detail="decoded body too large")
+    finally:
+        M_REQUEST_BYTES.inc(request.url.path, amount=wire_size)
+
+def _media_type(ctype: str) -> Tuple[str, str]:
+    """'application/json; charset=utf-8' → ('application/json', 'utf-8')"""
+    mt, _, params = (ctype or "").partition(";")
+    charset = "utf-8"
+    for p in params.split(";"):
+        k, _, v = p.partition("=")
+        if k.strip().lower() == "charset" and v.strip():
+            charset = v.strip().strip('"').lower()
+    return mt.strip().lower(), charset
+
+def _is_json_type(mt: str) -> bool:
+    return mt == "application/json" or mt.endswith("+json") or mt == "text/json"
+
+def parse_json(raw: bytes) -> Any:
+    """bytes 를 바로 파싱 (decode 생략). 실패 시 ValueError."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _parse_json_dict(raw: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        data = parse_json(raw)
+    except (ValueError, RecursionError):
+        return None
+    return data if isinstance(data, dict) else {}
+
+def _parse_form(raw: bytes, charset: str = "utf-8") -> Dict[str, Any]:
+    try:
+        text = raw.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return {}
+    form = parse_qs(text, keep_blank_values=True, encoding=charset)
+    return {k: (v[0] if isinstance(v, list) and v else v) for k, v in form.items()}
 
 def parse_body(raw: bytes, ctype: str) -> Dict[str, Any]:
     if not raw:
         return {}
-    # JSON
-    try:
-        return json.loads(raw.decode("utf-8"))
-    except Exception:
-        pass
-    # x-www-form-urlencoded
-    try:
-        form = parse_qs(raw.decode("utf-8"), keep_blank_values=True)
-        return {k: (v[0] if isinstance(v, list) and v else v) for k, v in form.items()}
-    except Exception:
-        pass
+    mt, charset = _media_type(ctype)
+    tried_json = False
+    # Content-Type 우선
+    if _is_json_type(mt):
+        data = _parse_json_dict(raw)
+        if data is not None:
+            return data
+        tried_json = True
+    elif mt == "application/x-www-form-urlencoded":
+        return _parse_form(raw, charset)
+    # 헤더가 없거나 틀린 경우만 내용으로 추정
+    head = raw.lstrip()[:1]
+    if head in (b"{", b"[") and not tried_json:
+        data = _parse_json_dict(raw)
+        if data is not None:
+            return data
+    if b"=" in raw:
+        return _parse_form(raw, charset)
     return {}
 
 # ─────────────────────────────────────────────────────────────────────────────
 # IP masking
 # ─────────────────────────────────────────────────────────────────────────────
-_IPV4_RE = re.compile(r"^\s*\d{1,3}(?:\.\d{1,3}){3}\s*$")
-
-def _mask_ipv4(ip: str, mode: str, token: str) -> str:
-    parts = ip.split(".")
-    if len(parts) != 4:
-        return ip
-    a, b, c, d = parts
-    if mode == "NONE":
-        return ip
-    if mode == "A":
-        return f"{a}.{token}.{token}.{token}"
-    if mode == "B":
-        return f"{a}.{b}.{token}.{token}"
-    if mode == "C":
-        return f"{a}.{b}.{c}.{token}"
-    if mode == "LAST2":
-        # XXX.XXX.C.D
-        return f"{token}.{token}.{c}.{d}"
-    # default(B)
-    return f"{a}.{b}.{token}.{token}"
-
-def _mask_ipv6(ip: str, mode: str, token: str) -> str:
-    try:
-        addr = ipaddress.ip_address(ip)
-        # IPv4-mapped IPv6 (::ffff:a.b.c.d)
-        if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
-            return _mask_ipv4(str(addr.ipv4_mapped), mode, token)
-        hextets = addr.exploded.split(":")  # 8 hextets
-    except Exception:
-        return ip
-    if mode == "NONE":
-        return ip
-    if mode == "LAST2":
-        return ":".join([token]*6 + hextets[-2:])
-    keep = {"A": 1, "B": 2, "C": 3}.get(mode, 2)
-    return ":".join(hextets[:keep] + [token]*(8-keep))
+ip_masker = masking.IpMasker(IP_MASK_MODE, IP_MASK_TOKEN, mode6=IP_MASK_MODE_V6 or None,
+                             xff=IP_MASK_XFF, cache_size=IP_MASK_CACHE_SIZE)
+
+@lru_cache(maxsize=8)
+def _masker_for(mode: str, token: str) -> masking.IpMasker:
+    return masking.IpMasker(mode, token, mode6=IP_MASK_MODE_V6 or None, xff=IP_MASK_XFF, cache_size=4096)
 
 def mask_ip_text(ip_raw: Optional[str], mode: str = IP_MASK_MODE, token: str = IP_MASK_TOKEN) -> str:
-    if not ip_raw:
-        return "-"
-    ip = ip_raw.split(",")[0].strip()  # X-Forwarded-For 첫 IP 우선
-    if _IPV4_RE.match(ip):
-        return _mask_ipv4(ip, mode, token)
-    if ":" in ip:
-        return _mask_ipv6(ip, mode, token)
-    return ip
+    if mode == IP_MASK_MODE and token == IP_MASK_TOKEN:
+        return ip_masker.mask(ip_raw)
+    return _masker_for(mode, token).mask(ip_raw)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Ban event → Discord message
+# ─────────────────────────────────────────────────────────────────────────────
+def map_ban_event(data: Dict[str, Any]) -> Dict[str, Any]:
+    banned_at = pick(data, "bannedAt", "banned_at", "time")
+    return {
+        "ip": pick(data, "ipAddress", "ip", "ip_address"),
+        "ban_type": pick(data, "banType", "ban_type", default="TEMPORARY"),
+        "reason": pick(data, "reason", default="-"),
+        "banned_at": iso(banned_at),
+        "banned_at_raw": banned_at,  # dedup 시간 구간은 표시 문자열이 아니라 원래 값으로
+        "expires_at": iso(pick(data, "expiresAt", "expires_at")),
+        "by": pick(data, "bannedByAdminLoginId", "by", "admin", default="AUTO_BAN_SYSTEM"),
+        "duration": pick(data, "durationMinutes", "duration_minutes"),
+    }
+
+try:
+    TEMPLATE_OVERRIDES = templates.load_overrides(EMBED_TEMPLATES_FILE)
+except (OSError, ValueError) as e:
+    raise RuntimeError(f"invalid EMBED_TEMPLATES_FILE: {e}")
+
+BAN_TEMPLATE = templates.EmbedTemplate(
+    "🚫 IP Banned",
+    [
+        ("IP", "ip", True),
+        ("타입", "ban_type", True),
+        ("사유", "reason", False),
+        ("차단시각", "banned_at", True),
+        ("만료시각", "expires_at", True),
+        ("관리자", "by", True),
+        ("기간(분)", "duration", True),
+    ],
+    description="자동/수동 차단 이벤트",
+    color=0xE11D48,
+    footer="MSG CTF • IPBan",
+    content=f"<@&{MENTION_ROLE_ID}>" if MENTION_ROLE_ID else "",
+).with_overrides(TEMPLATE_OVERRIDES.get("ban", {}))
+
+def ban_fields(ev: Dict[str, Any], raw: bytes) -> Tuple[Dict[str, str], List[templates.ExtraField]]:
+    """템플릿에 채울 값 + (IP 가 없을 때) RAW 미리보기 필드."""
+    duration = ev["duration"]
+    values = {
+        "ip": f"`{mask_ip_text(ev['ip'], IP_MASK_MODE, IP_MASK_TOKEN)}`",
+        "ban_type": str(ev["ban_type"]),
+        "reason": str(ev["reason"] or "-"),
+        "banned_at": ev["banned_at"],
+        "expires_at": ev["expires_at"],
+        "by": str(ev["by"] or "AUTO_BAN_SYSTEM"),
+        "duration": str(duration) if duration is not None else "-",
+    }
+    extra: List[templates.ExtraField] = []
+    if not ev["ip"]:
+        try:
+            preview = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            preview = base64.b64encode(raw[:2048]).decode()
+        extra.append(("RAW(payload)", f"```{preview[:900]}```", False))
+        log.debug("parsed empty; attached RAW to embed")
+    return values, extra
+
+def mark_duplicate(message: Dict[str, Any], count: int):
+    """merge 모드: 아직 전송 전인 원본 embed 에 중복 수신 횟수 표시."""
+    fields = message["embeds"][0]["fields"]
+    for f in fields:
+        if f["name"] == "중복 수신":
+            f["value"] = f"×{count}"
+            return
+    fields.append({"name": "중복 수신", "value": f"×{count}", "inline": True})
+
+dedup_cache: Optional[dedup.DedupCache] = None
+if DEDUP_MODE != dedup.MODE_OFF:
+    dedup_cache = dedup.DedupCache(ttl=DEDUP_WINDOW, maxsize=DEDUP_MAX_ENTRIES)
+
+async def check_duplicate(ev: Dict[str, Any], message: Optional[Dict[str, Any]]) -> Tuple[Optional[tuple], Optional[dedup.DedupEntry]]:
+    """(dedup key, 중복이면 기존 entry). key 는 전송 실패 시 forget 용."""
+    if dedup_cache is None or not ev["ip"]:
+        return None, None
+    dkey = dedup.ban_key(ev["ip"], ev["ban_type"], ts_normalizer.epoch(ev["banned_at_raw"]), ev["banned_at"],
+                         DEDUP_WINDOW)
+    dup = await dedup_cache.seen_async(dkey, message if DEDUP_MODE == dedup.MODE_MERGE else None)
+    if dup is not None and DEDUP_MODE == dedup.MODE_MERGE and dup.ref is not None:
+        mark_duplicate(dup.ref, dup.count)
+    return dkey, dup
+
+def parse_batch(raw: bytes, ctype: str) -> List[Any]:
+    """JSON 배열 / {"events": [...]} / NDJSON → 항목 리스트 (줄 단위 파싱 실패는 None)."""
+    mt, _ = _media_type(ctype)
+    body = raw.strip()
+    if not body:
+        return []
+    if mt not in ("application/x-ndjson", "application/jsonl", "application/json-seq") and body[:1] in (b"[", b"{"):
+        try:
+            data = parse_json(body)
+        except (ValueError, RecursionError):
+            data = None
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            events = data.get("events")
+            return events if isinstance(events, list) else [data]
+    items: List[Any] = []
+    for line in body.splitlines():
+        line = line.strip().lstrip(b"\x1e")  # json-seq 구분자 허용
+        if not line:
+            continue
+        try:
+            items.append(parse_json(line))
+        except (ValueError, RecursionError):
+            items.append(None)
+    return items
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Alert routes: 종류별 매핑 / 템플릿 / webhook 대상 / lane
+#   WEBHOOK_URL_<TYPE> (없으면 DISCORD_WEBHOOK_URL), ALERT_LANE_<TYPE> (high|normal|low)
+#   예: WEBHOOK_URL_FIRST_BLOOD, ALERT_LANE_SOLVE
+# ─────────────────────────────────────────────────────────────────────────────
+def _route_env(prefix: str, name: str, default: str) -> str:
+    return os.getenv(f"{prefix}_{name.upper().replace('-', '_')}", "").strip() or default
+
+def _route(name: str, template: templates.EmbedTemplate, mapper: alerts.Mapper, lane: str,
+           dedup_key=None) -> AlertRoute:
+    return AlertRoute(name, template, mapper,
+                      url=_route_env("WEBHOOK_URL", name, DISCORD_WEBHOOK_URL),
+                      lane=_route_env("ALERT_LANE", name, lane).lower(),
+                      dedup_key=dedup_key)
+
+def _tpl(name: str, base: templates.EmbedTemplate) -> templates.EmbedTemplate:
+    return base.with_overrides(TEMPLATE_OVERRIDES.get(name, {}))
+
+ROUTES = alerts.Router(default="ban")
+try:
+    # ban: 자동 차단(AUTO_BAN_SYSTEM)은 ALERT_LANE_BAN(기본 low), 관리자 수동 차단은 ALERT_LANE_BAN_ADMIN(기본 high)
+    BAN_ROUTE = ROUTES.add(_route("ban", BAN_TEMPLATE, lambda data, raw: ban_fields(map_ban_event(data), raw),
+                                  alerts.LANE_LOW))
+    BAN_ROUTE.lane_fn = alerts.admin_lane(_route_env("ALERT_LANE", "ban_admin", alerts.LANE_HIGH).lower(),
+                                          BAN_ROUTE.lane)
+    LANE_WEIGHT_MAP = alerts.parse_lane_weights(LANE_WEIGHTS)
+    ROUTES.add(_route("first-blood", _tpl("first-blood", alerts.FIRST_BLOOD_TEMPLATE),
+                      alerts.first_blood_mapper(iso), alerts.LANE_HIGH, alerts.first_blood_key))
+    ROUTES.add(_route("solve", _tpl("solve", alerts.SOLVE_TEMPLATE),
+                      alerts.solve_mapper(iso), alerts.LANE_LOW, alerts.solve_key))
+    ROUTES.add(_route("scoreboard", _tpl("scoreboard", alerts.SCOREBOARD_TEMPLATE),
+                      alerts.scoreboard_mapper(iso), alerts.LANE_NORMAL))
+    ROUTES.add(_route("health", _tpl("health", alerts.HEALTH_TEMPLATE),
+                      alerts.health_mapper(iso), alerts.LANE_HIGH))
+except ValueError as e:
+    raise RuntimeError(f"invalid alert route / lane config: {e}")
+
+def route_of(kind: Optional[str]) -> AlertRoute:
+    """큐/spool 의 종류 이름 → 라우트 (모르는 이름·이전 spool 행은 ban)."""
+    return ROUTES.get(kind) or BAN_ROUTE
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lifecycle: client / delivery queue
+# ─────────────────────────────────────────────────────────────────────────────
+delivery_queue: Optional[DeliveryQueue] = None
+spool: Optional[Spool] = None
+spool_inflight: Set[int] = set()  # 큐/전송 중인 spool id (replay 중복 적재 방지)
+spool_pending = 0                 # 미전송 행 수 (/metrics 요청 때 스레드에서 갱신)
+state_store: Optional[shared.MemoryStore] = None  # STATE_BACKEND 사용 시 워커 간 공유 상태
+_background: List[asyncio.Task] = []
+
+def spool_row(message: Dict[str, Any], route: AlertRoute, lane: str) -> Dict[str, Any]:
+    return {"t": route.name, "l": lane, "m": message}
+
+def enqueue(message: Dict[str, Any], route: AlertRoute, lane: str):
+    """spool 기록 → 큐 적재. 적재 실패 시 spool 행도 정리하고 예외 전달."""
+    sid = spool.append(spool_row(message, route, lane), lease=SPOOL_LEASE) if spool is not None else None
+    try:
+        queue_job(Job(message, sid, route.name, lane))
+    except (QueueFull, QueueClosed):
+        if sid is not None:
+            spool.ack([sid])
+        raise
+
+def queue_job(job: Job):
+    """spool 에 이미 기록한 job 을 큐에 적재. 실패하면 예외 (spool 행 정리는 호출 측)."""
+    dropped = delivery_queue.put_nowait(job)
+    if job.spool_id is not None:
+        spool_inflight.add(job.spool_id)
+    if dropped is not None and dropped.spool_id is not None:
+        spool_inflight.discard(dropped.spool_id)
+        spool.ack([dropped.spool_id])
+
+def replay_spool() -> int:
+    """
+    spool 의 미전송 항목을 큐 여유만큼 다시 적재 (기동 시 + 주기적).
+    lease 가 만료된 행만 가져오므로 다른 워커가 처리 중인 행은 건드리지 않는다.
+    """
+    n, after = 0, 0
+    while True:
+        rows = spool.claim(limit=500, lease=SPOOL_LEASE, after_id=after)
+        if not rows:
+            return n
+        for i, (sid, row) in enumerate(rows):
+            after = sid
+            if sid in spool_inflight:
+                continue  # 이미 이 워커의 큐에 있음 (claim 으로 lease 만 연장됨)
+            if delivery_queue.closed or delivery_queue.depth >= delivery_queue.maxsize:
+                spool.release(r for r, _ in rows[i:] if r not in spool_inflight)
+                return n
+            # {"t": 종류, "l": lane, "m": 메시지} (이전 버전 행은 ban 메시지 그대로)
+            if isinstance(row, dict) and "m" in row and "t" in row:
+                route, message = route_of(row["t"]), row["m"]
+                lane = row.get("l") or route.lane
+            else:
+                route, message, lane = BAN_ROUTE, row, BAN_ROUTE.lane
+            delivery_queue.put_nowait(Job(message, sid, route.name, lane))
+            spool_inflight.add(sid)
+            n += 1
+
+async def spool_replay_loop():
+    while True:
+        n = replay_spool()
+        if n:
+            log.info("spool: replayed undelivered alerts", extra={"count": n})
+        await asyncio.sleep(SPOOL_REPLAY_INTERVAL)
+
+async def spool_compact_loop():
+    while True:
+        await asyncio.sleep(SPOOL_COMPACT_INTERVAL)
+        await asyncio.to_thread(spool.compact)  # DELETE + WAL checkpoint 는 오래 걸릴 수 있어 이벤트 루프 밖에서
+
+def reload_api_keys():
+    if keyring.reload():
+        log.info("api keys: reloaded", extra={"keys": len(keyring)})
+    if ip_allowlist.reload():
+        log.info("allowlist: reloaded", extra={"networks": len(ip_allowlist.networks)})
+
+@app.on_event("startup")
+async def startup():
+    global http_client, dispatcher, delivery_queue, spool, state_store, dedup_cache
+    try:
+        # kill -HUP <pid> → 키 목록 / 허용 목록 즉시 재로드 (파일 mtime 확인과 별개)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_api_keys)
+    except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+        pass  # Windows / 메인 스레드가 아닌 loop (테스트 클라이언트 등)
+    if STATE_BACKEND:
+        state_store = shared.open_store(STATE_BACKEND, STATE_PATH)
+        if dedup_cache is not None:
+            dedup_cache = dedup.SharedDedupCache(state_store, ttl=DEDUP_WINDOW, maxsize=DEDUP_MAX_ENTRIES)
+    http_client = build_http_client()
+    dispatcher = WebhookDispatcher(http_client, max_retries=WEBHOOK_MAX_RETRIES,
+                                   backoff_base=WEBHOOK_BACKOFF_BASE, backoff_max=WEBHOOK_BACKOFF_MAX,
+                                   shared=state_store)
+    if DELIVERY_MODE == "queue":
+        split = BATCH_OVERFLOW == batcher.OVERFLOW_SPLIT
+        delivery_queue = DeliveryQueue(post_batch, maxsize=QUEUE_MAX_SIZE,
+                                       workers=QUEUE_WORKERS, overflow=QUEUE_OVERFLOW,
+                                       batch_window=BATCH_WINDOW_MS / 1000.0,
+                                       batch_max=BATCH_MAX_EVENTS,
+                                       batch_full=batcher.is_full if split else None,
+                                       lanes=LANE_WEIGHT_MAP,
+                                       latency_target=LANE_LATENCY_TARGET_MS / 1000.0)
+        delivery_queue.start()
+        if SPOOL_PATH:
+            spool = Spool(SPOOL_PATH, SPOOL_SYNC)
+            if WORKERS <= 1:
+                # 이 파일을 쓰는 워커는 하나뿐 → 이전 실행이 잡아 둔 lease 는 모두 무효 (바로 replay)
+                n = spool.release_all()
+                if n:
+                    log.info("spool: released stale leases", extra={"count": n})
+            _background.append(asyncio.create_task(spool_replay_loop()))
+            _background.append(asyncio.create_task(spool_compact_loop()))
+
+@app.on_event("shutdown")
+async def shutdown():
+    global http_client, dispatcher, delivery_queue, spool, state_store
+    for t in _background:
+        t.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
+    _background.clear()
+    # 큐를 먼저 비운 뒤(drain) 클라이언트를 닫는다. 못 보낸 항목은 spool 에 남는다
+    if delivery_queue is not None:
+        await delivery_queue.close(QUEUE_DRAIN_TIMEOUT)
+        delivery_queue = None
+    if spool is not None:
+        # 큐에 남아 못 보낸 항목의 lease 해제 → 재시작한 워커(또는 다른 워커)가 바로 replay
+        spool.release(list(spool_inflight))
+        await asyncio.to_thread(spool.compact)
+        await asyncio.to_thread(spool.close)
+        spool = None
+        spool_inflight.clear()
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+        dispatcher = None
+    if state_store is not None:
+        state_store.close()
+        state_store = None
+
+metrics.gauge("alert_queue_depth", "Alerts waiting in the delivery queue",
+              fn=lambda: delivery_queue.depth if delivery_queue is not None else None)
+metrics.gauge("alert_queue_lane_depth", "Alerts waiting in the delivery queue by priority lane", ["lane"],
+              fn=lambda: delivery_queue.lane_depths() if delivery_queue is not None else None)
+metrics.counter_func("alert_queue_events_total", "Delivery queue events", ["event"],
+                     fn=lambda: delivery_queue.stats if delivery_queue is not None else None)
+metrics.gauge("alert_circuit_state", "Webhook circuit state (0=closed, 1=half_open, 2=open)", ["route"],
+              fn=lambda: {r.name: breaker.STATE_CODES[breaker_for(r.url).state] for r in ROUTES})
+metrics.counter_func("alert_log_dropped_total", "Log records dropped because the log queue was full",
+                     fn=lambda: log_handler.dropped)
+metrics.gauge("alert_spool_pending", "Undelivered alerts in the disk spool",
+              fn=lambda: spool_pending if spool is not None else None)
+metrics.counter_func("alert_dedup_total", "Dedup cache lookups", ["result"],
+                     fn=lambda: {"hit": dedup_cache.hits, "miss": dedup_cache.misses} if dedup_cache is not None else None)
+metrics.counter_func("alert_ip_mask_cache_total", "IP mask LRU lookups", ["result"],
+                     fn=lambda: {"hit": ip_masker.cache_info().hits, "miss": ip_masker.cache_info().misses})
+metrics.gauge("alert_dedup_entries", "Dedup cache size",
+              fn=lambda: len(dedup_cache) if dedup_cache is not None else None)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Endpoints
 # ─────────────────────────────────────────────────────────────────────────────
+@app.get("/metrics")
+async def metrics_endpoint():
+    global spool_pending
+    if spool is not None:  # COUNT(*) 는 행 수에 비례 → 스크레이프마다 스레드에서 세어 두고 gauge 는 그 값을 읽는다
+        spool_pending = await asyncio.to_thread(spool.pending_count)
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/healthz")
 async def health():
-    return {"ok": True}
+    out: Dict[str, Any] = {"ok": True, "api_keys": len(keyring)}
+    if ip_allowlist.enabled:
+        out["allowlist"] = len(ip_allowlist.networks)
+    if dedup_cache is not None:
+        out["dedup"] = dedup_cache.stats()
+    if state_store is not None:
+        out["state"] = {"backend": STATE_BACKEND, "worker": os.getpid()}
+    out["routes"] = {r.name: {"lane": r.lane, "default_webhook": r.url == DISCORD_WEBHOOK_URL} for r in ROUTES}
+    if delivery_queue is not None:
+        out["lanes"] = delivery_queue.lane_depths()
+    # 회로 상태: 하나라도 closed 가 아니면 degraded (프로세스는 정상이므로 200 유지)
+    circuit = {r.name: breaker_for(r.url).snapshot() for r in ROUTES}
+    if FALLBACK_WEBHOOK_URL:
+        circuit["fallback"] = breaker_for(FALLBACK_WEBHOOK_URL).snapshot()
+    out["circuit"] = circuit
+    out["degraded"] = any(c["state"] != breaker.STATE_CLOSED for c in circuit.values())
+    return out
 
 @app.post("/alert/ban")
 async def alert_ban(
@@ -169,77 +890,174 @@ async def alert_ban(
     x_api_key: Optional[str] = Header(None),
     authorization: Optional[str] = Header(None)
 ):
-    key = extract_api_key(x_api_key, authorization)
-    if key != API_KEY:
-        raise HTTPException(status_code=401, detail="invalid api key")
+    authorize(request, x_api_key, authorization)
 
-    # logging
-    headers_for_log = {k.lower(): v for k, v in request.headers.items()}
-    raw = await read_raw(request)
-    ctype = headers_for_log.get("content-type", "")
-    clen  = headers_for_log.get("content-length", "")
-    if DEBUG_LOGS:
-        print(f"[ALERT] method=POST path=/alert/ban ctype='{ctype}' clen='{clen}'")
-        head_sample = {k: headers_for_log[k] for k in ["content-type","content-encoding","expect","connection","user-agent"] if k in headers_for_log}
-        print("[ALERT] hdrs:", head_sample)
-        try:
-            print("[ALERT] raw(utf8):", raw.decode("utf-8"))
-        except Exception:
-            print("[ALERT] raw(b64):", base64.b64encode(raw[:1024]).decode())
+    with M_READ_RAW.time():
+        raw = await read_raw(request)
+    ctype = request.headers.get("content-type", "")
 
     # parse
-    data = parse_body(raw, ctype)
+    with M_PARSE.time():
+        data = parse_body(raw, ctype)
     if not data:
         qs = dict(request.query_params)
         if qs:
             data = qs
+    log_request(request, raw, data)
 
-    # mapping
-    ip = pick(data, "ipAddress", "ip", "ip_address")
-    ban_type = pick(data, "banType", "ban_type", default="TEMPORARY")
-    reason = pick(data, "reason", default="-")
-    banned_at = pick(data, "bannedAt", "banned_at", "time")
-    expires_at = pick(data, "expiresAt", "expires_at")
-    by = pick(data, "bannedByAdminLoginId", "by", "admin", default="AUTO_BAN_SYSTEM")
-    duration = pick(data, "durationMinutes", "duration_minutes")
-
-    ip_display = mask_ip_text(ip, IP_MASK_MODE, IP_MASK_TOKEN)
-
-    fields = [
-        {"name": "IP", "value": f"`{ip_display}`", "inline": True},
-        {"name": "타입", "value": str(ban_type), "inline": True},
-        {"name": "사유", "value": str(reason or "-"), "inline": False},
-        {"name": "차단시각", "value": iso(banned_at), "inline": True},
-        {"name": "만료시각", "value": iso(expires_at), "inline": True},
-        {"name": "관리자", "value": str(by or "AUTO_BAN_SYSTEM"), "inline": True},
-        {"name": "기간(분)", "value": str(duration) if duration is not None else "-", "inline": True},
-    ]
-
-    if not ip:
-        preview = ""
+    ev = map_ban_event(data)
+    values, extra = ban_fields(ev, raw)
+    # queue 모드는 merge / spool / 묶음 전송이 dict 를 다루므로 dict, sync 모드는 템플릿에서 바로 bytes
+    message = BAN_ROUTE.template.message(values, extra) if delivery_queue is not None else None
+
+    dkey, dup = await check_duplicate(ev, message)
+    if dup is not None:
+        return {"ok": True, "duplicate": True, "count": dup.count}
+    return await submit(BAN_ROUTE, values, extra, dkey, message)
+
+async def submit(route: AlertRoute, values: Dict[str, str], extra: List[templates.ExtraField],
+                 dkey: Optional[tuple], message: Optional[Dict[str, Any]] = None):
+    """queue 모드: 적재 후 202, sync 모드: 렌더링한 bytes 를 route 의 webhook 으로 바로 전송."""
+    M_EVENTS.inc(route.name)
+    if delivery_queue is not None:
         try:
-            preview = raw.decode("utf-8")
-        except Exception:
-            preview = base64.b64encode(raw[:2048]).decode()
-        fields.append({"name": "RAW(payload)", "value": f"```{preview[:900]}```", "inline": False})
-        if DEBUG_LOGS:
-            print("[ALERT] parsed empty; attached RAW to embed.")
-
-    content = f"<@&{MENTION_ROLE_ID}>" if MENTION_ROLE_ID else ""
-    embed = {
-        "title": "🚫 IP Banned",
-        "description": "자동/수동 차단 이벤트",
-        "color": 0xE11D48,
-        "fields": fields,
-        "footer": {"text": "MSG CTF • IPBan"},
-    }
+            enqueue(message or route.template.message(values, extra), route, route.lane_for(values))
+        except (QueueFull, QueueClosed) as e:
+            if dkey is not None:
+                await dedup_cache.forget_async(dkey)
+            if isinstance(e, QueueFull):
+                raise HTTPException(status_code=503, detail="alert queue full", headers={"Retry-After": "1"})
+            raise HTTPException(status_code=503, detail="shutting down")
+        return JSONResponse({"ok": True, "queued": True}, status_code=202)
 
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        r = await client.post(DISCORD_WEBHOOK_URL, json={"content": content, "embeds": [embed]})
-        if r.status_code >= 300:
-            raise HTTPException(status_code=502, detail=f"discord webhook failed: {r.status_code} {r.text}")
+    try:
+        await post_webhook(content=route.template.render(values, extra), url=route.url,
+                           priority=route.lane_for(values) == alerts.LANE_HIGH)
+    except (WebhookError, breaker.CircuitOpen) as e:
+        if dkey is not None:
+            await dedup_cache.forget_async(dkey)  # 백엔드 재시도가 막히지 않도록
+        if isinstance(e, breaker.CircuitOpen):
+            raise HTTPException(status_code=503, detail="discord webhook circuit open",
+                                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+        raise HTTPException(status_code=502, detail=f"discord webhook failed: {e}")
 
     return {"ok": True}
 
+@app.post("/alert/ban/batch")
+async def alert_ban_batch(
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    authorize(request, x_api_key, authorization)
+
+    with M_READ_RAW.time():
+        raw = await read_raw(request)
+    with M_PARSE.time():
+        items = parse_batch(raw, request.headers.get("content-type", ""))
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"too many events (max {BATCH_MAX_ITEMS})")
+    log_request(request, raw, items, items=len(items))
+
+    results: List[Dict[str, Any]] = []
+    pending: List[Tuple[Dict[str, Any], Dict[str, Any], Optional[tuple], str]] = []  # (result, message, dkey, lane)
+    for i, item in enumerate(items):
+        res: Dict[str, Any] = {"index": i}
+        results.append(res)
+        if not isinstance(item, dict):
+            res["status"] = "invalid"
+            continue
+        ev = map_ban_event(item)
+        item_raw = b"" if ev["ip"] else json.dumps(item, ensure_ascii=False).encode("utf-8", "backslashreplace")
+        values, extra = ban_fields(ev, item_raw)
+        message = BAN_ROUTE.template.message(values, extra)
+        dkey, dup = await check_duplicate(ev, message)
+        if dup is not None:
+            res.update(status="duplicate", count=dup.count)
+            continue
+        M_EVENTS.inc(BAN_ROUTE.name)
+        pending.append((res, message, dkey, BAN_ROUTE.lane_for(values)))
+
+    failed = False
+    if pending and delivery_queue is not None:
+        # queue 모드: spool 에는 트랜잭션 하나로 기록한 뒤 항목마다 큐 적재
+        rows = [spool_row(m, BAN_ROUTE, lane) for _, m, _, lane in pending]
+        sids = spool.append_many(rows, lease=SPOOL_LEASE) if spool is not None else [None] * len(pending)
+        unqueued: List[int] = []
+        for (res, message, dkey, lane), sid in zip(pending, sids):
+            try:
+                queue_job(Job(message, sid, BAN_ROUTE.name, lane))
+                res["status"] = "queued"
+            except (QueueFull, QueueClosed):
+                if dkey is not None:
+                    await dedup_cache.forget_async(dkey)
+                if sid is not None:
+                    unqueued.append(sid)
+                res["status"] = "rejected"
+        if unqueued:
+            spool.ack(unqueued)
+    elif pending:
+        # sync 모드: webhook 메시지 하나(embed 10개 / 6000자)에 들어가는 만큼씩 순서대로 전송.
+        # 요약("+N more") 없이 모두 보내고, 결과는 메시지 단위로 (실패하면 그 뒤는 보내지 않음)
+        for idx in batcher.group_messages([m for _, m, _, _ in pending]):
+            group = [pending[i] for i in idx]
+            if not failed:
+                try:
+                    for payload in batcher.pack_messages([m for _, m, _, _ in group], batcher.OVERFLOW_SPLIT):
+                        await post_webhook(payload, url=BAN_ROUTE.url)
+                except (WebhookError, breaker.CircuitOpen) as e:
+                    failed, error = True, str(e)[:200]
+                else:
+                    for res, _, _, _ in group:
+                        res["status"] = "sent"
+                    continue
+            for res, _, dkey, _ in group:
+                res.update(status="failed", error=error)
+                if dkey is not None:
+                    await dedup_cache.forget_async(dkey)
+
+    counts: Dict[str, int] = {}
+    for res in results:
+        counts[res["status"]] = counts.get(res["status"], 0) + 1
+    body = {"ok": not failed and not counts.get("rejected"), "counts": counts, "items": results}
+    if failed:
+        return JSONResponse(body, status_code=502)
+    if counts.get("rejected") and not counts.get("queued"):
+        return JSONResponse(body, status_code=503, headers={"Retry-After": "1"})
+    return JSONResponse(body, status_code=202 if counts.get("queued") else 200)
+
+@app.post("/alert/{kind}")
+async def alert_generic(
+    kind: str,
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    """first-blood / solve / scoreboard / health (ban 은 위의 전용 경로)."""
+    route = ROUTES.get(kind)
+    if route is BAN_ROUTE:  # /alert/BAN 등 표기만 다른 경로 (인증은 alert_ban 에서)
+        return await alert_ban(request, x_api_key, authorization)
+    authorize(request, x_api_key, authorization)
+    if route is None:
+        raise HTTPException(status_code=404, detail=f"unknown alert type: {kind}")
+
+    with M_READ_RAW.time():
+        raw = await read_raw(request)
+    with M_PARSE.time():
+        data = parse_body(raw, request.headers.get("content-type", ""))
+    if not data:
+        data = dict(request.query_params)
+    log_request(request, raw, data, type=route.name)
+
+    values, extra = route.mapper(data, raw)
+    dkey = None
+    if dedup_cache is not None and route.dedup_key is not None:
+        dkey = route.dedup_key(values)
+        if dkey is not None:
+            dup = await dedup_cache.seen_async(dkey)
+            if dup is not None:
+                return {"ok": True, "duplicate": True, "count": dup.count}
+    return await submit(route, values, extra, dkey)
+
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=int(os.getenv("PORT", "8088")))
+    uvicorn.run("app:app", host="0.0.0.0", port=int(os.getenv("PORT", "8088")), workers=WORKERS)
@@ -0,0 +1,173 @@
+# auth.py — API 키 검증 (여러 키 / 상수 시간 비교 / 파일·SIGHUP 재로드) + 키별 token bucket
+import hashlib
+import hmac
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import logs
+
+RESULT_OK = "ok"
+RESULT_INVALID = "invalid"     # 키 없음 / 틀림 → 401
+RESULT_LIMITED = "limited"     # 키별 한도 초과 → 429
+RESULT_BLOCKED = "blocked"     # 틀린 키를 너무 자주 보내는 클라이언트 → 429
+
+log = logs.get("auth")
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+
+def key_id(key: str) -> str:
+    """로그/메트릭용 키 식별자 (해시 앞 8자리, 키 자체는 남기지 않음)."""
+    return _digest(key).hex()[:8]
+
+
+def parse_keys(text: str) -> List[str]:
+    """쉼표 또는 줄바꿈 구분, '#' 뒤는 주석."""
+    out = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        out.extend(k.strip() for k in line.split(",") if k.strip())
+    return out
+
+
+class TokenBucket:
+    """
+    이름별 token bucket (rate 개/초, 최대 burst 개). rate <= 0 이면 제한 없음.
+    항목 수가 max_entries 를 넘으면 가득 찬(=오래 안 쓴) 버킷부터 정리.
+    """
+
+    def __init__(self, rate: float, burst: float, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._buckets: Dict[str, List[float]] = {}  # name → [tokens, last]
+
+    def allow(self, name: str) -> bool:
+        if self.rate <= 0:
+            return True
+        now = self.clock()
+        b = self._buckets.get(name)
+        if b is None:
+            if len(self._buckets) >= self.max_entries:
+                self._prune(now)
+            b = self._buckets[name] = [self.burst, now]
+        else:
+            b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+            b[1] = now
+        if b[0] < 1.0:
+            return False
+        b[0] -= 1.0
+        return True
+
+    def retry_after(self, name: str) -> float:
+        b = self._buckets.get(name)
+        if b is None or self.rate <= 0:
+            return 0.0
+        return max(0.0, (1.0 - b[0]) / self.rate)
+
+    def _prune(self, now: float):
+        full = (self.burst - 1.0) / self.rate
+        self._buckets = {k: b for k, b in self._buckets.items() if now - b[1] < full}
+        if len(self._buckets) >= self.max_entries:
+            self._buckets.clear()
+
+
+class KeyRing:
+    """
+    활성 API 키 집합. 주어진 키(그대로 사용) + 키 파일(쉼표/줄바꿈 구분, '#' 주석)을 합친 것.
+    - 비교: 받은 키의 SHA-256 을 모든 활성 키의 digest 와 hmac.compare_digest 로 (일치해도 끝까지 비교)
+      → 키 길이/내용/몇 번째 키인지가 응답 시간에 드러나지 않는다
+    - 재로드: reload() (SIGHUP 핸들러) 또는 check_interval 초마다 파일 mtime 확인.
+      새 목록이 비었거나 읽기에 실패하면 기존 키 유지
+    - 한도: 키마다 TokenBucket(rate, burst), 틀린 키는 클라이언트(주소)마다 별도 bucket
+    """
+
+    def __init__(self, keys: Iterable[str] = (), path: str = "", check_interval: float = 5.0,
+                 rate: float = 0.0, burst: float = 0.0, fail_rate: float = 0.0, fail_burst: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.keys = [k for k in keys if k]
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self.limiter = TokenBucket(rate, burst or rate, clock=clock)
+        self.fail_limiter = TokenBucket(fail_rate, fail_burst or fail_rate, clock=clock)
+        self._digests: List[Tuple[bytes, str]] = []  # (digest, key_id)
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.loaded_at = 0.0
+        self.stats: Dict[str, int] = {RESULT_OK: 0, RESULT_INVALID: 0, RESULT_LIMITED: 0, RESULT_BLOCKED: 0,
+                                      "reloads": 0, "reload_errors": 0}
+        if not self.reload():
+            raise ValueError("no API key configured (API_KEY, API_KEYS or API_KEYS_FILE)")
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def _read(self) -> Iterable[str]:
+        keys = list(self.keys)
+        if self.path:
+            with open(self.path, "r", encoding="utf-8") as f:
+                keys += parse_keys(f.read())
+        return dict.fromkeys(keys)  # 순서 유지 + 중복 제거
+
+    def reload(self) -> bool:
+        """키 목록 다시 읽기. 적용했으면 True."""
+        try:
+            mtime = os.stat(self.path).st_mtime if self.path else None
+            keys = self._read()
+        except (OSError, UnicodeDecodeError) as e:
+            self.stats["reload_errors"] += 1
+            log.warning("api keys: reload failed, keeping previous keys",
+                        extra={"keys": len(self._digests), "error": repr(e)})
+            return False
+        if not keys:
+            self.stats["reload_errors"] += 1
+            log.warning("api keys: new key list is empty, keeping previous keys", extra={"keys": len(self._digests)})
+            return False
+        self._digests = [(d, d.hex()[:8]) for d in map(_digest, keys)]
+        self._mtime = mtime
+        self.loaded_at = time.time()
+        self.stats["reloads"] += 1
+        return True
+
+    def maybe_reload(self):
+        """check_interval 마다 키 파일 mtime 확인 → 바뀌었으면 reload."""
+        if not self.path or self.check_interval <= 0:
+            return
+        now = self.clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._mtime and self.reload():
+            log.info("api keys: reloaded", extra={"keys": len(self._digests), "file": self.path})
+
+    def match(self, key: str) -> Optional[str]:
+        """일치하는 키의 key_id (없으면 None). 모든 키와 비교한다."""
+        d = _digest(key)
+        found = None
+        for digest, kid in self._digests:
+            if hmac.compare_digest(d, digest):
+                found = kid
+        return found
+
+    def check(self, key: str, client: str = "") -> Tuple[str, Optional[str]]:
+        """(RESULT_*, key_id). 본문을 읽기 전에 호출."""
+        self.maybe_reload()
+        kid = self.match(key) if key else None
+        if kid is None:
+            result = RESULT_INVALID if self.fail_limiter.allow(client) else RESULT_BLOCKED
+        elif not self.limiter.allow(kid):
+            result = RESULT_LIMITED
+        else:
+            result = RESULT_OK
+        self.stats[result] += 1
+        return result, kid
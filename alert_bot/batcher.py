@@ -0,0 +1,117 @@
+# batcher.py — 여러 webhook 메시지를 하나로 묶기 (embed 10개 / 6000자 한도)
+from typing import Any, Dict, List
+
+MAX_EMBEDS = 10          # webhook 메시지당 embed 수
+MAX_TOTAL_CHARS = 6000   # 메시지 내 모든 embed 텍스트 합
+MAX_CONTENT = 2000       # content 길이
+MAX_DESCRIPTION = 4096   # embed description 길이
+
+OVERFLOW_SUMMARY = "summary"  # 넘친 이벤트는 "+N more" embed 한 개로 요약
+OVERFLOW_SPLIT = "split"      # 넘친 이벤트는 다음 메시지로 나눠 전송
+
+
+def embed_chars(embed: Dict[str, Any]) -> int:
+    """Discord 가 6000자 한도에 세는 텍스트 길이."""
+    n = len(embed.get("title") or "") + len(embed.get("description") or "")
+    n += len((embed.get("footer") or {}).get("text") or "")
+    n += len((embed.get("author") or {}).get("name") or "")
+    for f in embed.get("fields") or ():
+        n += len(f.get("name") or "") + len(f.get("value") or "")
+    return n
+
+
+def message_embeds(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [e for m in messages for e in (m.get("embeds") or ())]
+
+
+def is_full(messages: List[Dict[str, Any]]) -> bool:
+    """메시지 하나에 더 담을 수 없으면 True (split 모드의 조기 flush 조건)."""
+    embeds = message_embeds(messages)
+    return len(embeds) >= MAX_EMBEDS or sum(embed_chars(e) for e in embeds) >= MAX_TOTAL_CHARS
+
+
+def merge_content(messages: List[Dict[str, Any]]) -> str:
+    seen: List[str] = []
+    for m in messages:
+        c = m.get("content") or ""
+        if c and c not in seen:
+            seen.append(c)
+    return " ".join(seen)[:MAX_CONTENT]
+
+
+def summary_line(embed: Dict[str, Any]) -> str:
+    fields = embed.get("fields") or []
+    head = fields[0]["value"] if fields else (embed.get("description") or "")
+    tail = f" · {fields[1]['value']}" if len(fields) > 1 else ""
+    return f"{embed.get('title') or '-'} — {head}{tail}"
+
+
+def summary_embed(rest: List[Dict[str, Any]], budget: int, color: Any = None) -> Dict[str, Any]:
+    title = f"+{len(rest)} more"
+    lines, used = [], len(title)
+    limit = min(MAX_DESCRIPTION, max(0, budget - len(title)))
+    for i, e in enumerate(rest):
+        line = summary_line(e)
+        more = f"… (+{len(rest) - i})"
+        if used + len(line) + 1 + len(more) > limit:
+            lines.append(more)
+            break
+        lines.append(line)
+        used += len(line) + 1
+    embed = {"title": title, "description": "\n".join(lines)[:limit]}
+    if color is not None:
+        embed["color"] = color
+    return embed
+
+
+def group_messages(messages: List[Dict[str, Any]]) -> List[List[int]]:
+    """메시지 인덱스를 webhook 메시지 하나(embed 10개 / 6000자)에 들어가는 만큼씩 순서대로 나눈 묶음."""
+    groups: List[List[int]] = []
+    count = used = 0
+    for i, m in enumerate(messages):
+        embeds = m.get("embeds") or ()
+        n = sum(embed_chars(e) for e in embeds)
+        if not groups or (groups[-1] and (count + len(embeds) > MAX_EMBEDS or used + n > MAX_TOTAL_CHARS)):
+            groups.append([])
+            count = used = 0
+        groups[-1].append(i)
+        count += len(embeds)
+        used += n
+    return groups
+
+
+def pack_messages(messages: List[Dict[str, Any]], overflow: str = OVERFLOW_SUMMARY) -> List[Dict[str, Any]]:
+    """
+    window 동안 모인 메시지들을 webhook payload 목록으로 묶는다.
+    - 한 메시지에 다 들어가면 1개
+    - summary: 앞부분 + "+N more" 요약 embed 로 1개
+    - split  : 한도에 맞춰 여러 개
+    """
+    if len(messages) == 1:
+        return list(messages)
+    content = merge_content(messages)
+    embeds = message_embeds(messages)
+
+    chunks: List[List[Dict[str, Any]]] = [[]]
+    used = 0
+    for e in embeds:
+        n = embed_chars(e)
+        if chunks[-1] and (len(chunks[-1]) >= MAX_EMBEDS or used + n > MAX_TOTAL_CHARS):
+            chunks.append([])
+            used = 0
+        chunks[-1].append(e)
+        used += n
+
+    if len(chunks) == 1:
+        return [{"content": content, "embeds": chunks[0]}]
+    if overflow == OVERFLOW_SPLIT:
+        return [{"content": content if i == 0 else "", "embeds": c} for i, c in enumerate(chunks)]
+
+    # summary: 첫 묶음에서 요약 embed 자리(개수 1, 글자 여유)를 확보
+    head = list(chunks[0])
+    used = sum(embed_chars(e) for e in head)
+    while head and (len(head) >= MAX_EMBEDS or MAX_TOTAL_CHARS - used < 200):
+        used -= embed_chars(head.pop())
+    rest = embeds[len(head):]
+    color = head[0].get("color") if head else rest[0].get("color")
+    return [{"content": content, "embeds": head + [summary_embed(rest, MAX_TOTAL_CHARS - used, color)]}]
@@ -0,0 +1,89 @@
+# bench_allowlist.py — IP 허용 목록: 리스트 선형 검사 vs CidrSet(prefix 길이별 집합) 을 큰 목록으로 비교
+#
+#   python bench/bench_allowlist.py --n 200000 --sizes 10,1000,10000,100000
+#
+# 목록은 /32, /24, /16 과 IPv6 /64, /128 을 섞어서 만들고, 조회의 절반쯤이 목록에 걸리도록 한다.
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import allowlist  # noqa: E402
+
+
+def make_networks(size: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(size):
+        r = rng.random()
+        if r < 0.5:
+            out.append(ipaddress.ip_network(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}."
+                                            f"{rng.randint(1, 254)}/32"))
+        elif r < 0.7:
+            out.append(ipaddress.ip_network(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.0/24"))
+        elif r < 0.75:
+            out.append(ipaddress.ip_network(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.0.0/16"))
+        elif r < 0.9:
+            out.append(ipaddress.IPv6Network((rng.getrandbits(64) << 64, 64)))
+        else:
+            out.append(ipaddress.IPv6Network((rng.getrandbits(128), 128)))
+    return out
+
+
+def make_lookups(nets: list, n: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            net = rng.choice(nets)  # 목록 안 (네트워크 안의 임의 주소)
+            host = rng.getrandbits(net.max_prefixlen - net.prefixlen) if net.prefixlen < net.max_prefixlen else 0
+            out.append(str(net.network_address + host))
+        elif rng.random() < 0.8:
+            out.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+        else:
+            out.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+    return out
+
+
+def linear(nets: list):
+    """변경 전 방식을 CIDR 로 넓힌 것: 주소 하나마다 목록 전체를 훑는다."""
+    def check(ip: str) -> bool:
+        addr = ipaddress.ip_address(ip)
+        return any(addr in net for net in nets)
+    return check
+
+
+def timed(label: str, fn, data: list):
+    t0 = time.perf_counter()
+    hits = sum(1 for ip in data if fn(ip))
+    dt = time.perf_counter() - t0
+    print(f"  {label:<22} {dt:8.3f}s  {dt / len(data) * 1e9:10.1f} ns/addr  hits={hits}")
+    return dt, hits
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--sizes", default="10,1000,10000,100000")
+    ap.add_argument("--linear-max", type=int, default=1000, help="이보다 큰 목록은 선형 검사 생략 (너무 느림)")
+    args = ap.parse_args()
+    rng = random.Random(7)
+    for size in (int(s) for s in args.sizes.split(",")):
+        nets = make_networks(size, rng)
+        data = make_lookups(nets, args.n, rng)
+        t0 = time.perf_counter()
+        cidrs = allowlist.CidrSet(nets)
+        print(f"allowlist {size:,} networks (compile {(time.perf_counter() - t0) * 1000:.1f}ms), "
+              f"{len(data):,} lookups")
+        new, hits = timed("CidrSet", cidrs.__contains__, data)
+        if size <= args.linear_max:
+            k = max(1, min(len(data), args.n * 10 // size))  # 큰 목록은 표본만
+            base, base_hits = timed("linear scan", linear(nets), data[:k])
+            base *= len(data) / k
+            assert k < len(data) or base_hits == hits
+            print(f"  speedup {base / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_client.py — 요청마다 AsyncClient 생성(이전 방식) vs 앱 수명 공유 클라이언트 지연 비교
+#
+#   python bench/bench_client.py --requests 500 --concurrency 1 --latency-ms 0
+#
+# 로컬 대역 서버는 평문 HTTP 이므로 TCP 연결 비용만 드러난다.
+# 실제 discord.com 은 TLS 핸드셰이크까지 더해지므로 차이가 더 커진다.
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fake_discord import FakeDiscord  # noqa: E402
+
+PAYLOAD = {
+    "content": "",
+    "embeds": [{
+        "title": "🚫 IP Banned",
+        "color": 0xE11D48,
+        "fields": [{"name": "IP", "value": "`XXX.XXX.1.2`", "inline": True}],
+    }],
+}
+
+
+def summarize(name: str, samples: list[float], wall: float):
+    samples = sorted(samples)
+    q = statistics.quantiles(samples, n=100) if len(samples) >= 2 else samples * 99
+    print(f"{name:<14} n={len(samples):<6} rps={len(samples) / wall:8.1f}  "
+          f"mean={statistics.fmean(samples) * 1000:7.3f}ms  p50={q[49] * 1000:7.3f}ms  "
+          f"p95={q[94] * 1000:7.3f}ms  p99={q[98] * 1000:7.3f}ms")
+
+
+async def run(label: str, url: str, n: int, concurrency: int, shared: bool):
+    samples: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+    client = None
+    if shared:
+        import app as alert_app
+        client = alert_app.build_http_client()
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            if shared:
+                r = await client.post(url, json=PAYLOAD)
+            else:
+                async with httpx.AsyncClient(timeout=5) as c:
+                    r = await c.post(url, json=PAYLOAD)
+            samples.append(time.perf_counter() - t0)
+            r.raise_for_status()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = time.perf_counter() - t0
+    if client is not None:
+        await client.aclose()
+    summarize(label, samples, wall)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="fake webhook 응답 지연")
+    args = ap.parse_args()
+
+    srv = FakeDiscord(latency_ms=args.latency_ms).start()
+    os.environ.setdefault("API_KEY", "bench")
+    os.environ.setdefault("DISCORD_WEBHOOK_URL", srv.url)
+    try:
+        asyncio.run(run("per-request", srv.url, args.requests, args.concurrency, shared=False))
+        conns = srv.connections
+        asyncio.run(run("shared-pool", srv.url, args.requests, args.concurrency, shared=True))
+        print(f"connections opened: per-request={conns} shared-pool={srv.connections - conns}")
+    finally:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
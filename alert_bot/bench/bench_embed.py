@@ -0,0 +1,90 @@
+# bench_embed.py — ban 알림 1건의 메시지 생성 + 직렬화 비용: 이전 방식 vs EmbedTemplate
+#
+#   python bench/bench_embed.py --n 100000
+#
+# 이전 방식: 요청마다 fields/embed dict 를 새로 만들고 httpx 가 json= 으로 직렬화(ensure_ascii, 재시도마다 다시).
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import templates  # noqa: E402
+
+BAN = templates.EmbedTemplate(
+    "🚫 IP Banned",
+    [("IP", "ip", True), ("타입", "ban_type", True), ("사유", "reason", False), ("차단시각", "banned_at", True),
+     ("만료시각", "expires_at", True), ("관리자", "by", True), ("기간(분)", "duration", True)],
+    description="자동/수동 차단 이벤트", color=0xE11D48, footer="MSG CTF • IPBan", content="<@&123456789012345678>",
+)
+
+
+# ── 변경 전 구현 (비교 기준) ────────────────────────────────────────────────
+def legacy_message(v: dict) -> dict:
+    fields = [
+        {"name": "IP", "value": v["ip"], "inline": True},
+        {"name": "타입", "value": v["ban_type"], "inline": True},
+        {"name": "사유", "value": v["reason"], "inline": False},
+        {"name": "차단시각", "value": v["banned_at"], "inline": True},
+        {"name": "만료시각", "value": v["expires_at"], "inline": True},
+        {"name": "관리자", "value": v["by"], "inline": True},
+        {"name": "기간(분)", "value": v["duration"], "inline": True},
+    ]
+    content = "<@&123456789012345678>"
+    embed = {"title": "🚫 IP Banned", "description": "자동/수동 차단 이벤트", "color": 0xE11D48,
+             "fields": fields, "footer": {"text": "MSG CTF • IPBan"}}
+    return {"content": content, "embeds": [embed]}
+
+
+def legacy_serialize(v: dict) -> bytes:
+    return json.dumps(legacy_message(v)).encode("utf-8")  # httpx json= 과 같은 방식
+
+
+def corpus(n: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    reasons = ["자동 차단: 과도한 요청", "brute force /api/auth/login", "수동 차단", "SQLi 패턴 탐지 (' OR 1=1 --)"]
+    out = []
+    for i in range(n):
+        out.append({
+            "ip": f"`XXX.XXX.{rng.randint(0, 255)}.{rng.randint(1, 254)}`",
+            "ban_type": rng.choice(["TEMPORARY", "PERMANENT"]),
+            "reason": rng.choice(reasons),
+            "banned_at": f"2025-03-01T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}+00:00",
+            "expires_at": "-",
+            "by": rng.choice(["AUTO_BAN_SYSTEM", "admin"]),
+            "duration": str(rng.choice([10, 30, 60, 1440])),
+        })
+    return out
+
+
+def timed(label: str, fn, data: list, repeat: int = 3):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for v in data:
+            out = fn(v)
+        best = min(best, time.perf_counter() - t0)
+        size = len(out)
+    print(f"{label:<34} {best:7.3f}s  {best / len(data) * 1e6:7.2f} µs/alert  {size} bytes")
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    args = ap.parse_args()
+    data = corpus(args.n)
+    assert json.loads(BAN.render(data[0])) == legacy_message(data[0])
+    print(f"{args.n:,} alerts (orjson={'yes' if templates.orjson is not None else 'no'})")
+    base = timed("legacy dict + json.dumps", legacy_serialize, data)
+    timed("legacy dict + json.dumps x3 (retry)", lambda v: [legacy_serialize(v) for _ in range(3)][-1], data)
+    msg = timed("template.message + dumps", lambda v: templates.dumps(BAN.message(v)), data)
+    new = timed("template.render (bytes)", BAN.render, data)
+    print(f"speedup: render {base / new:.2f}x, message+dumps {base / msg:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
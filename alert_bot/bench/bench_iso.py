@@ -0,0 +1,109 @@
+# bench_iso.py — 시각 정규화: 이전 iso() vs TimestampNormalizer 를 Spring 형태 페이로드로 비교
+#
+#   python bench/bench_iso.py --n 200000
+#
+# Jackson 기본 직렬화(LocalDateTime 배열, 나노초 포함/초 생략), epoch ms, ISO 문자열을 섞는다.
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import timestamps  # noqa: E402
+
+
+# ── 변경 전 구현 (비교 기준) ────────────────────────────────────────────────
+def legacy_iso(v):
+    if v is None or v == "":
+        return "-"
+    if isinstance(v, str):
+        s = v.strip().replace(" ", "T")
+        try:
+            return datetime.fromisoformat(s.replace("Z", "+00:00")).isoformat()
+        except Exception:
+            return v
+    if isinstance(v, (int, float)):
+        try:
+            ts = float(v)
+            if ts > 1e12:
+                ts /= 1000.0
+            return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+        except Exception:
+            return str(v)
+    if isinstance(v, (list, tuple)) and len(v) >= 3:
+        try:
+            y, mo, d, hh, mm, ss = [int(x or 0) for x in list(v)[:6]]
+            return datetime(y, mo, d, hh, mm, ss, tzinfo=timezone.utc).isoformat()
+        except Exception:
+            return str(v)
+    if isinstance(v, dict):
+        try:
+            y, mo, d = v.get("year"), v.get("month"), v.get("day")
+            hh, mm, ss = v.get("hour", 0), v.get("minute", 0), v.get("second", 0)
+            if y and mo and d:
+                return datetime(int(y), int(mo), int(d), int(hh), int(mm), int(ss),
+                                tzinfo=timezone.utc).isoformat()
+        except Exception:
+            pass
+        return json.dumps(v, ensure_ascii=False)
+    return str(v)
+
+
+def _as(kind: str, dt: datetime, rng: random.Random):
+    if kind == "array":
+        arr = [dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, rng.randint(0, 999_999_999)]
+        return arr[:5] if dt.second == 0 else arr  # Jackson 은 0 초/나노를 생략
+    if kind == "epoch_ms":
+        return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    if kind == "iso":
+        return dt.isoformat(timespec="milliseconds")
+    return dt.strftime("%Y-%m-%d %H:%M:%S")  # "space"
+
+
+def corpus(n: int, kind: str, seed: int = 11) -> list:
+    """같은 서버는 필드마다 한 형식만 쓴다 → 페이로드 하나에 bannedAt / expiresAt."""
+    rng = random.Random(seed)
+    start = datetime(2025, 3, 1, 9, 0, 0)
+    out = []
+    t = start
+    for _ in range(n):
+        t += timedelta(milliseconds=rng.randint(0, 2000))  # 대회 중 자동 차단이 몰리는 구간
+        banned = t.replace(microsecond=0)
+        out.append((_as(kind, banned, rng), _as(kind, banned + timedelta(minutes=30), rng)))
+    return out
+
+
+def timed(label: str, fn, data: list, repeat: int = 3) -> float:
+    dt = float("inf")
+    for _ in range(repeat):  # 가장 빠른 회차 (공유 머신의 잡음 제거)
+        t0 = time.perf_counter()
+        for b, e in data:
+            fn(b)
+            fn(e)
+        dt = min(dt, time.perf_counter() - t0)
+    print(f"  {label:<30} {dt:7.3f}s  {dt / (2 * len(data)) * 1e9:8.1f} ns/value")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    args = ap.parse_args()
+    for kind in ("array", "epoch_ms", "iso", "space"):
+        data = corpus(args.n, kind)
+        print(f"{kind}: {2 * len(data):,} values")
+        base = timed("legacy iso()", legacy_iso, data)
+        norm = timestamps.TimestampNormalizer()
+        new = timed("TimestampNormalizer", norm, data)
+        print(f"    speedup {base / new:.2f}x  stats {norm.stats}")
+        timed("TimestampNormalizer (KST)", timestamps.TimestampNormalizer(timestamps.KST), data)
+        mismatch = sum(1 for b, e in data[:5000] if legacy_iso(b) != norm(b) and not isinstance(b, list))
+        if mismatch:
+            print(f"    ! {mismatch} values differ from legacy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# bench_lanes.py — 자동 차단 폭주 중 high lane(관리자 차단 / first blood) 전송 지연 비교
+#
+#   python bench/bench_lanes.py --bulk 60 --urgent 5 --limit 10 --window 1
+#
+# bulk 개의 low 항목을 한꺼번에 넣은 뒤 interval 초마다 high 항목을 하나씩 넣고,
+# rate-limit 대역 서버까지 도착하는 데 걸린 시간을 lane 없는 단일 큐(기존)와 비교한다.
+# 기대값: lanes 쪽 high 지연이 latency target 근처, 단일 큐는 앞선 bulk 가 빠질 때까지 대기.
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fake_discord import RateLimitedDiscord  # noqa: E402
+from delivery import DeliveryQueue, Job  # noqa: E402
+from dispatcher import WebhookDispatcher  # noqa: E402
+
+LANES = {"high": 8, "normal": 3, "low": 1}
+
+
+async def run(url: str, bulk: int, urgent: int, interval: float, lanes: bool, latency_target: float):
+    sent_at = {}
+    done_at = {}
+    async with httpx.AsyncClient(timeout=5) as client:
+        d = WebhookDispatcher(client, max_retries=10, backoff_base=0.05, backoff_max=1.0)
+
+        async def send(jobs):
+            high = jobs[0].lane == "high"
+            for j in jobs:
+                await d.send(url, j.message, priority=high and lanes)
+                done_at[j.kind] = time.perf_counter()
+
+        q = DeliveryQueue(send, maxsize=bulk + urgent, workers=2,
+                          lanes=LANES if lanes else None, latency_target=latency_target)
+        q.start()
+        t0 = time.perf_counter()
+        for i in range(bulk):
+            q.put_nowait(Job({"content": f"auto #{i}"}, kind=f"low-{i}", lane="low"))
+        for i in range(urgent):
+            await asyncio.sleep(interval)
+            sent_at[f"high-{i}"] = time.perf_counter()
+            q.put_nowait(Job({"content": f"admin #{i}"}, kind=f"high-{i}", lane="high"))
+        await q.close(drain_timeout=120)
+        wall = time.perf_counter() - t0
+    lat = [done_at[k] - sent_at[k] for k in sent_at if k in done_at]
+    return lat, wall, d.stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bulk", type=int, default=60)
+    ap.add_argument("--urgent", type=int, default=5)
+    ap.add_argument("--interval", type=float, default=0.5)
+    ap.add_argument("--limit", type=int, default=10)
+    ap.add_argument("--window", type=float, default=1.0)
+    ap.add_argument("--latency-target", type=float, default=1.0)
+    args = ap.parse_args()
+
+    for lanes in (False, True):
+        srv = RateLimitedDiscord(limit=args.limit, window=args.window).start()
+        try:
+            lat, wall, stats = asyncio.run(run(srv.url, args.bulk, args.urgent, args.interval,
+                                               lanes, args.latency_target))
+        finally:
+            srv.stop()
+        name = "lanes " if lanes else "single"
+        print(f"{name}: high p50={statistics.median(lat):.2f}s max={max(lat):.2f}s "
+              f"wall={wall:.2f}s 429={srv.too_many}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench_mask.py — IP 마스킹: 이전 구현 vs IpMasker(LRU) 를 백만 건 코퍼스로 비교
+#
+#   python bench/bench_mask.py --n 1000000 --unique 20000
+#
+# 공격 트래픽처럼 소수 IP 가 반복되도록 (zipf 형태) 코퍼스를 만든다.
+import argparse
+import ipaddress
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import masking  # noqa: E402
+
+_IPV4_RE = re.compile(r"^\s*\d{1,3}(?:\.\d{1,3}){3}\s*$")
+
+
+# ── 변경 전 구현 (비교 기준) ────────────────────────────────────────────────
+def _legacy_v4(ip, mode, token):
+    parts = ip.split(".")
+    if len(parts) != 4:
+        return ip
+    a, b, c, d = parts
+    if mode == "LAST2":
+        return f"{token}.{token}.{c}.{d}"
+    return f"{a}.{b}.{token}.{token}"
+
+
+def _legacy_v6(ip, mode, token):
+    try:
+        addr = ipaddress.ip_address(ip)
+        if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
+            return _legacy_v4(str(addr.ipv4_mapped), mode, token)
+        hextets = addr.exploded.split(":")
+    except Exception:
+        return ip
+    if mode == "LAST2":
+        return ":".join([token] * 6 + hextets[-2:])
+    return ":".join(hextets[:2] + [token] * 6)
+
+
+def legacy_mask_ip_text(ip_raw, mode="LAST2", token="XXX"):
+    if not ip_raw:
+        return "-"
+    ip = ip_raw.split(",")[0].strip()
+    if _IPV4_RE.match(ip):
+        return _legacy_v4(ip, mode, token)
+    if ":" in ip:
+        return _legacy_v6(ip, mode, token)
+    return ip
+
+
+def corpus(n: int, unique: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    pool = []
+    for i in range(unique):
+        r = rng.random()
+        if r < 0.7:
+            ip = f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        elif r < 0.9:
+            ip = str(ipaddress.IPv6Address(rng.getrandbits(128)))
+        else:
+            ip = f"::ffff:{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+        if rng.random() < 0.2:
+            ip = f"{ip}, 10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}, 172.18.0.2"  # XFF 체인
+        pool.append(ip)
+    weights = [1.0 / (i + 1) for i in range(unique)]
+    return rng.choices(pool, weights=weights, k=n)
+
+
+def timed(label: str, fn, data: list):
+    t0 = time.perf_counter()
+    for ip in data:
+        fn(ip)
+    dt = time.perf_counter() - t0
+    print(f"{label:<28} {dt:7.3f}s  {dt / len(data) * 1e9:8.1f} ns/addr")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000)
+    ap.add_argument("--unique", type=int, default=20_000)
+    args = ap.parse_args()
+    data = corpus(args.n, args.unique)
+    print(f"corpus: {len(data):,} addresses, {len(set(data)):,} distinct")
+
+    base = timed("legacy mask_ip_text", legacy_mask_ip_text, data)
+    m = masking.IpMasker("LAST2", "XXX")
+    new = timed("IpMasker LAST2 (LRU)", m.mask, data)
+    print(f"  cache: {m.cache_info()}  speedup {base / new:.2f}x")
+    uncached = masking.IpMasker("LAST2", "XXX", cache_size=0)
+    timed("IpMasker LAST2 (no cache)", uncached.mask, data)
+    timed("IpMasker /24,/48 (LRU)", masking.IpMasker("/24").mask, data)
+    timed("IpMasker LAST2 xff=all (LRU)", masking.IpMasker("LAST2", xff="all").mask, data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# bench_parse.py — parse_body 마이크로 벤치마크 (JSON / form / gzip 코퍼스, 이전 구현과 비교)
+#
+#   python bench/bench_parse.py --n 20000
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qs, urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("API_KEY", "bench")
+os.environ.setdefault("DISCORD_WEBHOOK_URL", "http://127.0.0.1:9/bench")
+import app  # noqa: E402
+
+
+def legacy_parse_body(raw: bytes, ctype: str):
+    """변경 전 구현 (비교 기준)."""
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except Exception:
+        pass
+    try:
+        form = parse_qs(raw.decode("utf-8"), keep_blank_values=True)
+        return {k: (v[0] if isinstance(v, list) and v else v) for k, v in form.items()}
+    except Exception:
+        pass
+    return {}
+
+
+def ban_event(rng: random.Random) -> dict:
+    return {
+        "ipAddress": f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+        "banType": rng.choice(["TEMPORARY", "PERMANENT"]),
+        "reason": rng.choice(["Too many failed login attempts", "Flag brute force", "Scanner detected"]),
+        "bannedAt": [2025, 3, rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59), 123000000],
+        "expiresAt": "2025-03-29T12:00:00",
+        "bannedByAdminLoginId": rng.choice([None, "admin"]),
+        "durationMinutes": rng.choice([10, 30, 60, None]),
+    }
+
+
+def corpora(n: int):
+    rng = random.Random(42)
+    events = [ban_event(rng) for _ in range(n)]
+    as_json = [json.dumps(e).encode() for e in events]
+    as_form = [urlencode({k: (json.dumps(v) if isinstance(v, list) else ("" if v is None else v))
+                          for k, v in e.items()}).encode() for e in events]
+    return {
+        "json": (as_json, "application/json"),
+        "form": (as_form, "application/x-www-form-urlencoded"),
+        "gzip-json": ([gzip.compress(b) for b in as_json], "application/json"),
+        "json(no ctype)": (as_json, ""),
+        "form(no ctype)": (as_form, ""),
+    }
+
+
+def run(fn, bodies, ctype, gz: bool) -> float:
+    t0 = time.perf_counter()
+    for b in bodies:
+        fn(gzip.decompress(b) if gz else b, ctype)
+    return (time.perf_counter() - t0) / len(bodies)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    args = ap.parse_args()
+    print(f"json backend: {'orjson' if app.orjson is not None else 'json'}")
+    print(f"{'corpus':<16}{'legacy µs':>12}{'current µs':>12}{'speedup':>10}")
+    for name, (bodies, ctype) in corpora(args.n).items():
+        gz = name.startswith("gzip")
+        old = run(legacy_parse_body, bodies, ctype, gz)
+        new = run(app.parse_body, bodies, ctype, gz)
+        print(f"{name:<16}{old * 1e6:>12.2f}{new * 1e6:>12.2f}{old / new:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
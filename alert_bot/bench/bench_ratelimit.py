@@ -0,0 +1,61 @@
+# bench_ratelimit.py — WebhookDispatcher 를 rate-limit 헤더를 내보내는 대역 서버에 돌려보기
+#
+#   python bench/bench_ratelimit.py --messages 40 --concurrency 8 --limit 5 --window 2 --error-rate 0.05
+#
+# 기대값: 429 가 (거의) 0 이고, 전송 속도가 limit/window 에 수렴.
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fake_discord import RateLimitedDiscord  # noqa: E402
+from dispatcher import WebhookDispatcher, WebhookError  # noqa: E402
+
+
+async def run(url: str, n: int, concurrency: int, retries: int):
+    sem = asyncio.Semaphore(concurrency)
+    failed = 0
+    async with httpx.AsyncClient(timeout=5) as client:
+        d = WebhookDispatcher(client, max_retries=retries, backoff_base=0.05, backoff_max=1.0)
+
+        async def one(i: int):
+            nonlocal failed
+            async with sem:
+                try:
+                    await d.send(url, {"content": f"bench #{i}"})
+                except WebhookError:
+                    failed += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        wall = time.perf_counter() - t0
+    return d.stats, failed, wall
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=40)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--limit", type=int, default=5)
+    ap.add_argument("--window", type=float, default=2.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--retries", type=int, default=5)
+    args = ap.parse_args()
+
+    srv = RateLimitedDiscord(limit=args.limit, window=args.window, error_rate=args.error_rate).start()
+    try:
+        stats, failed, wall = asyncio.run(run(srv.url, args.messages, args.concurrency, args.retries))
+    finally:
+        srv.stop()
+    ideal = max(0.0, (args.messages / args.limit - 1) * args.window)
+    print(f"delivered={srv.accepted}/{args.messages} failed={failed} wall={wall:.2f}s (ideal≈{ideal:.2f}s)")
+    print(f"server: 429={srv.too_many} requests={srv.received}")
+    print(f"dispatcher: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# fake_discord.py — 로컬 벤치마크용 Discord webhook 대역 서버 (의존성 없음, HTTP/1.1 keep-alive)
+#
+#   python fake_discord.py --port 9000 --latency-ms 20
+#   DISCORD_WEBHOOK_URL=http://127.0.0.1:9000/api/webhooks/1/bench
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Optional
+
+
+class FakeDiscord:
+    """POST 를 받으면 204 를 돌려주는 최소 webhook 서버. 스레드 하나에서 자체 루프로 동작."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, status: int = 204):
+        self.host = host
+        self.port = port
+        self.latency = latency_ms / 1000.0
+        self.status = status
+        self.received = 0
+        self.connections = 0
+        self.bodies: list[bytes] = []
+        self.keep_bodies = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/webhooks/1/bench"
+
+    # ── HTTP 처리 ────────────────────────────────────────────────────────────
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = {}
+                for line in head.split(b"\r\n")[1:]:
+                    if b":" in line:
+                        k, v = line.split(b":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                body = b""
+                clen = int(headers.get(b"content-length", b"0") or 0)
+                if clen:
+                    body = await reader.readexactly(clen)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.received += 1
+                if self.keep_bodies:
+                    self.bodies.append(body)
+                status, extra, payload = self.respond(body)
+                writer.write(self._render(status, extra, payload))
+                await writer.drain()
+                if headers.get(b"connection", b"").lower() == b"close":
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, body: bytes) -> tuple[int, dict, bytes]:
+        """(status, extra headers, body). 하위 클래스에서 재정의."""
+        return self.status, {}, b""
+
+    @staticmethod
+    def _render(status: int, extra: dict, payload: bytes) -> bytes:
+        reason = {200: "OK", 204: "No Content", 429: "Too Many Requests", 500: "Internal Server Error",
+                  502: "Bad Gateway", 503: "Service Unavailable"}.get(status, "Status")
+        lines = [f"HTTP/1.1 {status} {reason}", "Connection: keep-alive"]
+        if payload:
+            lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(payload)}")
+        lines += [f"{k}: {v}" for k, v in extra.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + payload
+
+    # ── 실행 제어 ────────────────────────────────────────────────────────────
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "FakeDiscord":
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.serve())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+        self._thread = threading.Thread(target=run, name="fake-discord", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        def shutdown():
+            # 서버 루프 안에서 한꺼번에 (밖에서 나눠 부르면 루프가 먼저 닫혀 RuntimeError)
+            self._server.close()
+            for task in asyncio.all_tasks(self._loop):
+                task.cancel()
+        if self._loop and self._server and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(shutdown)
+            except RuntimeError:
+                pass  # 그 사이 루프가 닫힘
+        if self._thread:
+            self._thread.join(2)
+
+
+class RateLimitedDiscord(FakeDiscord):
+    """
+    Discord 와 같은 모양의 X-RateLimit-* 헤더를 내보내는 대역.
+    window 초마다 limit 개까지 허용, 초과 시 429 + retry_after. error_rate 비율로 503.
+    """
+
+    def __init__(self, *args, limit: int = 5, window: float = 2.0, error_rate: float = 0.0,
+                 bucket: str = "abcd1234", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit = limit
+        self.window = window
+        self.error_rate = error_rate
+        self.bucket = bucket
+        self.too_many = 0
+        self.accepted = 0
+        self._window_start = 0.0
+        self._used = 0
+
+    def respond(self, body: bytes) -> tuple[int, dict, bytes]:
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start, self._used = now, 0
+        reset_after = max(0.0, self.window - (now - self._window_start))
+        if self._used >= self.limit:
+            self.too_many += 1
+            headers = {
+                "X-RateLimit-Limit": self.limit, "X-RateLimit-Remaining": 0,
+                "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+                "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+                "X-RateLimit-Bucket": self.bucket, "X-RateLimit-Scope": "user",
+                "Retry-After": f"{max(1, round(reset_after))}",
+            }
+            payload = json.dumps({"message": "You are being rate limited.",
+                                  "retry_after": round(reset_after, 3), "global": False}).encode()
+            return 429, headers, payload
+        if self.error_rate and random.random() < self.error_rate:
+            return 503, {}, b'{"message": "upstream unavailable"}'
+        self._used += 1
+        self.accepted += 1
+        headers = {
+            "X-RateLimit-Limit": self.limit, "X-RateLimit-Remaining": self.limit - self._used,
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": self.bucket,
+        }
+        return self.status, headers, b""
+
+
+def main():
+    ap = argparse.ArgumentParser(description="local fake Discord webhook")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9000)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--status", type=int, default=204)
+    ap.add_argument("--rate-limit", type=int, default=0, help="window 당 허용 개수 (0 = 제한 없음)")
+    ap.add_argument("--window", type=float, default=2.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+    if args.rate_limit or args.error_rate:
+        srv = RateLimitedDiscord(args.host, args.port, args.latency_ms, args.status,
+                                 limit=args.rate_limit or 1 << 30, window=args.window,
+                                 error_rate=args.error_rate).start()
+    else:
+        srv = FakeDiscord(args.host, args.port, args.latency_ms, args.status).start()
+    print(f"[fake-discord] listening: {srv.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# loadtest.py — 앱 전체 부하 테스트: uvicorn 으로 띄운 alert_bot + 로컬 대역 Discord 에
+#               JSON / form / gzip / 깨진 본문을 섞어 목표 RPS 로 보내고 지연·처리량·메모리를 잰다
+#
+#   python bench/loadtest.py --rps 200 --duration 10 --mix json=60,form=20,gzip=15,malformed=5
+#   python bench/loadtest.py --mode queue --workers 2 --env BATCH_WINDOW_MS=50 --max-p99-ms 50 --min-rps 190
+#
+# 외부 네트워크 없이 127.0.0.1 만 사용한다 (CI 에서 그대로 실행 가능).
+# 요청은 정해진 시각에 보내는 open-loop 방식이고, 지연은 "보냈어야 할 시각"부터 잰다
+# → 서버가 밀리면 그만큼 지연에 드러난다 (coordinated omission 방지).
+# --max-p99-ms / --min-rps / --max-rss-mb / --max-error-rate 중 하나라도 넘으면 종료 코드 1.
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+API_KEY = "loadtest"
+
+Body = Tuple[bytes, Dict[str, str]]  # (본문, 헤더)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        if name.strip() not in MAKERS:
+            raise SystemExit(f"unknown payload kind: {name} (choose from {', '.join(MAKERS)})")
+        mix[name.strip()] = float(w or 1)
+    return mix
+
+
+# ── 본문 생성 ───────────────────────────────────────────────────────────────────
+def ban_event(rng: random.Random, i: int) -> dict:
+    # IP 를 요청마다 다르게 해서 dedup 에 걸리지 않게 한다
+    return {
+        "ipAddress": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+        "banType": rng.choice(["TEMPORARY", "PERMANENT"]),
+        "reason": rng.choice(["Too many failed login attempts", "Flag brute force", "Scanner detected"]),
+        "bannedAt": [2025, 3, rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59)],
+        "expiresAt": "2025-03-29T12:00:00",
+        "bannedByAdminLoginId": rng.choice([None, None, None, "admin"]),
+        "durationMinutes": rng.choice([10, 30, 60, None]),
+    }
+
+
+def make_json(rng: random.Random, i: int) -> Body:
+    return json.dumps(ban_event(rng, i)).encode(), {"Content-Type": "application/json"}
+
+
+def make_form(rng: random.Random, i: int) -> Body:
+    ev = ban_event(rng, i)
+    form = {k: (json.dumps(v) if isinstance(v, list) else ("" if v is None else v)) for k, v in ev.items()}
+    return urlencode(form).encode(), {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def make_gzip(rng: random.Random, i: int) -> Body:
+    raw, headers = make_json(rng, i)
+    return gzip.compress(raw), {**headers, "Content-Encoding": "gzip"}
+
+
+def make_malformed(rng: random.Random, i: int) -> Body:
+    raw = json.dumps(ban_event(rng, i)).encode()
+    return rng.choice([
+        (raw[: len(raw) // 2], {"Content-Type": "application/json"}),        # 잘린 JSON
+        (raw, {"Content-Type": "application/json", "Content-Encoding": "gzip"}),  # gzip 이라면서 평문
+        (bytes(rng.getrandbits(8) for _ in range(64)), {"Content-Type": "application/octet-stream"}),
+        (b"", {"Content-Type": "application/json"}),
+    ])
+
+
+MAKERS = {"json": make_json, "form": make_form, "gzip": make_gzip, "malformed": make_malformed}
+
+
+def build_corpus(n: int, mix: Dict[str, float], seed: int) -> List[Tuple[str, bytes, Dict[str, str]]]:
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    out = []
+    for i in range(n):
+        kind = rng.choices(kinds, weights)[0]
+        body, headers = MAKERS[kind](rng, i)
+        out.append((kind, body, {**headers, "X-API-Key": API_KEY}))
+    return out
+
+
+# ── 프로세스 / 메모리 ───────────────────────────────────────────────────────────
+def _children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """pid 와 자식(uvicorn 워커) 의 VmRSS 합 (MB). /proc 이 없으면 None."""
+    total, found = 0, False
+    stack = [pid]
+    while stack:
+        p = stack.pop()
+        stack.extend(_children(p))
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        found = True
+                        break
+        except OSError:
+            continue
+    return total / 1024 if found else None
+
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(args, cwd=APP_DIR, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, start_new_session=True)
+
+
+def stop_process(p: subprocess.Popen):
+    if p.poll() is None:
+        os.killpg(p.pid, signal.SIGTERM)
+        try:
+            p.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            os.killpg(p.pid, signal.SIGKILL)
+            p.wait()
+
+
+async def wait_ready(url: str, proc: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=1) as c:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise SystemExit(f"process exited early:\n{proc.stderr.read().decode(errors='replace')[-2000:]}")
+            try:
+                if (await c.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise SystemExit(f"not ready after {timeout}s: {url}")
+
+
+# ── 부하 ────────────────────────────────────────────────────────────────────────
+async def drive(url: str, corpus, rps: float, concurrency: int, server_pid: int):
+    latencies: Dict[str, List[float]] = {k: [] for k in MAKERS}
+    statuses: Dict[str, int] = {}
+    rss: List[float] = []
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def sample_rss():
+        while True:
+            v = rss_mb(server_pid)
+            if v is not None:
+                rss.append(v)
+            await asyncio.sleep(0.25)
+
+    async with httpx.AsyncClient(timeout=10, limits=limits) as client:
+        async def one(due: float, kind: str, body: bytes, headers: Dict[str, str]):
+            async with sem:
+                try:
+                    r = await client.post(url, content=body, headers=headers)
+                    code = str(r.status_code)
+                except httpx.HTTPError as e:
+                    code = e.__class__.__name__
+            statuses[code] = statuses.get(code, 0) + 1
+            latencies[kind].append(time.perf_counter() - due)
+
+        sampler = asyncio.create_task(sample_rss())
+        tasks = []
+        t0 = time.perf_counter()
+        for i, (kind, body, headers) in enumerate(corpus):
+            due = t0 + i / rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(due, kind, body, headers)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - t0
+        sampler.cancel()
+    return latencies, statuses, wall, rss
+
+
+def pct(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="alert_bot end-to-end load test (offline)")
+    ap.add_argument("--rps", type=float, default=200)
+    ap.add_argument("--duration", type=float, default=10, help="초")
+    ap.add_argument("--mix", default="json=60,form=20,gzip=15,malformed=5")
+    ap.add_argument("--concurrency", type=int, default=256, help="동시 요청 상한")
+    ap.add_argument("--mode", choices=["sync", "queue"], default="sync", help="DELIVERY_MODE")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    ap.add_argument("--path", default="/alert/ban")
+    ap.add_argument("--discord-latency-ms", type=float, default=0.0, help="대역 Discord 응답 지연")
+    ap.add_argument("--env", action="append", default=[], metavar="K=V", help="앱에 넘길 환경변수 (여러 번)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--startup-timeout", type=float, default=60)
+    ap.add_argument("--json", action="store_true", help="결과를 JSON 한 줄로 출력")
+    ap.add_argument("--max-p99-ms", type=float)
+    ap.add_argument("--min-rps", type=float)
+    ap.add_argument("--max-rss-mb", type=float)
+    ap.add_argument("--max-error-rate", type=float, help="5xx·연결 오류 비율 상한 (0~1)")
+    args = ap.parse_args()
+
+    mix = parse_mix(args.mix)
+    corpus = build_corpus(int(args.rps * args.duration), mix, args.seed)
+
+    discord_port, app_port = free_port(), free_port()
+    discord = start_process([sys.executable, os.path.join(HERE, "fake_discord.py"), "--port", str(discord_port),
+                             "--latency-ms", str(args.discord_latency_ms)], {})
+    env = {
+        "API_KEY": API_KEY,
+        "DISCORD_WEBHOOK_URL": f"http://127.0.0.1:{discord_port}/api/webhooks/1/loadtest",
+        "DELIVERY_MODE": args.mode,
+        "AUTH_RATE": "0",
+        "PYTHONUNBUFFERED": "1",
+    }
+    if args.workers > 1:
+        env["STATE_PATH"] = os.path.join(APP_DIR, f".loadtest_state_{app_port}.db")
+    for kv in args.env:
+        k, _, v = kv.partition("=")
+        env[k] = v
+    server = start_process([sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1",
+                            "--port", str(app_port), "--workers", str(args.workers),
+                            "--log-level", "warning", "--no-access-log"], env)
+    base = f"http://127.0.0.1:{app_port}"
+    try:
+        async def run():
+            await wait_ready(f"http://127.0.0.1:{discord_port}/", discord, args.startup_timeout)
+            await wait_ready(base + "/healthz", server, args.startup_timeout)
+            rss_idle = rss_mb(server.pid)
+            result = await drive(base + args.path, corpus, args.rps, args.concurrency, server.pid)
+            return rss_idle, result
+        rss_idle, (latencies, statuses, wall, rss) = asyncio.run(run())
+    finally:
+        stop_process(server)
+        stop_process(discord)
+        if "STATE_PATH" in env and not any(kv.startswith("STATE_PATH=") for kv in args.env):
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(env["STATE_PATH"] + suffix)
+                except OSError:
+                    pass
+
+    every = [x for v in latencies.values() for x in v]
+    errors = sum(n for code, n in statuses.items() if not code.isdigit() or code.startswith("5"))
+    report = {
+        "mode": args.mode, "workers": args.workers, "target_rps": args.rps,
+        "requests": len(every), "throughput_rps": round(len(every) / wall, 1), "wall_s": round(wall, 2),
+        "status": dict(sorted(statuses.items())), "error_rate": round(errors / max(1, len(every)), 4),
+        "latency_ms": {p: round(pct(every, q) * 1000, 2) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "latency_ms_by_kind": {k: {"n": len(v), "p50": round(pct(v, 50) * 1000, 2), "p99": round(pct(v, 99) * 1000, 2)}
+                               for k, v in latencies.items() if v},
+        "rss_mb": {"idle": round(rss_idle, 1) if rss_idle else None,
+                   "peak": round(max(rss), 1) if rss else None,
+                   "end": round(rss[-1], 1) if rss else None},
+    }
+
+    failed = []
+    if args.max_p99_ms is not None and report["latency_ms"]["p99"] > args.max_p99_ms:
+        failed.append(f"p99 {report['latency_ms']['p99']}ms > {args.max_p99_ms}ms")
+    if args.min_rps is not None and report["throughput_rps"] < args.min_rps:
+        failed.append(f"throughput {report['throughput_rps']} < {args.min_rps} rps")
+    if args.max_rss_mb is not None and (report["rss_mb"]["peak"] or 0) > args.max_rss_mb:
+        failed.append(f"peak RSS {report['rss_mb']['peak']}MB > {args.max_rss_mb}MB")
+    if args.max_error_rate is not None and report["error_rate"] > args.max_error_rate:
+        failed.append(f"error rate {report['error_rate']} > {args.max_error_rate}")
+    report["failed"] = failed
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        lat = report["latency_ms"]
+        print(f"mode={args.mode} workers={args.workers} target={args.rps:g}rps mix={args.mix}")
+        print(f"requests={report['requests']} throughput={report['throughput_rps']}rps wall={report['wall_s']}s "
+              f"status={report['status']}")
+        print(f"latency p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "
+              f"(mean={statistics.fmean(every) * 1000:.2f}ms)" if every else "latency: no samples")
+        for k, v in report["latency_ms_by_kind"].items():
+            print(f"  {k:<10} n={v['n']:<6} p50={v['p50']}ms p99={v['p99']}ms")
+        r = report["rss_mb"]
+        print(f"server RSS idle={r['idle']}MB peak={r['peak']}MB end={r['end']}MB")
+        for f in failed:
+            print(f"FAIL: {f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# breaker.py — webhook 회로 차단기 (closed → open → half-open) + 로컬 파일 대체 전송처
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+STATE_CLOSED = "closed"        # 정상: 모두 전송
+STATE_OPEN = "open"            # 차단: 전송하지 않고 바로 대체 경로로
+STATE_HALF_OPEN = "half_open"  # reset_timeout 후: probe 몇 개만 보내 회복 여부 확인
+STATE_CODES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """차단 중이라 보내지 않음 (대체 경로도 없을 때)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"circuit open (retry in {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    - closed   : 연속 실패가 failure_threshold 에 닿으면 open
+    - open     : reset_timeout 동안 allow() 가 False. 지나면 half-open
+    - half-open: 동시에 half_open_max 개까지만 허용(probe). 성공 → closed, 실패 → 다시 open
+    실패로 셀 것(연결 오류/타임아웃/5xx)은 호출 측이 판단해 record_failure(), 응답을 받았으면 record_success().
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, half_open_max)
+        self.clock = clock
+        self.state = STATE_CLOSED
+        self.failures = 0          # 연속 실패 수
+        self.opened_at = 0.0
+        self.probes = 0            # half-open 에서 응답을 기다리는 probe 수
+        self.last_error = ""
+        self.stats: Dict[str, int] = {"opened": 0, "closed": 0, "rejected": 0, "probes": 0}
+
+    def retry_after(self) -> float:
+        if self.state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def allow(self) -> bool:
+        """보내도 되면 True (half-open 이면 probe 자리 하나를 차지 → 결과를 반드시 record_*)."""
+        if self.state == STATE_OPEN:
+            if self.clock() < self.opened_at + self.reset_timeout:
+                self.stats["rejected"] += 1
+                return False
+            self.state, self.probes = STATE_HALF_OPEN, 0
+        if self.state == STATE_HALF_OPEN:
+            if self.probes >= self.half_open_max:
+                self.stats["rejected"] += 1
+                return False
+            self.probes += 1
+            self.stats["probes"] += 1
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        if self.state != STATE_CLOSED:
+            self.state, self.probes = STATE_CLOSED, 0
+            self.stats["closed"] += 1
+
+    def record_failure(self, error: str = ""):
+        self.failures += 1
+        self.last_error = error[:200]
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                self.stats["opened"] += 1
+            self.state, self.opened_at, self.probes = STATE_OPEN, self.clock(), 0
+
+    def cancel(self):
+        """결과 없이 중단된 요청(취소 등): half-open probe 자리만 돌려준다."""
+        if self.state == STATE_HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"state": self.state, "failures": self.failures}
+        if self.state == STATE_OPEN:
+            out["retry_after"] = round(self.retry_after(), 1)
+        if self.last_error:
+            out["last_error"] = self.last_error
+        return out
+
+
+class FileSink:
+    """대체 전송처: webhook 메시지를 JSONL 로 덧붙임 ({"ts", "webhook", "message"})."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def append(self, webhook: str, content: bytes):
+        """content 는 이미 직렬화된 JSON (그대로 끼워 넣는다). 블로킹 → asyncio.to_thread 로 호출."""
+        line = b'{"ts":%.3f,"webhook":"%s","message":%s}\n' % (time.time(), webhook.encode("ascii"), content)
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self.written += 1
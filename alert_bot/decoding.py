@@ -0,0 +1,110 @@
+# decoding.py — Content-Encoding 스트리밍 해제 (gzip / deflate / br), 해제 크기 상한
+import zlib
+from typing import List, Optional
+
+try:
+    import brotli  # br 지원 (brotli>=1.2: process(output_buffer_limit=) 로 해제 크기를 제한할 수 있음)
+except ImportError:
+    brotli = None
+if brotli is not None and not hasattr(brotli.Decompressor, "can_accept_more_data"):
+    brotli = None  # 출력 상한을 걸 수 없는 이전 버전 → br 미지원으로
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class DecodeError(Exception):
+    pass
+
+
+class StreamDecoder:
+    """feed(chunk) 로 받은 조각을 해제하며 누적 크기가 limit 을 넘으면 BodyTooLarge."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.size = 0
+        self.parts: List[bytes] = []
+
+    def _emit(self, data: bytes):
+        if data:
+            self.size += len(data)
+            if self.size > self.limit:
+                raise BodyTooLarge()
+            self.parts.append(data)
+
+    def feed(self, chunk: bytes):
+        self._emit(chunk)
+
+    def finish(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class ZlibDecoder(StreamDecoder):
+    """gzip 은 여러 member 를 이어 붙인 본문도 끝까지 해제 (member 사이 0 패딩은 건너뜀)."""
+
+    def __init__(self, limit: int, wbits: Optional[int]):
+        super().__init__(limit)
+        self._wbits = wbits
+        self._gzip = wbits is not None and wbits > zlib.MAX_WBITS
+        self._d = zlib.decompressobj(wbits) if wbits is not None else None
+        self._between = False  # gzip member 하나가 끝나고 다음 member 를 아직 못 받음
+
+    def feed(self, chunk: bytes):
+        if self._d is None:
+            # deflate: zlib 래퍼(0x78..) 가 없으면 raw deflate 로 간주
+            self._d = zlib.decompressobj(zlib.MAX_WBITS if chunk[:1] == b"\x78" else -zlib.MAX_WBITS)
+        data = chunk
+        try:
+            while data:
+                if self._between:
+                    data = data.lstrip(b"\x00")
+                    if not data:
+                        return
+                    self._d = zlib.decompressobj(self._wbits)
+                    self._between = False
+                self._emit(self._d.decompress(data, self.limit - self.size + 1))
+                data = self._d.unconsumed_tail
+                if not data and self._gzip and self._d.eof:
+                    data, self._between = self._d.unused_data, True
+        except zlib.error as e:
+            raise DecodeError(str(e))
+
+    def finish(self) -> bytes:
+        if self._d is not None:
+            try:
+                self._emit(self._d.flush())
+            except zlib.error as e:
+                raise DecodeError(str(e))
+        return super().finish()
+
+
+class BrotliDecoder(StreamDecoder):
+    def __init__(self, limit: int):
+        super().__init__(limit)
+        self._d = brotli.Decompressor()
+
+    def feed(self, chunk: bytes):
+        try:
+            self._emit(self._d.process(chunk, output_buffer_limit=self.limit - self.size + 1))
+            while not self._d.can_accept_more_data():  # 상한에 걸려 남은 출력 → 빈 입력으로 마저 꺼냄
+                self._emit(self._d.process(b"", output_buffer_limit=self.limit - self.size + 1))
+        except brotli.error as e:
+            raise DecodeError(str(e))
+
+
+SUPPORTED = ("gzip", "x-gzip", "deflate") + (("br",) if brotli is not None else ())
+
+
+def decoder_for(encoding: str, limit: int) -> Optional[StreamDecoder]:
+    """지원하지 않는 encoding 이면 None (호출 측에서 그대로 통과)."""
+    enc = encoding.strip().lower()
+    if enc in ("", "identity"):
+        return StreamDecoder(limit)
+    if enc in ("gzip", "x-gzip"):
+        return ZlibDecoder(limit, 16 + zlib.MAX_WBITS)
+    if enc == "deflate":
+        return ZlibDecoder(limit, None)
+    if enc == "br" and brotli is not None:
+        return BrotliDecoder(limit)
+    return None
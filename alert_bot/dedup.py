@@ -0,0 +1,170 @@
+# dedup.py — 같은 차단 이벤트 중복 전송 방지 (TTL + LRU, 메모리 상한)
+import asyncio
+import ipaddress
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+MODE_OFF = "off"
+MODE_DROP = "drop"    # 중복은 버림
+MODE_MERGE = "merge"  # 아직 큐에 있는 원본 메시지에 중복 횟수 표시
+
+
+def normalize_ip(ip_raw: Optional[str]) -> str:
+    """X-Forwarded-For 첫 hop, IPv4-mapped → IPv4, IPv6 는 축약형으로."""
+    if not ip_raw:
+        return "-"
+    ip = str(ip_raw).split(",")[0].strip().strip("[]")
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip.lower()
+    if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
+        addr = addr.ipv4_mapped
+    return addr.compressed
+
+
+def time_bucket(epoch: Optional[float], text: str, window: float) -> str:
+    """
+    UTC epoch 초를 window 초 단위 구간 번호로 (window <= 0 이면 epoch 그대로).
+    시각을 해석하지 못했으면(None) 표시 문자열 text 그대로.
+    """
+    if epoch is None:
+        return text or "-"
+    if window <= 0:
+        return repr(float(epoch))
+    return str(int(epoch // window))
+
+
+def ban_key(ip_raw: Optional[str], ban_type: Any, banned_epoch: Optional[float], banned_text: str,
+            window: float) -> Tuple[str, str, str]:
+    return normalize_ip(ip_raw), str(ban_type or "").upper(), time_bucket(banned_epoch, banned_text, window)
+
+
+class DedupEntry:
+    __slots__ = ("expires_at", "count", "ref")
+
+    def __init__(self, expires_at: float, ref: Any = None):
+        self.expires_at = expires_at
+        self.count = 1
+        self.ref = ref  # merge 모드: 원본 메시지
+
+
+class DedupCache:
+    """
+    key → DedupEntry. ttl 이 지나면 만료, maxsize 를 넘으면 가장 오래 안 쓴 항목부터 제거.
+    stats: hits / misses / expired / evictions / size
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.maxsize = max(1, maxsize)
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, DedupEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def seen(self, key: Hashable, ref: Any = None) -> Optional[DedupEntry]:
+        """처음 보는 key 면 등록 후 None, 중복이면 기존 entry(count 증가) 반환."""
+        now = self.clock()
+        e = self._entries.get(key)
+        if e is not None:
+            if e.expires_at > now:
+                e.count += 1
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return e
+            del self._entries[key]
+            self.expired += 1
+        self.misses += 1
+        self._entries[key] = DedupEntry(now + self.ttl, ref)
+        self._evict(now)
+        return None
+
+    def forget(self, key: Hashable):
+        """전송 실패 등으로 재시도를 허용해야 할 때 key 제거."""
+        self._entries.pop(key, None)
+
+    # 이벤트 루프에서 부르는 쪽. 로컬 캐시는 블로킹이 없으므로 그대로 호출
+    async def seen_async(self, key: Hashable, ref: Any = None) -> Optional[DedupEntry]:
+        return self.seen(key, ref)
+
+    async def forget_async(self, key: Hashable):
+        self.forget(key)
+
+    def _evict(self, now: float):
+        # 앞쪽(오래된 것)부터 만료 정리 → 그래도 넘치면 LRU 제거
+        while self._entries:
+            k, e = next(iter(self._entries.items()))
+            if e.expires_at > now:
+                break
+            del self._entries[k]
+            self.expired += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "expired": self.expired,
+                "evictions": self.evictions, "size": len(self._entries)}
+
+
+class SharedDedupCache(DedupCache):
+    """
+    멀티 워커용: 중복 판정(카운트)은 공유 store(shared.MemoryStore / SqliteStore) 에서,
+    merge 모드의 원본 메시지 참조는 그 메시지를 가진 프로세스의 로컬 캐시에서.
+    다른 워커가 받은 원본에는 표시할 수 없으므로 그 경우 ref=None (drop 과 같게 동작).
+    """
+
+    def __init__(self, store, ttl: float = 60.0, maxsize: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(ttl, maxsize, clock)
+        self.store = store
+
+    @staticmethod
+    def _skey(key: Hashable) -> str:
+        return "|".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+    async def _store_call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # SqliteStore 는 잠금 대기(busy_timeout)로 블로킹될 수 있음 → 스레드에서
+        if getattr(self.store, "blocking", False):
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def seen(self, key: Hashable, ref: Any = None) -> Optional[DedupEntry]:
+        return self._merge(key, ref, self.store.dedup_seen(self._skey(key), self.ttl))
+
+    async def seen_async(self, key: Hashable, ref: Any = None) -> Optional[DedupEntry]:
+        count = await self._store_call(self.store.dedup_seen, self._skey(key), self.ttl)
+        return self._merge(key, ref, count)
+
+    def _merge(self, key: Hashable, ref: Any, count: int) -> Optional[DedupEntry]:
+        """공유 store 의 카운트를 로컬 캐시(merge 용 ref)와 맞춘다."""
+        local = super().seen(key, ref)
+        if count == 1:
+            if local is not None:  # 공유 쪽이 먼저 만료됨 → 새 이벤트로 취급
+                self.hits -= 1
+                self.misses += 1
+                local.count, local.ref = 1, ref
+            return None
+        if local is None:
+            # 로컬엔 처음 → 방금 등록한 항목은 다른 워커 원본의 자리표시 (ref 없음)
+            self.misses -= 1
+            self.hits += 1
+            local = self._entries[key]
+            local.ref = None
+        local.count = count
+        return local
+
+    def forget(self, key: Hashable):
+        super().forget(key)
+        self.store.dedup_forget(self._skey(key))
+
+    async def forget_async(self, key: Hashable):
+        super().forget(key)
+        await self._store_call(self.store.dedup_forget, self._skey(key))
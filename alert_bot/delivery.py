@@ -0,0 +1,243 @@
+# delivery.py — 알림 비동기 전송 큐 (202 fast-ack + 백그라운드 워커)
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import logs
+import metrics
+
+OVERFLOW_REJECT = "reject"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+DEFAULT_LANE = "normal"
+
+QUEUE_LATENCY = metrics.histogram(
+    "alert_queue_latency_seconds", "Time from enqueue to successful delivery", ["lane"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0))
+log = logs.get("delivery")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class Job:
+    """큐 항목: 전송할 webhook 메시지 + (spool 사용 시) 디스크 행 id + 알림 종류(라우트) / lane."""
+    __slots__ = ("message", "spool_id", "kind", "lane")
+
+    def __init__(self, message: Dict[str, Any], spool_id: Optional[int] = None,
+                 kind: str = "ban", lane: str = "normal"):
+        self.message = message
+        self.spool_id = spool_id
+        self.kind = kind
+        self.lane = lane
+
+
+class DeliveryQueue:
+    """
+    bounded 큐 + 워커 풀.
+    - overflow=reject      : 가득 차면 QueueFull (호출 측에서 503)
+    - overflow=drop_oldest : 가장 오래된 항목을 버리고 새 항목 수용
+    - close()              : 신규 수용 중단 → 남은 항목 drain(timeout) → 워커 종료
+    - batch_window > 0     : 첫 항목 이후 window 초 동안(또는 batch_full/batch_max 까지) 모아서
+                             send(list) 한 번으로 전달. 0 이면 항목마다 send([item])
+
+    우선순위 lane (item.lane, lanes = {이름: 가중치}, 앞쪽이 높은 우선순위):
+    - lane 마다 FIFO. 워커는 비어 있지 않은 lane 중 가중치 비율대로(smooth weighted round-robin) 고른다
+    - 묶음은 한 lane 안에서만 모으고, 낮은 lane 을 모으는 중 더 높은 lane 에 항목이 오면 바로 보낸다
+    - 최상위 lane: 묶음 대기는 latency_target 을 넘지 않고, 맨 앞 항목이 latency_target/2 이상
+      기다렸으면 가중치와 무관하게 먼저. lane 이 둘 이상이면 최상위 lane 전용 워커 1개를 더 둔다
+      (다른 워커가 모두 낮은 lane 전송/rate-limit 대기 중이어도 바로 처리)
+    - 가득 찼을 때: reject 는 lane 과 무관하게 QueueFull (이미 받은 항목은 버리지 않는다).
+      drop_oldest 는 낮은 lane 부터 같은 lane 까지 가장 오래된 항목을 밀어내고, 밀어낼 항목이 없으면 QueueFull
+    """
+
+    def __init__(self, send: Callable[[List[Any]], Awaitable[None]], maxsize: int = 1000,
+                 workers: int = 2, overflow: str = OVERFLOW_REJECT, name: str = "delivery",
+                 batch_window: float = 0.0, batch_max: int = 1,
+                 batch_full: Optional[Callable[[List[Any]], bool]] = None,
+                 lanes: Optional[Dict[str, int]] = None, latency_target: float = 1.0):
+        if overflow not in (OVERFLOW_REJECT, OVERFLOW_DROP_OLDEST):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        lanes = dict(lanes or {DEFAULT_LANE: 1})
+        if any(w < 1 for w in lanes.values()):
+            raise ValueError("lane weights must be >= 1")
+        self._send = send
+        self._maxsize = max(1, maxsize)
+        self._lane_names: List[str] = list(lanes)
+        self._weights: Dict[str, int] = lanes
+        self._lanes: Dict[str, Deque[Tuple[float, Any]]] = {n: deque() for n in lanes}
+        self._credit: Dict[str, int] = {n: 0 for n in lanes}
+        self._default_lane = DEFAULT_LANE if DEFAULT_LANE in lanes else self._lane_names[-1]
+        self._size = 0
+        self._unfinished = 0
+        self._changed = asyncio.Event()   # 항목 추가 시 set (대기 중인 워커를 깨움)
+        self._idle = asyncio.Event()      # 미완료 항목 0
+        self._idle.set()
+        self._workers_n = max(1, workers)
+        self._workers: List[asyncio.Task] = []
+        self.overflow = overflow
+        self.name = name
+        self.closed = False
+        self.batch_window = max(0.0, batch_window)
+        self.batch_max = max(1, batch_max)
+        self.batch_full = batch_full
+        self.latency_target = max(0.0, latency_target)
+        self.stats: Dict[str, int] = {"accepted": 0, "rejected": 0, "dropped": 0, "delivered": 0, "failed": 0}
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    def lane_depths(self) -> Dict[str, int]:
+        return {n: len(q) for n, q in self._lanes.items()}
+
+    def start(self):
+        for i in range(self._workers_n):
+            self._workers.append(asyncio.create_task(self._worker(), name=f"{self.name}-worker-{i}"))
+        if len(self._lane_names) > 1:
+            top = self._lane_names[0]
+            self._workers.append(asyncio.create_task(self._worker(only=top), name=f"{self.name}-worker-{top}"))
+
+    def _lane_of(self, item: Any) -> str:
+        lane = getattr(item, "lane", None)
+        return lane if lane in self._lanes else self._default_lane
+
+    def put_nowait(self, item: Any) -> Optional[Any]:
+        """항목 수용. (drop_oldest 에서) 가득 차서 밀려난 항목이 있으면 그것을 반환."""
+        if self.closed:
+            raise QueueClosed()
+        lane = self._lane_of(item)
+        dropped = None
+        if self._size >= self._maxsize:
+            victim = None
+            if self.overflow == OVERFLOW_DROP_OLDEST:
+                floor = self._lane_names.index(lane)
+                victim = next((self._lanes[n] for n in reversed(self._lane_names[floor:]) if self._lanes[n]), None)
+            if victim is None:
+                self.stats["rejected"] += 1
+                raise QueueFull()
+            dropped = victim.popleft()[1]
+            self._size -= 1
+            self._done(1)
+            self.stats["dropped"] += 1
+        self._lanes[lane].append((time.monotonic(), item))
+        self._size += 1
+        self._unfinished += 1
+        self._idle.clear()
+        self._changed.set()
+        self.stats["accepted"] += 1
+        return dropped
+
+    def _done(self, n: int):
+        self._unfinished -= n
+        if self._unfinished <= 0:
+            self._unfinished = 0
+            self._idle.set()
+
+    def _pick(self, only: Optional[str]) -> Optional[str]:
+        """다음에 꺼낼 lane (없으면 None)."""
+        if only is not None:
+            return only if self._lanes[only] else None
+        top = self._lanes[self._lane_names[0]]
+        if top and time.monotonic() - top[0][0] >= self.latency_target / 2:
+            return self._lane_names[0]
+        ready = [n for n in self._lane_names if self._lanes[n]]
+        if len(ready) <= 1:
+            return ready[0] if ready else None
+        # smooth weighted round-robin (nginx 방식): 짧은 구간에서도 가중치 비율대로 섞인다
+        total = 0
+        for n in ready:
+            self._credit[n] += self._weights[n]
+            total += self._weights[n]
+        best = max(ready, key=lambda n: self._credit[n])
+        self._credit[best] -= total
+        return best
+
+    def _higher_waiting(self, lane: str) -> bool:
+        for n in self._lane_names:
+            if n == lane:
+                return False
+            if self._lanes[n]:
+                return True
+        return False
+
+    async def _wait_change(self, timeout: Optional[float]) -> bool:
+        self._changed.clear()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _collect(self, only: Optional[str] = None) -> Tuple[str, List[Tuple[float, Any]]]:
+        while True:
+            lane = self._pick(only)
+            if lane is not None:
+                break
+            await self._wait_change(None)
+        q = self._lanes[lane]
+        batch = [q.popleft()]
+        self._size -= 1
+        if self.batch_window <= 0:
+            return lane, batch
+        loop = asyncio.get_running_loop()
+        window = self.batch_window
+        if lane == self._lane_names[0]:
+            window = min(window, max(0.0, batch[0][0] + self.latency_target - time.monotonic()))
+        deadline = loop.time() + window
+        while len(batch) < self.batch_max and not (self.batch_full and self.batch_full([b[1] for b in batch])):
+            if q:
+                batch.append(q.popleft())
+                self._size -= 1
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._higher_waiting(lane):
+                break
+            if not await self._wait_change(timeout):
+                break
+        return lane, batch
+
+    async def _worker(self, only: Optional[str] = None):
+        while True:
+            lane, batch = await self._collect(only)
+            items = [b[1] for b in batch]
+            try:
+                await self._send(items)
+                self.stats["delivered"] += len(items)
+                now = time.monotonic()
+                for t, _ in batch:
+                    QUEUE_LATENCY.observe(now - t, lane)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["failed"] += len(items)
+                log.warning("delivery failed", extra={"queue": self.name, "items": len(items), "lane": lane,
+                                                     "error": repr(e)})
+            finally:
+                self._done(len(items))
+
+    async def close(self, drain_timeout: float = 10.0) -> int:
+        """신규 수용을 막고 남은 항목을 최대 drain_timeout 초 동안 전송. 남은 개수 반환."""
+        self.closed = True
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        for t in self._workers:
+            t.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        left = self._size
+        if left:
+            log.warning("shutdown with undelivered items", extra={"queue": self.name, "items": left})
+        return left
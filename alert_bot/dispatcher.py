@@ -0,0 +1,285 @@
+# dispatcher.py — Discord webhook 전송기 (X-RateLimit-* 버킷 추적 + 429/5xx 재시도)
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+import metrics
+import templates
+
+WEBHOOK_SECONDS = metrics.histogram(
+    "alert_webhook_request_seconds", "Discord webhook POST round-trip time", ["status"])
+WEBHOOK_RESPONSES = metrics.counter(
+    "alert_webhook_responses_total", "Discord webhook responses by status class", ["status"])
+RATELIMIT_WAIT = metrics.histogram(
+    "alert_webhook_ratelimit_wait_seconds", "Time spent waiting for a rate-limit bucket",
+    buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+
+
+class WebhookError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RateLimitBucket:
+    """webhook URL 하나의 rate-limit 상태. remaining 은 in-flight 요청까지 반영한 로컬 추정치."""
+
+    def __init__(self, key: str = ""):
+        self.key = key                         # 공유 store 용 키 (URL 해시, 토큰을 남기지 않음)
+        self.name: Optional[str] = None        # X-RateLimit-Bucket
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None   # None = 아직 모름 (첫 응답 전)
+        self.reset_at = 0.0                    # monotonic
+        self.inflight = 0
+        self.probing = False
+        self.urgent = 0                        # 토큰을 기다리는 우선 요청 수 (있으면 일반 요청은 양보)
+        self.cond = asyncio.Condition()
+
+
+def status_class(code: int) -> str:
+    if code == 429:
+        return "429"
+    return f"{code // 100}xx"
+
+
+def _header_float(headers: httpx.Headers, name: str) -> Optional[float]:
+    v = headers.get(name)
+    if v is None:
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        return None
+
+
+def retry_after_of(r: httpx.Response) -> float:
+    """429 응답의 대기 시간(초). body.retry_after → Retry-After → Reset-After 순."""
+    try:
+        body = r.json()
+        if isinstance(body, dict) and body.get("retry_after") is not None:
+            return max(0.0, float(body["retry_after"]))
+    except (ValueError, json.JSONDecodeError):
+        pass
+    for name in ("retry-after", "x-ratelimit-reset-after"):
+        v = _header_float(r.headers, name)
+        if v is not None:
+            return max(0.0, v)
+    return 1.0
+
+
+class WebhookDispatcher:
+    """
+    - 버킷별로 remaining/reset 를 추적해 한도를 넘지 않도록 전송 시점을 조정
+    - 429: retry_after 만큼 버킷(또는 global) 을 잠그고 재시도
+    - 5xx / 네트워크 오류: full-jitter 지수 백오프로 재시도
+    - 그 외 4xx: 즉시 WebhookError
+    - priority=True 요청이 버킷을 기다리는 동안 일반 요청은 토큰을 가져가지 않는다 (로컬 버킷 기준)
+    - shared(shared.MemoryStore / SqliteStore) 를 주면 로컬 버킷에 더해 워커 간 공유 버킷에서도
+      토큰을 예약 → 여러 프로세스가 같은 webhook 한도를 나눠 쓴다
+    """
+
+    def __init__(self, client: httpx.AsyncClient, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic, shared: Any = None):
+        self.client = client
+        self.shared = shared
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self._buckets: Dict[str, RateLimitBucket] = {}
+        self._global_until = 0.0
+        self.stats: Dict[str, int] = {"sent": 0, "ok": 0, "429": 0, "4xx": 0, "5xx": 0, "errors": 0, "retries": 0}
+
+    def bucket(self, url: str) -> RateLimitBucket:
+        b = self._buckets.get(url)
+        if b is None:
+            key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+            b = self._buckets[url] = RateLimitBucket(key)
+        return b
+
+    # ── 버킷 예약 / 갱신 ─────────────────────────────────────────────────────
+    async def _acquire(self, b: RateLimitBucket, priority: bool = False):
+        async with b.cond:
+            if priority:
+                b.urgent += 1
+            try:
+                await self._acquire_locked(b, priority)
+            finally:
+                if priority:
+                    b.urgent -= 1
+                    b.cond.notify_all()
+
+    async def _acquire_locked(self, b: RateLimitBucket, priority: bool):
+        while True:
+            now = self.clock()
+            wait: Optional[float] = self._global_until - now
+            if wait <= 0:
+                if b.limit is not None and b.reset_at <= now and b.remaining is not None:
+                    b.remaining = max(b.remaining, b.limit - b.inflight)
+                if b.remaining is None:
+                    # 한도를 모르면 첫 요청 하나만 보내서 헤더로 학습
+                    if not b.probing:
+                        b.probing = True
+                        b.inflight += 1
+                        return
+                    wait = None
+                elif b.urgent and not priority:
+                    wait = None  # 우선 요청이 먼저 토큰을 가져가도록 대기
+                elif b.remaining > 0:
+                    b.remaining -= 1
+                    b.inflight += 1
+                    return
+                else:
+                    wait = max(0.0, b.reset_at - now)
+            try:
+                # 응답으로 버킷이 갱신되면 notify 로 깨어남 (상한 1초로 재확인)
+                timeout = 1.0 if wait is None else min(max(wait, 0.001), 1.0)
+                await asyncio.wait_for(b.cond.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call_shared(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """공유 store 호출. SQLite 처럼 블로킹(잠금 대기)인 store 는 스레드에서 → 이벤트 루프를 막지 않는다."""
+        if getattr(self.shared, "blocking", False):
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    async def _acquire_shared(self, b: RateLimitBucket):
+        while True:
+            wait = await self._call_shared(self.shared.rate_reserve, b.key)
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    async def _release(self, b: RateLimitBucket, r: Optional[httpx.Response], shared_held: bool = True):
+        """로컬 예약 반납 + 응답 반영. shared_held: 공유 버킷 토큰도 예약했는지 (응답이 없으면 되돌림)."""
+        updates: List[Dict[str, Any]] = []
+        async with b.cond:
+            b.inflight -= 1
+            b.probing = False
+            if r is not None:
+                updates = self._update(b, r)
+            elif b.remaining is not None and b.remaining < (b.limit or 1):
+                b.remaining += 1  # 응답을 못 받은 요청은 토큰을 되돌림
+            b.cond.notify_all()
+        if self.shared is not None:
+            if r is None and shared_held:
+                await self._call_shared(self.shared.rate_cancel, b.key)
+            for kwargs in updates:
+                await self._call_shared(self.shared.rate_update, b.key, **kwargs)
+
+    def _update(self, b: RateLimitBucket, r: httpx.Response) -> List[Dict[str, Any]]:
+        """응답 헤더로 로컬 버킷 갱신. 공유 store 에 반영할 rate_update 인자 목록을 반환."""
+        now = self.clock()
+        h = r.headers
+        if h.get("x-ratelimit-bucket"):
+            b.name = h["x-ratelimit-bucket"]
+        limit = _header_float(h, "x-ratelimit-limit")
+        remaining = _header_float(h, "x-ratelimit-remaining")
+        reset_after = _header_float(h, "x-ratelimit-reset-after")
+        if reset_after is None:
+            reset = _header_float(h, "x-ratelimit-reset")
+            if reset is not None:
+                reset_after = max(0.0, reset - time.time())
+        if limit is not None:
+            b.limit = int(limit)
+        if remaining is not None:
+            # 아직 응답이 안 온 요청 몫은 빼고 반영
+            b.remaining = max(0, int(remaining) - b.inflight)
+        if reset_after is not None:
+            b.reset_at = now + reset_after
+        retry_after: Optional[float] = None
+        is_global = False
+        if r.status_code == 429:
+            retry_after = retry_after_of(r)
+            is_global = h.get("x-ratelimit-global", "").lower() == "true"
+            try:
+                is_global = is_global or bool(r.json().get("global"))
+            except (ValueError, AttributeError):
+                pass
+            if is_global:
+                self._global_until = max(self._global_until, now + retry_after)
+            else:
+                b.remaining = 0
+                b.reset_at = max(b.reset_at, now + retry_after)
+        elif b.remaining is None:
+            # rate-limit 헤더가 없는 응답 → 제한 없음으로 간주
+            b.remaining = b.limit = 1 << 30
+        updates: List[Dict[str, Any]] = []
+        if self.shared is not None:
+            if is_global:
+                updates.append({"retry_after": retry_after, "is_global": True})
+            if not is_global or limit is not None:
+                updates.append({
+                    "limit": int(limit) if limit is not None else None,
+                    "remaining": int(remaining) if remaining is not None else None,
+                    "reset_after": reset_after,
+                    "retry_after": None if is_global else retry_after,
+                })
+        return updates
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # ── 전송 ────────────────────────────────────────────────────────────────
+    async def send(self, url: str, payload: Any = None, *, content: Optional[bytes] = None,
+                   headers: Optional[Dict[str, str]] = None, priority: bool = False) -> httpx.Response:
+        b = self.bucket(url)
+        if content is None:
+            # 한 번만 직렬화해 재시도에도 같은 bytes 를 보낸다
+            content = templates.dumps(payload)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+        attempt = 0
+        last = ""
+        while True:
+            t_wait = time.perf_counter()
+            await self._acquire(b, priority)
+            if self.shared is not None:
+                try:
+                    await self._acquire_shared(b)
+                except BaseException:
+                    # 공유 버킷을 기다리다 취소/실패 → 로컬 예약(inflight / probing)만 되돌린다
+                    await asyncio.shield(self._release(b, None, shared_held=False))
+                    raise
+            t0 = time.perf_counter()
+            RATELIMIT_WAIT.observe(t0 - t_wait)
+            r: Optional[httpx.Response] = None
+            try:
+                self.stats["sent"] += 1
+                r = await self.client.post(url, content=content, headers=headers)
+            except httpx.HTTPError as e:
+                self.stats["errors"] += 1
+                last = e.__class__.__name__
+            finally:
+                await self._release(b, r)
+            label = status_class(r.status_code) if r is not None else "error"
+            WEBHOOK_SECONDS.observe(time.perf_counter() - t0, label)
+            WEBHOOK_RESPONSES.inc(label)
+
+            if r is not None:
+                if r.status_code < 300:
+                    self.stats["ok"] += 1
+                    return r
+                if r.status_code == 429:
+                    # 429 는 버킷이 대기 시간을 반영하므로 백오프 없이 재시도
+                    self.stats["429"] += 1
+                    last = f"429 {r.text[:200]}"
+                elif r.status_code >= 500:
+                    self.stats["5xx"] += 1
+                    last = f"{r.status_code} {r.text[:200]}"
+                else:
+                    self.stats["4xx"] += 1
+                    raise WebhookError(f"{r.status_code} {r.text}", r.status_code)
+
+            if attempt >= self.max_retries:
+                raise WebhookError(last or "webhook failed", r.status_code if r is not None else None)
+            self.stats["retries"] += 1
+            if r is None or r.status_code != 429:
+                await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
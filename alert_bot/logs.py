@@ -0,0 +1,147 @@
+# logs.py — 구조화(JSON 한 줄) 로그: QueueHandler 로 넘기고 별도 스레드에서 기록 (이벤트 루프를 막지 않음)
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+ROOT = "alert"
+REDACTED = "[REDACTED]"
+
+_STD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime"}
+
+
+def get(name: str = "") -> logging.Logger:
+    """alert.<name> 로거 (app / delivery / auth ...)."""
+    return logging.getLogger(f"{ROOT}.{name}" if name else ROOT)
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """'request=0.1,body=0.01' → {이름: 비율(0~1)}."""
+    out: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, rate = part.partition("=")
+        r = float(rate)
+        if not 0.0 <= r <= 1.0:
+            raise ValueError(f"sample rate must be within 0..1: {part.strip()}")
+        out[name.strip().lower()] = r
+    return out
+
+
+class Sampler:
+    """이벤트 이름별 기록 비율. 없는 이름은 default."""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default: float = 0.0, rng=random.random):
+        self.rates = dict(rates or {})
+        self.default = default
+        self._rng = rng
+
+    def rate(self, name: str) -> float:
+        return self.rates.get(name, self.default)
+
+    def hit(self, name: str) -> bool:
+        r = self.rates.get(name, self.default)
+        return r >= 1.0 or (r > 0.0 and self._rng() < r)
+
+
+class Redactor:
+    """필드 이름(대소문자 무시)이 목록에 있으면 값 대신 [REDACTED]. dict/list 안쪽까지."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names = frozenset(n.strip().lower() for n in names if n.strip())
+
+    def __call__(self, v: Any) -> Any:
+        if not self.names:
+            return v
+        if isinstance(v, dict):
+            return {k: (REDACTED if str(k).lower() in self.names else self(x)) for k, x in v.items()}
+        if isinstance(v, (list, tuple)):
+            return [self(x) for x in v]
+        return v
+
+
+class JsonFormatter(logging.Formatter):
+    """{"ts", "level", "logger", "msg", ...extra 필드} — 리스너 스레드에서 실행."""
+
+    def __init__(self, redact: Optional[Redactor] = None):
+        super().__init__()
+        self.redact = redact or Redactor()
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _STD_ATTRS and not k.startswith("_"):
+                out[k] = v
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc:
+            out["exc"] = exc
+        return json.dumps(self.redact(out), ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버린다 (버린 수는 dropped)."""
+
+    def __init__(self, q: "queue.Queue"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 기본 prepare 는 호출 스레드에서 format 까지 하므로, 메시지 합치기만 하고 나머지는 리스너에서
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+
+
+def setup(level: str = "INFO", redact: Iterable[str] = (), queue_size: int = 10000,
+          stream: Optional[TextIO] = None) -> DroppingQueueHandler:
+    """alert.* 로거를 queue → 리스너 스레드 → stream(기본 stdout) JSON 으로. 다시 부르면 교체."""
+    global _listener, _handler
+    shutdown()
+    out = logging.StreamHandler(stream or sys.stdout)
+    out.setFormatter(JsonFormatter(Redactor(redact)))
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=max(1, queue_size)))
+    _listener = logging.handlers.QueueListener(_handler.queue, out, respect_handler_level=False)
+    _listener.start()
+    root = get()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+    root.propagate = False
+    return _handler
+
+
+def shutdown():
+    """남은 로그를 기록하고 리스너 스레드 종료."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown)
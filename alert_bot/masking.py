@@ -0,0 +1,130 @@
+# masking.py — IP 마스킹 (A|B|C|NONE|LAST2 + /N prefix 모드, X-Forwarded-For 체인, LRU 캐시)
+import ipaddress
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_IPV4_RE = re.compile(r"^\s*\d{1,3}(?:\.\d{1,3}){3}\s*$")
+_PORT_V4_RE = re.compile(r"^(\d{1,3}(?:\.\d{1,3}){3}):\d+$")        # 1.2.3.4:5678
+_BRACKET_V6_RE = re.compile(r"^\[([0-9A-Fa-f:.%\w]+)\](?::\d+)?$")  # [::1]:443
+
+LEGACY_MODES = ("A", "B", "C", "NONE", "LAST2")
+XFF_FIRST = "first"
+XFF_ALL = "all"
+
+Mode = Tuple[str, int]  # ("A"|"B"|"C"|"NONE"|"LAST2", 0) | ("PREFIX", 비트수)
+
+
+def parse_mode(mode: str, max_bits: int) -> Mode:
+    """'LAST2' / '/24' / '24' → Mode. 알 수 없는 이름은 기존과 같이 B."""
+    m = (mode or "").strip().upper()
+    if m.lstrip("/").isdigit():
+        bits = int(m.lstrip("/"))
+        if not 0 <= bits <= max_bits:
+            raise ValueError(f"prefix length out of range: {mode}")
+        return "PREFIX", bits
+    return (m if m in LEGACY_MODES else "B"), 0
+
+
+def _mask_ipv4(ip: str, mode: Mode, token: str) -> str:
+    parts = ip.split(".")
+    if len(parts) != 4:
+        return ip
+    a, b, c, d = parts
+    kind, bits = mode
+    if kind == "NONE":
+        return ip
+    if kind == "A":
+        return f"{a}.{token}.{token}.{token}"
+    if kind == "B":
+        return f"{a}.{b}.{token}.{token}"
+    if kind == "C":
+        return f"{a}.{b}.{c}.{token}"
+    if kind == "LAST2":
+        # XXX.XXX.C.D
+        return f"{token}.{token}.{c}.{d}"
+    # PREFIX
+    if bits % 8 == 0:
+        keep = bits // 8
+        return ".".join(parts[:keep] + [token] * (4 - keep))
+    try:
+        return str(ipaddress.ip_network(f"{ip}/{bits}", strict=False))
+    except ValueError:
+        return ip
+
+
+def _mask_ipv6(ip: str, mode6: Mode, mode4: Mode, token: str) -> str:
+    try:
+        addr = ipaddress.ip_address(ip)
+        # IPv4-mapped IPv6 (::ffff:a.b.c.d)
+        if isinstance(addr, ipaddress.IPv6Address) and addr.ipv4_mapped:
+            return _mask_ipv4(str(addr.ipv4_mapped), mode4, token)
+        hextets = addr.exploded.split(":")  # 8 hextets
+    except ValueError:
+        return ip
+    kind, bits = mode6
+    if kind == "NONE":
+        return ip
+    if kind == "LAST2":
+        return ":".join([token] * 6 + hextets[-2:])
+    if kind == "PREFIX":
+        if bits % 16 == 0:
+            keep = bits // 16
+            return ":".join(hextets[:keep] + [token] * (8 - keep))
+        return str(ipaddress.ip_network(f"{addr}/{bits}", strict=False))
+    keep = {"A": 1, "B": 2, "C": 3}.get(kind, 2)
+    return ":".join(hextets[:keep] + [token] * (8 - keep))
+
+
+def _strip_hop(hop: str) -> str:
+    """XFF 한 칸에서 포트/괄호 제거: '1.2.3.4:80' → '1.2.3.4', '[::1]:443' → '::1'."""
+    hop = hop.strip().strip('"')
+    m = _BRACKET_V6_RE.match(hop)
+    if m:
+        return m.group(1)
+    m = _PORT_V4_RE.match(hop)
+    if m:
+        return m.group(1)
+    return hop
+
+
+class IpMasker:
+    """
+    mode  : IPv4 모드 (A|B|C|NONE|LAST2 또는 /N)
+    mode6 : IPv6 모드 (없으면 mode 가 이름이면 그대로, /N 이면 /48)
+    xff   : first(첫 hop 만) | all(체인 전체를 각각 마스킹)
+    같은 입력 문자열은 LRU(cache_size) 에서 바로 반환.
+    """
+
+    def __init__(self, mode: str = "LAST2", token: str = "XXX", mode6: Optional[str] = None,
+                 xff: str = XFF_FIRST, cache_size: int = 65536):
+        self.mode4 = parse_mode(mode, 32)
+        if mode6:
+            self.mode6 = parse_mode(mode6, 128)
+        elif self.mode4[0] == "PREFIX":
+            self.mode6 = ("PREFIX", 48)
+        else:
+            self.mode6 = self.mode4
+        if xff not in (XFF_FIRST, XFF_ALL):
+            raise ValueError(f"unknown xff mode: {xff}")
+        self.token = token
+        self.xff = xff
+        self.mask = lru_cache(maxsize=cache_size)(self._mask)
+
+    def mask_one(self, ip: str) -> str:
+        if _IPV4_RE.match(ip):
+            return _mask_ipv4(ip.strip(), self.mode4, self.token)
+        if ":" in ip:
+            return _mask_ipv6(ip, self.mode6, self.mode4, self.token)
+        return ip
+
+    def _mask(self, ip_raw: Optional[str]) -> str:
+        if not ip_raw:
+            return "-"
+        if self.xff == XFF_FIRST:
+            return self.mask_one(_strip_hop(ip_raw.split(",", 1)[0]))
+        hops = [_strip_hop(h) for h in ip_raw.split(",")]
+        return ", ".join(self.mask_one(h) for h in hops if h) or "-"
+
+    def cache_info(self):
+        return self.mask.cache_info()
@@ -0,0 +1,179 @@
+# metrics.py — 의존성 없는 Prometheus text exposition (counter / gauge / histogram)
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: object) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[object], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = tuple(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(tuple(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """값을 직접 set 하거나, fn 을 주면 scrape 시점에 계산 (fn → {labels: value} 또는 숫자)."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], object]] = None, kind: str = "gauge"):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self._fn = fn
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, *labels: str):
+        self._values[tuple(labels)] = value
+
+    def samples(self) -> List[str]:
+        values = self._values
+        if self._fn is not None:
+            got = self._fn()
+            if got is None:
+                return []
+            values = got if isinstance(got, dict) else {(): got}
+        out = []
+        for k, v in sorted(values.items()):
+            k = k if isinstance(k, tuple) else (k,)
+            out.append(f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}")
+        return out
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels: str):
+        key = tuple(labels)
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def samples(self) -> List[str]:
+        out = []
+        for key, s in sorted(self._series.items()):
+            acc = 0.0
+            for le, c in zip(self.buckets + (math.inf,), s[:-1]):
+                acc += c
+                le_label = 'le="' + _fmt(le) + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {_fmt(acc)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(s[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(acc)}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, m: _Metric) -> _Metric:
+        old = self._metrics.get(m.name)
+        if old is not None and (type(old) is not type(m) or old.labelnames != m.labelnames):
+            raise ValueError(f"duplicate metric: {m.name}")
+        # 같은 정의의 재등록은 교체: `python app.py` 는 모듈이 __main__ 과 app 으로 두 번 import 되고,
+        # 요청을 받는 쪽(나중에 import 된 app) 의 값/콜백이 노출돼야 한다
+        self._metrics[m.name] = m
+        return m
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics.values():
+            samples = m.samples()
+            if samples:
+                lines += m.header() + samples
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = (),
+          fn: Optional[Callable[[], object]] = None) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames, fn))
+
+
+def counter_func(name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], object]] = None) -> Gauge:
+    """이미 다른 곳에서 세고 있는 누적값을 counter 타입으로 노출."""
+    return REGISTRY.register(Gauge(name, help, labelnames, fn, kind="counter"))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,231 @@
+# shared.py — 워커(프로세스) 간 공유 상태: dedup 키 / rate-limit 버킷 (memory | sqlite)
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+GLOBAL_BUCKET = "*global*"
+PROBE_LEASE = 2.0       # 한도를 모르는 버킷: 첫 요청(probe) 응답을 기다리는 최대 시간(초)
+UNLIMITED = 1 << 30     # rate-limit 헤더가 없는 응답 → 제한 없음
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup (
+    key        TEXT PRIMARY KEY,
+    expires_at REAL    NOT NULL,
+    count      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dedup_expires ON dedup(expires_at);
+CREATE TABLE IF NOT EXISTS ratelimit (
+    bucket    TEXT PRIMARY KEY,
+    lim       INTEGER,
+    remaining INTEGER NOT NULL,
+    reset_at  REAL    NOT NULL,
+    win       REAL    NOT NULL
+);
+"""
+
+
+class MemoryStore:
+    """
+    단일 프로세스용 로컬 대역 (SqliteStore 와 같은 인터페이스).
+    시각은 모두 wall clock(time.time) — 프로세스 간에 비교할 수 있어야 하므로.
+    """
+
+    blocking = False  # True 면 호출이 잠금 대기로 블로킹될 수 있음 → 호출 측이 스레드로 돌린다
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._dedup: Dict[str, Tuple[float, int]] = {}
+        self._rate: Dict[str, list] = {}  # bucket → [lim, remaining, reset_at, win]
+
+    # ── dedup ───────────────────────────────────────────────────────────────
+    def dedup_seen(self, key: str, ttl: float) -> int:
+        """key 의 누적 수신 횟수 (1 = 처음 / 만료 후 처음)."""
+        now = self.clock()
+        e = self._dedup.get(key)
+        count = e[1] + 1 if e is not None and e[0] > now else 1
+        self._dedup[key] = (e[0] if count > 1 else now + ttl, count)
+        if count == 1 and len(self._dedup) % 256 == 0:
+            self._dedup = {k: v for k, v in self._dedup.items() if v[0] > now}
+        return count
+
+    def dedup_forget(self, key: str):
+        self._dedup.pop(key, None)
+
+    # ── rate limit ──────────────────────────────────────────────────────────
+    def _reserve(self, row: Optional[list], glob: Optional[list], now: float) -> Tuple[float, Optional[list]]:
+        """공통 로직: (대기 초, 갱신할 row). 대기 0 이면 토큰 하나 확보."""
+        if glob is not None and glob[2] > now:
+            return glob[2] - now, None
+        if row is None or row[0] is None:
+            # 한도를 모름: probe 하나만 보내고 나머지는 헤더가 올 때까지 대기
+            if row is not None and row[2] > now:
+                return row[2] - now, None
+            return 0.0, [None, 0, now + PROBE_LEASE, row[3] if row is not None else 0.0]
+        lim, remaining, reset_at, win = row
+        if reset_at <= now:
+            # 새 창: 실제 reset 은 응답 헤더가 알려줄 때까지 지난 창 길이만큼으로 가정
+            remaining, reset_at = lim, now + win
+        if remaining > 0:
+            return 0.0, [lim, remaining - 1, reset_at, win]
+        return max(0.001, reset_at - now), None
+
+    def _update(self, row: Optional[list], now: float, limit: Optional[int], remaining: Optional[int],
+                reset_after: Optional[float], retry_after: Optional[float]) -> list:
+        lim, rem, reset_at, win = row if row is not None else [None, 0, now, 0.0]
+        if reset_after is not None:
+            win = max(win, reset_after)  # 창 길이 추정 (관측한 최대 reset_after)
+        if retry_after is not None:  # 버킷 429 (한도를 아직 모르면 대기 후 다시 probe)
+            return [limit if limit is not None else lim, 0, max(reset_at, now + retry_after), win]
+        if limit is None and remaining is None:
+            # 헤더 없는 응답: 처음(probe)이면 제한 없음으로, 이미 아는 버킷이면 그대로
+            return [UNLIMITED, UNLIMITED, now, 0.0] if lim is None else [lim, rem, reset_at, win]
+        new_reset = now + reset_after if reset_after is not None else reset_at
+        if remaining is not None:
+            # 같은 창이면 다른 워커가 이미 예약한 몫을 보존하도록 작은 쪽
+            same_window = lim is not None and reset_at > now and new_reset <= reset_at + 0.5
+            rem = min(rem, remaining) if same_window else remaining
+        return [limit if limit is not None else lim, rem, new_reset, win]
+
+    def rate_reserve(self, bucket: str) -> float:
+        """0 이면 토큰 확보, 양수면 그만큼 기다린 뒤 다시 호출."""
+        wait, row = self._reserve(self._rate.get(bucket), self._rate.get(GLOBAL_BUCKET), self.clock())
+        if row is not None:
+            self._rate[bucket] = row
+        return wait
+
+    def rate_update(self, bucket: str, limit: Optional[int] = None, remaining: Optional[int] = None,
+                    reset_after: Optional[float] = None, retry_after: Optional[float] = None,
+                    is_global: bool = False):
+        now = self.clock()
+        if is_global:
+            g = self._rate.get(GLOBAL_BUCKET)
+            self._rate[GLOBAL_BUCKET] = [0, 0, max(g[2] if g else 0.0, now + (retry_after or 0.0)), 0.0]
+            return
+        self._rate[bucket] = self._update(self._rate.get(bucket), now, limit, remaining, reset_after, retry_after)
+
+    def rate_cancel(self, bucket: str):
+        """응답을 못 받은 요청의 토큰을 되돌림 (probe 였다면 다음 요청이 다시 probe)."""
+        row = self._rate.get(bucket)
+        if row is None:
+            return
+        if row[0] is None:
+            del self._rate[bucket]
+        elif row[1] < row[0]:
+            row[1] += 1
+
+    def close(self):
+        pass
+
+
+class SqliteStore(MemoryStore):
+    """
+    여러 uvicorn 워커가 같은 파일을 연다. 읽고-쓰기는 BEGIN IMMEDIATE 트랜잭션으로 직렬화.
+    WAL + busy_timeout: 짧은 쓰기 경합은 SQLite 가 대기로 처리.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time, busy_timeout_ms: int = 5000):
+        super().__init__(clock)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                     timeout=busy_timeout_ms / 1000.0)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._ops = 0
+
+    def _tx(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    # ── dedup ───────────────────────────────────────────────────────────────
+    def dedup_seen(self, key: str, ttl: float) -> int:
+        now = self.clock()
+        self._ops += 1
+        purge = self._ops % 256 == 0
+
+        def run(c: sqlite3.Connection) -> int:
+            row = c.execute("SELECT expires_at, count FROM dedup WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] > now:
+                c.execute("UPDATE dedup SET count = count + 1 WHERE key = ?", (key,))
+                return row[1] + 1
+            c.execute("INSERT OR REPLACE INTO dedup(key, expires_at, count) VALUES (?, ?, 1)", (key, now + ttl))
+            if purge:
+                c.execute("DELETE FROM dedup WHERE expires_at <= ?", (now,))
+            return 1
+
+        return self._tx(run)
+
+    def dedup_forget(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM dedup WHERE key = ?", (key,))
+
+    # ── rate limit ──────────────────────────────────────────────────────────
+    @staticmethod
+    def _get(c: sqlite3.Connection, bucket: str) -> Optional[list]:
+        row = c.execute("SELECT lim, remaining, reset_at, win FROM ratelimit WHERE bucket = ?",
+                        (bucket,)).fetchone()
+        return list(row) if row is not None else None
+
+    @staticmethod
+    def _put(c: sqlite3.Connection, bucket: str, row: list):
+        c.execute("INSERT OR REPLACE INTO ratelimit(bucket, lim, remaining, reset_at, win) VALUES (?, ?, ?, ?, ?)",
+                  (bucket, *row))
+
+    def rate_reserve(self, bucket: str) -> float:
+        def run(c: sqlite3.Connection) -> float:
+            wait, row = self._reserve(self._get(c, bucket), self._get(c, GLOBAL_BUCKET), self.clock())
+            if row is not None:
+                self._put(c, bucket, row)
+            return wait
+
+        return self._tx(run)
+
+    def rate_update(self, bucket: str, limit: Optional[int] = None, remaining: Optional[int] = None,
+                    reset_after: Optional[float] = None, retry_after: Optional[float] = None,
+                    is_global: bool = False):
+        def run(c: sqlite3.Connection):
+            now = self.clock()
+            if is_global:
+                g = self._get(c, GLOBAL_BUCKET)
+                self._put(c, GLOBAL_BUCKET, [0, 0, max(g[2] if g else 0.0, now + (retry_after or 0.0)), 0.0])
+            else:
+                self._put(c, bucket, self._update(self._get(c, bucket), now, limit, remaining,
+                                                  reset_after, retry_after))
+
+        self._tx(run)
+
+    def rate_cancel(self, bucket: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM ratelimit WHERE bucket = ? AND lim IS NULL", (bucket,))
+            self._conn.execute("UPDATE ratelimit SET remaining = remaining + 1 "
+                               "WHERE bucket = ? AND lim IS NOT NULL AND remaining < lim", (bucket,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+BACKENDS: Dict[str, Callable[[str], MemoryStore]] = {
+    "memory": lambda path: MemoryStore(),
+    "sqlite": lambda path: SqliteStore(path),
+}
+
+
+def open_store(backend: str, path: str = "") -> MemoryStore:
+    """backend 이름 → store. 다른 저장소는 BACKENDS 에 factory(path) 를 등록해서 교체."""
+    factory = BACKENDS.get(backend)
+    if factory is None:
+        raise ValueError(f"unknown state backend: {backend}")
+    return factory(path)
@@ -0,0 +1,129 @@
+# spool.py — 미전송 알림 디스크 보관 (SQLite WAL, append → ack → compaction)
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    created   REAL    NOT NULL,
+    payload   TEXT    NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL  NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS spool_pending ON spool(delivered, id);
+"""
+
+
+class Spool:
+    """
+    수락한 알림을 응답 전에 append, 전송 성공 시 ack(delivered=1),
+    compact() 에서 delivered 행 삭제 + WAL checkpoint + incremental vacuum.
+    WAL + synchronous=NORMAL: 커밋마다 fsync 하지 않지만 프로세스/컨테이너 재시작에는 안전.
+    여러 워커가 같은 파일을 쓸 때는 lease 로 소유를 표시: append(lease=) / claim() 은
+    lease_until 을 갱신하고, 만료된(주인이 죽었거나 오래 걸린) 행만 다른 워커가 가져간다.
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL", busy_timeout_ms: int = 5000):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None,
+                                     timeout=busy_timeout_ms / 1000.0)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # 새 파일에만 적용
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.executescript(_SCHEMA)
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(spool)")}
+        if "lease_until" not in cols:  # 이전 버전 파일
+            self._conn.execute("ALTER TABLE spool ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+        self.stats: Dict[str, int] = {"appended": 0, "acked": 0, "compacted": 0, "claimed": 0}
+
+    def append(self, payload: Any, lease: float = 0.0) -> int:
+        data = json.dumps(payload, separators=(",", ":"))  # ASCII 이스케이프 (짝 없는 surrogate 도 저장 가능)
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute("INSERT INTO spool(created, payload, lease_until) VALUES (?, ?, ?)",
+                                     (now, data, now + lease if lease > 0 else 0))
+        self.stats["appended"] += 1
+        return cur.lastrowid
+
+    def append_many(self, payloads: List[Any], lease: float = 0.0) -> List[int]:
+        """여러 행을 트랜잭션 하나로 append (커밋/WAL 쓰기 한 번). id 목록을 순서대로 반환."""
+        rows = [json.dumps(p, separators=(",", ":")) for p in payloads]
+        if not rows:
+            return []
+        now = time.time()
+        until = now + lease if lease > 0 else 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [self._conn.execute("INSERT INTO spool(created, payload, lease_until) VALUES (?, ?, ?)",
+                                          (now, data, until)).lastrowid for data in rows]
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self.stats["appended"] += len(ids)
+        return ids
+
+    def ack(self, ids: Iterable[int]):
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("UPDATE spool SET delivered = 1 WHERE id = ?", [(i,) for i in ids])
+        self.stats["acked"] += len(ids)
+
+    def claim(self, limit: int = 500, lease: float = 300.0, after_id: int = 0) -> List[Tuple[int, Any]]:
+        """lease 가 만료된 미전송 행을 가져오며 lease 를 갱신 (워커 간 중복 재전송 방지)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload FROM spool WHERE delivered = 0 AND lease_until <= ? AND id > ? "
+                    "ORDER BY id LIMIT ?", (now, after_id, limit),
+                ).fetchall()
+                self._conn.executemany("UPDATE spool SET lease_until = ? WHERE id = ?",
+                                       [(now + lease, i) for i, _ in rows])
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        self.stats["claimed"] += len(rows)
+        return [(i, json.loads(p)) for i, p in rows]
+
+    def release(self, ids: Iterable[int]):
+        """전송 실패/미적재 행의 lease 해제 → 다음 claim 에서 바로 다시 가져갈 수 있게."""
+        ids = [i for i in ids if i is not None]
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany("UPDATE spool SET lease_until = 0 WHERE id = ?", [(i,) for i in ids])
+
+    def release_all(self) -> int:
+        """모든 미전송 행의 lease 해제. 이 파일을 쓰는 프로세스가 하나뿐일 때 기동 시 (이전 실행이 남긴 lease)."""
+        with self._lock:
+            return self._conn.execute("UPDATE spool SET lease_until = 0 WHERE delivered = 0 AND lease_until > 0").rowcount
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool WHERE delivered = 0").fetchone()[0]
+
+    def compact(self) -> int:
+        with self._lock:
+            n = self._conn.execute("DELETE FROM spool WHERE delivered = 1").rowcount
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("PRAGMA incremental_vacuum")
+        self.stats["compacted"] += max(0, n)
+        return n
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                self._conn.close()
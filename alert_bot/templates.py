@@ -0,0 +1,107 @@
+# templates.py — 미리 컴파일한 embed 템플릿 (정적 부분은 시작 시 한 번, 요청마다 값만 채워 bytes 로)
+import json
+from json.encoder import encode_basestring_ascii  # C 구현: 문자열 하나를 JSON 리터럴로 (ensure_ascii=True 와 같음)
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import orjson  # 선택: 더 빠른 직렬화
+except ImportError:
+    orjson = None
+
+FieldSpec = Tuple[str, str, bool]     # (표시 이름, values 키, inline)
+ExtraField = Tuple[str, str, bool]    # (표시 이름, 값, inline) — 요청마다 붙는 필드
+
+
+def _s(v: Any) -> str:
+    """JSON 문자열 리터럴 (ASCII 이스케이프: 짝 없는 surrogate 가 섞여도 encode 가 실패하지 않도록)."""
+    return json.dumps(v)
+
+
+def dumps(payload: Any) -> bytes:
+    """webhook payload → JSON bytes (전송당 한 번, 재시도에도 재사용)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:  # 짝 없는 surrogate 등 UTF-8 로 못 바꾸는 문자열 → 아래 ASCII 이스케이프로
+            pass
+    return json.dumps(payload, separators=(",", ":")).encode("ascii")
+
+
+class EmbedTemplate:
+    """
+    embed 한 개짜리 메시지 템플릿.
+    title / description / color / footer / 필드 이름·inline / content(멘션) 는 생성 시 JSON 조각으로 고정하고,
+    render(values) 는 값만 이스케이프해 조각 사이에 끼운 뒤 한 번에 encode 한다.
+    message(values) 는 같은 내용을 dict 로 (큐/merge/spool/묶음 전송처럼 수정이 필요한 경로용).
+    """
+
+    def __init__(self, title: str, fields: Sequence[FieldSpec], description: str = "",
+                 color: Optional[int] = None, footer: str = "", content: str = ""):
+        self.title = title
+        self.description = description
+        self.color = color
+        self.footer = footer
+        self.content = content
+        self.fields: List[FieldSpec] = [(n, k, bool(i)) for n, k, i in fields]
+
+        head = [f'{{"content":{_s(content)},"embeds":[{{"title":{_s(title)}']
+        if description:
+            head.append(f',"description":{_s(description)}')
+        if color is not None:
+            head.append(f',"color":{int(color)}')
+        head.append(',"fields":[')
+        self._head = "".join(head)
+        self._tail = "]" + (f',"footer":{{"text":{_s(footer)}}}' if footer else "") + "}]}"
+        # 필드 조각: (values 키, '{"name":…,"value":', ',"inline":…}') — 구분 쉼표까지 미리 붙여 둠
+        self._field_parts = [(k, ("," if idx else "") + f'{{"name":{_s(n)},"value":',
+                              ',"inline":true}' if i else ',"inline":false}')
+                             for idx, (n, k, i) in enumerate(self.fields)]
+
+    def with_overrides(self, spec: Mapping[str, Any]) -> "EmbedTemplate":
+        """spec 에 있는 키만 바꾼 새 템플릿 (필드 이름 변경은 {"fields": {key: name}})."""
+        names = spec.get("fields") or {}
+        fields = [(names.get(k, n), k, i) for n, k, i in self.fields]
+        color = spec.get("color", self.color)
+        if isinstance(color, str):
+            color = int(color.lstrip("#"), 16)
+        return EmbedTemplate(spec.get("title", self.title), fields,
+                             description=spec.get("description", self.description), color=color,
+                             footer=spec.get("footer", self.footer), content=spec.get("content", self.content))
+
+    def render(self, values: Mapping[str, Any], extra: Iterable[ExtraField] = ()) -> bytes:
+        parts = [self._head]
+        for key, fhead, ftail in self._field_parts:
+            parts.append(fhead)
+            parts.append(encode_basestring_ascii(str(values.get(key, "-"))))
+            parts.append(ftail)
+        sep = "," if self._field_parts else ""
+        for name, value, inline in extra:
+            parts.append(f'{sep}{{"name":{encode_basestring_ascii(name)},"value":{encode_basestring_ascii(value)},'
+                         f'"inline":{"true" if inline else "false"}}}')
+            sep = ","
+        parts.append(self._tail)
+        return "".join(parts).encode("ascii")
+
+    def message(self, values: Mapping[str, Any], extra: Iterable[ExtraField] = ()) -> Dict[str, Any]:
+        fields = [{"name": n, "value": str(values.get(k, "-")), "inline": i} for n, k, i in self.fields]
+        fields += [{"name": n, "value": v, "inline": i} for n, v, i in extra]
+        embed: Dict[str, Any] = {"title": self.title}
+        if self.description:
+            embed["description"] = self.description
+        if self.color is not None:
+            embed["color"] = self.color
+        embed["fields"] = fields
+        if self.footer:
+            embed["footer"] = {"text": self.footer}
+        return {"content": self.content, "embeds": [embed]}
+
+
+def load_overrides(path: str) -> Dict[str, Dict[str, Any]]:
+    """JSON 파일 {"ban": {"title": ..., "color": "#e11d48", "fields": {"ip": "아이피"}}, ...}."""
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("template file must be a JSON object keyed by alert type")
+    return data
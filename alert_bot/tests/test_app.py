@@ -0,0 +1,224 @@
+# test_app.py — app 은 import 시 env 로 설정되므로 app 을 쓰는 테스트는 이 파일에 모은다 (queue 모드 + spool)
+#
+#   cd alert_bot && python -m pytest -q tests
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.fake_discord import FakeDiscord  # noqa: E402
+
+fake = FakeDiscord().start()
+os.environ.update(API_KEY="k", DISCORD_WEBHOOK_URL=fake.url, DELIVERY_MODE="queue",
+                  SPOOL_PATH=os.path.join(tempfile.mkdtemp(), "spool.db"),
+                  QUEUE_WORKERS="1", QUEUE_DRAIN_TIMEOUT="0.1", DEDUP_MODE="off", AUTH_RATE="0",
+                  SPOOL_REPLAY_INTERVAL="0.1", SPOOL_LEASE="300", LOG_LEVEL="WARNING")
+import app  # noqa: E402
+import breaker  # noqa: E402
+from dispatcher import WebhookError  # noqa: E402
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _fake_discord():
+    yield
+    fake.stop()
+
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app.app), base_url="http://t",
+                             headers={"X-API-Key": "k"})
+
+
+# /alert/{kind} 마다 유효한 본문과 webhook 에 도착해야 하는 embed (제목, 첫 필드 값)
+ROUTE_CASES = {
+    "ban": ({"ip": "1.2.3.4", "reason": "brute force", "bannedAt": "2025-03-01T09:00:00Z"},
+            "🚫 IP Banned", "`XXX.XXX.3.4`"),  # IP_MASK_MODE 기본값으로 마스킹
+    "first-blood": ({"first_blood_problem": "pwn1", "first_blood_person": "alice", "first_blood_school": "MJU",
+                     "solvedAt": "2025-03-01T09:00:00Z"}, "🩸 First Blood", "pwn1"),
+    "solve": ({"problem": "web1", "person": "bob", "school": "MJU", "points": 100, "solvedAt": 1740819600000},
+              "✅ Solve", "web1"),
+    "scoreboard": ({"team": "MJSEC", "rank": 1, "previousRank": 3, "totalPoint": 500,
+                    "changedAt": [2025, 3, 1, 9, 0]}, "📈 Scoreboard", "MJSEC"),
+    "health": ({"service": "db", "status": "down", "detail": "timeout", "at": "2025-03-01 09:00:00"},
+               "🩺 System Health", "db"),
+}
+
+
+async def wait_bodies(n: int, timeout: float = 5.0) -> list:
+    deadline = time.monotonic() + timeout
+    while len(fake.bodies) < n and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    return [json.loads(b) for b in fake.bodies]
+
+
+def test_route_cases_cover_every_kind():
+    assert {r.name for r in app.ROUTES} == set(ROUTE_CASES)
+
+
+def check_embed(kind: str, message: dict):
+    _, title, first = ROUTE_CASES[kind]
+    embed = message["embeds"][0]
+    assert embed["title"] == title
+    assert embed["fields"][0]["value"] == first
+    assert all(f["value"] != "-" for f in embed["fields"][:3])
+
+
+@pytest.mark.parametrize("mode", ["queue", "sync"])
+@pytest.mark.parametrize("kind", sorted(ROUTE_CASES))
+def test_alert_routes(kind, mode):
+    async def run():
+        await app.startup()
+        queue = app.delivery_queue
+        if mode == "sync":
+            app.delivery_queue = None  # DELIVERY_MODE=sync 와 같은 경로 (바로 webhook 전송)
+        fake.bodies.clear()
+        fake.keep_bodies = True
+        try:
+            async with client() as c:
+                r = await c.post(f"/alert/{kind}", json=ROUTE_CASES[kind][0])
+            assert r.status_code == (202 if mode == "queue" else 200), r.text
+            return await wait_bodies(1)
+        finally:
+            fake.keep_bodies = False
+            app.delivery_queue = queue
+            await app.shutdown()
+
+    sent = asyncio.run(run())
+    assert len(sent) == 1
+    check_embed(kind, sent[0])
+
+
+def test_restart_replays_every_queued_row():
+    async def send(n):
+        async with client() as c:
+            for i in range(n):
+                r = await c.post("/alert/ban", json={"ip": f"10.0.0.{i}", "reason": "test"})
+                assert r.status_code == 202
+
+    async def run():
+        fake.latency = 1.0  # 느린 webhook → 종료 시점에 큐에 항목이 남는다
+        await app.startup()
+        await send(5)
+        await asyncio.sleep(0.05)
+        await app.shutdown()  # 1개는 전송 중 취소, 4개는 큐에 남음
+        fake.latency = 0.0
+        before = fake.received
+        await app.startup()
+        try:
+            deadline = time.monotonic() + 5
+            while app.spool.pending_count() and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            assert app.spool.pending_count() == 0
+            assert fake.received - before >= 1
+        finally:
+            await app.shutdown()
+
+    asyncio.run(run())
+
+
+def test_batch_queue_mode_spools_every_item():
+    async def run():
+        await app.startup()
+        try:
+            appended = app.spool.stats["appended"]
+            async with client() as c:
+                r = await c.post("/alert/ban/batch", json=[{"ip": f"10.0.1.{i}"} for i in range(30)] + [1])
+            assert r.status_code == 202
+            assert r.json()["counts"] == {"queued": 30, "invalid": 1}
+            assert app.spool.stats["appended"] - appended == 30
+        finally:
+            await app.shutdown()
+
+    asyncio.run(run())
+
+
+def test_batch_sync_mode_sends_everything_and_reports_per_message(monkeypatch):
+    posted = []
+
+    async def post_webhook(payload, url=app.DISCORD_WEBHOOK_URL, priority=False):
+        if len(posted) == 2:
+            raise WebhookError("HTTP 500", 500)
+        posted.append(payload)
+
+    monkeypatch.setattr(app, "delivery_queue", None)
+    monkeypatch.setattr(app, "post_webhook", post_webhook)
+
+    async def run():
+        async with client() as c:
+            return await c.post("/alert/ban/batch", json=[{"ip": f"10.0.2.{i}"} for i in range(25)])
+
+    r = asyncio.run(run())
+    items = r.json()["items"]
+    assert r.status_code == 502
+    assert [len(p["embeds"]) for p in posted] == [10, 10]  # "+N more" 요약 없이 10개씩
+    assert [i["status"] for i in items] == ["sent"] * 20 + ["failed"] * 5
+
+
+def test_metrics_spool_pending():
+    async def run():
+        await app.startup()
+        try:
+            async with client() as c:
+                r = await c.get("/metrics")
+            assert r.status_code == 200
+            assert f"alert_spool_pending {app.spool.pending_count()}" in r.text
+        finally:
+            await app.shutdown()
+
+    asyncio.run(run())
+
+
+def spooled_jobs(messages: list) -> list:
+    ids = app.spool.append_many([app.spool_row(m, app.BAN_ROUTE, "normal") for m in messages], lease=300)
+    return [app.Job(m, sid, "ban", "normal") for m, sid in zip(messages, ids)]
+
+
+def ban_message(reason: str) -> dict:
+    return app.BAN_TEMPLATE.message({"ip": "`1.2.3.4`", "reason": reason}, [])
+
+
+def test_post_batch_dead_letters_rejected_message_only(monkeypatch):
+    # 400 (예: embed 필드 초과) 은 다시 보내도 거절 → replay 하지 않고, 같이 묶인 알림은 따로 보낸다
+    monkeypatch.setattr(fake, "respond", lambda body: (400 if b"poison" in body else 204, {}, b""))
+
+    async def run():
+        await app.startup()
+        fake.bodies.clear()
+        fake.keep_bodies = True
+        try:
+            jobs = spooled_jobs([ban_message("ok-1"), ban_message("poison"), ban_message("ok-2")])
+            with pytest.raises(WebhookError):
+                await app.post_batch(jobs)
+            assert app.spool.pending_count() == 0
+        finally:
+            fake.keep_bodies = False
+            await app.shutdown()
+
+    asyncio.run(run())
+    delivered = [json.loads(b) for b in fake.bodies if b"poison" not in b]
+    assert [m["embeds"][0]["fields"][2]["value"] for m in delivered] == ["ok-1", "ok-2"]
+
+
+def test_post_batch_acks_messages_sent_before_a_failure(monkeypatch):
+    # split: 10 + 10 + 5 개 세 메시지 중 세 번째가 실패하면 앞의 20개는 ack, 나머지 5개만 replay 대상
+    monkeypatch.setattr(app, "BATCH_OVERFLOW", "split")
+
+    async def run():
+        await app.startup()
+        try:
+            jobs = spooled_jobs([ban_message(f"r{i}") for i in range(25)])
+            before = fake.received
+            monkeypatch.setattr(fake, "respond", lambda body: (500 if fake.received - before > 2 else 204, {}, b""))
+            with pytest.raises((WebhookError, breaker.CircuitOpen)):
+                await app.post_batch(jobs)
+            assert app.spool.pending_count() == 5
+        finally:
+            await app.shutdown()
+
+    asyncio.run(run())
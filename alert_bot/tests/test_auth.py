@@ -0,0 +1,23 @@
+# test_auth.py — env 로 받은 키는 값 그대로, 쉼표/'#' 해석은 키 파일에만
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import auth  # noqa: E402
+
+
+def test_env_key_is_literal():
+    ring = auth.KeyRing(["s3cr3t#Xy,z"])
+    assert ring.check("s3cr3t#Xy,z", "a")[0] == auth.RESULT_OK
+    assert ring.check("s3cr3t", "b")[0] == auth.RESULT_INVALID
+    assert ring.check("z", "c")[0] == auth.RESULT_INVALID
+
+
+def test_key_file_is_parsed():
+    path = os.path.join(tempfile.mkdtemp(), "keys")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("old, new  # 교체 중\n")
+    ring = auth.KeyRing([], path)
+    assert len(ring) == 2
+    assert ring.check("new", "a")[0] == auth.RESULT_OK
@@ -0,0 +1,37 @@
+# test_decoding.py — gzip 여러 member / 해제 크기 상한 (gzip, br)
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import decoding  # noqa: E402
+
+
+def decode(encoding: str, body: bytes, limit: int = 1 << 20, step: int = 0) -> bytes:
+    d = decoding.decoder_for(encoding, limit)
+    for i in range(0, len(body), step or len(body)):
+        d.feed(body[i:i + (step or len(body))])
+    return d.finish()
+
+
+@pytest.mark.parametrize("step", [0, 1, 7])
+def test_gzip_multi_member(step):
+    body = gzip.compress(b'{"ip":') + b"\x00\x00" + gzip.compress(b'"1.2.3.4"}')
+    assert decode("gzip", body, step=step) == b'{"ip":"1.2.3.4"}'
+
+
+def test_gzip_limit():
+    with pytest.raises(decoding.BodyTooLarge):
+        decode("gzip", gzip.compress(b"a" * 10) + gzip.compress(b"b" * 1000), limit=100)
+
+
+def test_brotli_limit():
+    if decoding.brotli is None:
+        pytest.skip("brotli not installed")
+    bomb = decoding.brotli.compress(b"\x00" * (16 << 20))
+    assert len(bomb) < 1024
+    with pytest.raises(decoding.BodyTooLarge):
+        decode("br", bomb, limit=1 << 20)
+    assert decode("br", decoding.brotli.compress(b"x" * 5000), step=3) == b"x" * 5000
@@ -0,0 +1,48 @@
+# test_dedup.py — dedup 시간 구간은 표시 문자열(TIMESTAMP_FORMAT/TZ)이 아니라 원래 시각으로
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dedup  # noqa: E402
+import shared  # noqa: E402
+import timestamps  # noqa: E402
+
+
+def key(norm, v, window=60.0):
+    return dedup.ban_key("1.2.3.4", "temporary", norm.epoch(v), norm(v), window)
+
+
+def test_bucket_ignores_display_format():
+    norm = timestamps.TimestampNormalizer(timestamps.KST, fmt="%H:%M")
+    assert norm("2025-03-01T09:00:10Z") == norm("2025-03-02T09:00:10Z")  # 표시는 같아도
+    assert key(norm, "2025-03-01T09:00:10Z") != key(norm, "2025-03-02T09:00:10Z")  # 다른 날은 다른 구간
+    # 같은 순간을 다른 형식으로 받아도 같은 구간
+    assert key(norm, "2025-03-01T09:00:10Z") == key(norm, [2025, 3, 1, 9, 0, 20]) == key(norm, 1740819615000)
+
+
+def test_unparsed_falls_back_to_text():
+    norm = timestamps.TimestampNormalizer()
+    assert key(norm, "yesterday") == ("1.2.3.4", "TEMPORARY", "yesterday")
+    assert key(norm, None) == ("1.2.3.4", "TEMPORARY", "-")
+
+
+def test_shared_seen_async_runs_blocking_store_off_loop(tmp_path):
+    class Store(shared.SqliteStore):
+        threads = set()
+
+        def dedup_seen(self, key, ttl):
+            self.threads.add(threading.get_ident())
+            return super().dedup_seen(key, ttl)
+
+    store = Store(str(tmp_path / "state.db"))
+    cache = dedup.SharedDedupCache(store, ttl=60.0)
+
+    async def run():
+        return await cache.seen_async("k", "ref"), await cache.seen_async("k")
+
+    first, second = asyncio.run(run())
+    store.close()
+    assert first is None and second is not None and second.count == 2 and second.ref == "ref"
+    assert threading.get_ident() not in Store.threads
@@ -0,0 +1,34 @@
+# test_delivery.py — 큐가 가득 찼을 때: reject 는 아무것도 밀어내지 않고, drop_oldest 만 낮은 lane 부터 밀어낸다
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from delivery import OVERFLOW_DROP_OLDEST, DeliveryQueue, Job, QueueFull  # noqa: E402
+
+LANES = {"high": 8, "normal": 3, "low": 1}
+
+
+async def _send(items):
+    pass
+
+
+def test_reject_keeps_lower_lane_jobs():
+    q = DeliveryQueue(_send, maxsize=2, lanes=LANES)
+    q.put_nowait(Job({}, 1, lane="low"))
+    q.put_nowait(Job({}, 2, lane="low"))
+    with pytest.raises(QueueFull):
+        q.put_nowait(Job({}, 3, lane="high"))
+    assert q.lane_depths() == {"high": 0, "normal": 0, "low": 2}
+    assert q.stats["dropped"] == 0
+
+
+def test_drop_oldest_evicts_lowest_lane_first():
+    q = DeliveryQueue(_send, maxsize=2, lanes=LANES, overflow=OVERFLOW_DROP_OLDEST)
+    q.put_nowait(Job({}, 1, lane="normal"))
+    q.put_nowait(Job({}, 2, lane="low"))
+    assert q.put_nowait(Job({}, 3, lane="high")).spool_id == 2
+    assert q.put_nowait(Job({}, 4, lane="high")).spool_id == 1
+    with pytest.raises(QueueFull):
+        q.put_nowait(Job({}, 5, lane="low"))
@@ -0,0 +1,51 @@
+# test_dispatcher.py — 공유 버킷(STATE_BACKEND) 대기: 블로킹 store 는 이벤트 루프 밖에서, 취소돼도 로컬 예약은 반납
+import asyncio
+import os
+import sys
+import threading
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shared  # noqa: E402
+from dispatcher import WebhookDispatcher  # noqa: E402
+
+URL = "https://discord.invalid/api/webhooks/1/t"
+
+
+class SlowStore(shared.MemoryStore):
+    """공유 버킷이 계속 비어 있는 store. 어느 스레드에서 불렸는지 기록."""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+        self.cancelled = 0
+
+    def rate_reserve(self, bucket: str) -> float:
+        self.threads.add(threading.get_ident())
+        return 5.0
+
+    def rate_cancel(self, bucket: str):
+        self.cancelled += 1
+
+
+def test_cancel_while_waiting_for_shared_bucket_releases_local_slot():
+    store = SlowStore()
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda req: httpx.Response(204))) as client:
+            d = WebhookDispatcher(client, shared=store)
+            task = asyncio.create_task(d.send(URL, {"content": "x"}))
+            await asyncio.sleep(0.1)
+            b = d.bucket(URL)
+            assert b.inflight == 1 and b.probing  # 로컬 슬롯을 잡은 채 공유 버킷 대기 중
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return b
+
+    b = asyncio.run(run())
+    assert b.inflight == 0 and not b.probing
+    assert store.cancelled == 0  # 공유 토큰은 잡지 못했으므로 되돌릴 것도 없음
+    assert store.threads and threading.get_ident() not in store.threads
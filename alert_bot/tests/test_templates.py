@@ -0,0 +1,32 @@
+# test_templates.py — 짝 없는 surrogate 가 섞인 값도 JSON bytes 로 (UnicodeEncodeError → 500 이 나지 않도록)
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import spool  # noqa: E402
+import templates  # noqa: E402
+
+TEMPLATE = templates.EmbedTemplate("🚫 IP 차단", [("IP", "ip", True), ("사유", "reason", False)],
+                                   color=0xE11D48, footer="알림")
+VALUES = {"ip": "`1.2.3.4`", "reason": "x\udcff 한글"}
+
+
+def test_render_lone_surrogate():
+    body = TEMPLATE.render(VALUES, [("원문", "y\ud800", False)])
+    assert json.loads(body) == json.loads(json.dumps(TEMPLATE.message(VALUES, [("원문", "y\ud800", False)])))
+
+
+def test_dumps_lone_surrogate(monkeypatch):
+    msg = TEMPLATE.message(VALUES)
+    assert json.loads(templates.dumps(msg)) == msg
+    monkeypatch.setattr(templates, "orjson", None)
+    assert json.loads(templates.dumps(msg)) == msg
+
+
+def test_spool_append_lone_surrogate():
+    s = spool.Spool(os.path.join(tempfile.mkdtemp(), "spool.db"))
+    msg = TEMPLATE.message(VALUES)
+    s.append(msg)
+    assert [p for _, p in s.claim(10, 60)] == [msg]
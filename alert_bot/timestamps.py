@@ -0,0 +1,245 @@
+# timestamps.py — 알림 시각 정규화 (형식별 변환기 + 날짜 캐시, 표시 타임존 선택, dedup 용 epoch)
+import json
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+UTC = timezone.utc
+KST = timezone(timedelta(hours=9), "KST")
+
+_FIXED_TZ = {"UTC": UTC, "Z": UTC, "KST": KST, "ASIA/SEOUL": KST}
+_EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+Converter = Callable[[Any], Optional[str]]  # 값 → 표시 문자열, 해석 불가면 None
+
+
+def parse_tz(name: str) -> Optional[tzinfo]:
+    """'' → None, 'UTC'/'KST'/'Asia/Seoul' → 고정 오프셋, '+09:00' → 오프셋, 그 외 zoneinfo."""
+    n = (name or "").strip()
+    if not n:
+        return None
+    if n.upper() in _FIXED_TZ:
+        return _FIXED_TZ[n.upper()]
+    if n[0] in "+-" and ":" in n:
+        sign = -1 if n[0] == "-" else 1
+        hh, mm = n[1:].split(":", 1)
+        return timezone(sign * timedelta(hours=int(hh), minutes=int(mm)))
+    from zoneinfo import ZoneInfo  # tzdata 가 없는 이미지면 고정 오프셋 이름을 쓸 것
+    return ZoneInfo(n)
+
+
+def _fixed_offset(tz: Optional[tzinfo]) -> Optional[int]:
+    if isinstance(tz, timezone):
+        return int(tz.utcoffset(None).total_seconds())
+    return None
+
+
+def _offset_suffix(secs: int) -> str:
+    sign = "-" if secs < 0 else "+"
+    h, m = divmod(abs(secs) // 60, 60)
+    return f"{sign}{h:02d}:{m:02d}"
+
+
+# ── 날짜 부분 캐시 (같은 날의 이벤트가 몰리므로 적중률이 높다) ─────────────────
+@lru_cache(maxsize=1024)
+def _day_str(days: int) -> Optional[str]:
+    """1970-01-01 기준 일수 → 'YYYY-MM-DD' (범위 밖이면 None)."""
+    try:
+        return date.fromordinal(_EPOCH_ORD + days).isoformat()
+    except (ValueError, OverflowError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _ymd(y: int, mo: int, d: int) -> Optional[Tuple[str, int]]:
+    """(y, M, d) → ('YYYY-MM-DD', 1970 기준 일수), 잘못된 날짜면 None."""
+    try:
+        dd = date(y, mo, d)
+    except (ValueError, OverflowError):
+        return None
+    return dd.isoformat(), dd.toordinal() - _EPOCH_ORD
+
+
+# ── datetime 으로 해석하는 일반 경로 ──────────────────────────────────────────
+def _parse_str(s: str) -> Optional[datetime]:
+    t = s.strip()
+    if len(t) < 8 or not t[:4].isdigit():
+        return None
+    if len(t) > 10 and t[10] == " ":
+        t = t[:10] + "T" + t[11:]
+    if t.endswith("Z"):
+        t = t[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(t)
+    except ValueError:
+        return None
+
+
+def _parse_array(v) -> Optional[datetime]:
+    if len(v) < 3:
+        return None
+    try:
+        return datetime(*(int(x or 0) for x in list(v)[:6]))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _parse_dict(v: dict) -> Optional[datetime]:
+    y, mo, d = v.get("year"), v.get("month") or v.get("monthValue"), v.get("day") or v.get("dayOfMonth")
+    if not (y and mo and d):
+        return None
+    try:
+        return datetime(int(y), int(mo), int(d), int(v.get("hour", 0)), int(v.get("minute", 0)),
+                        int(v.get("second", 0)))
+    except (TypeError, ValueError):
+        return None
+
+
+class TimestampNormalizer:
+    """
+    iso() 대체. 값의 타입으로 변환기를 고른다.
+    - Java LocalDateTime 배열 [y, M, d, h, m(, s(, nanos))] (Jackson 은 0 인 초/나노를 생략)
+    - epoch 초/밀리초, ISO 8601 문자열('T' 또는 공백 구분, Z), {year, month, day, ...} dict
+    display_tz 가 None 이면 기존 출력 그대로(문자열은 받은 오프셋 유지, 배열/epoch/dict 는 UTC 표기).
+    display_tz 를 주면 오프셋 없는 값은 source_tz 로 해석한 뒤 display_tz 로 변환.
+    고정 오프셋(UTC/KST/+09:00)이면 배열·정수 epoch 은 datetime 없이 날짜 캐시 + 정수 연산으로 만든다.
+    """
+
+    def __init__(self, display_tz: Optional[tzinfo] = None, source_tz: tzinfo = UTC,
+                 fmt: str = "", cache_size: int = 4096):
+        self.display_tz = display_tz
+        self.source_tz = source_tz
+        self.fmt = fmt
+        self.stats: Dict[str, int] = {"unparsed": 0}
+        self._conv_str = lru_cache(maxsize=cache_size)(self._convert_str)
+
+        # 빠른 경로: 표시/원본 타임존이 모두 고정 오프셋이고 strftime 형식이 없을 때
+        disp = 0 if display_tz is None else _fixed_offset(display_tz)
+        src = 0 if display_tz is None else _fixed_offset(source_tz)
+        self._fast = not fmt and disp is not None and src is not None
+        self._disp_off = disp or 0
+        self._src_off = src or 0
+        self._suffix = _offset_suffix(self._disp_off)
+
+    # ── 변환기 ───────────────────────────────────────────────────────────────
+    def _render_epoch(self, secs: int, micro: int) -> Optional[str]:
+        days, sod = divmod(secs + self._disp_off, 86400)
+        day = _day_str(days)
+        if day is None:
+            return None
+        h, r = divmod(sod, 3600)
+        m, s = divmod(r, 60)
+        if micro:
+            return f"{day}T{h:02d}:{m:02d}:{s:02d}.{micro:06d}{self._suffix}"
+        return f"{day}T{h:02d}:{m:02d}:{s:02d}{self._suffix}"
+
+    def _render(self, dt: datetime, naive_is_utc: bool) -> str:
+        if self.display_tz is None:
+            if dt.tzinfo is None and naive_is_utc:
+                dt = dt.replace(tzinfo=UTC)
+        else:
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=self.source_tz)
+            dt = dt.astimezone(self.display_tz)
+        return dt.strftime(self.fmt) if self.fmt else dt.isoformat()
+
+    def _conv_array(self, v) -> Optional[str]:
+        n = len(v)
+        if n < 3:
+            return None
+        try:
+            y, mo, d = int(v[0] or 0), int(v[1] or 0), int(v[2] or 0)
+            hh = int(v[3] or 0) if n > 3 else 0
+            mm = int(v[4] or 0) if n > 4 else 0
+            ss = int(v[5] or 0) if n > 5 else 0
+        except (TypeError, ValueError):
+            return None
+        ymd = _ymd(y, mo, d)
+        if ymd is None or not (0 <= hh < 24 and 0 <= mm < 60 and 0 <= ss < 60):
+            return None
+        if self._fast:
+            return self._render_epoch(ymd[1] * 86400 + hh * 3600 + mm * 60 + ss - self._src_off, 0)
+        return self._render(datetime(y, mo, d, hh, mm, ss), naive_is_utc=True)
+
+    def _conv_int(self, v: int) -> Optional[str]:
+        if not self._fast:
+            return self._conv_float(v)
+        if v > 1e12:  # ms → s
+            secs, ms = divmod(v, 1000)
+            return self._render_epoch(secs, ms * 1000)
+        return self._render_epoch(v, 0)
+
+    def _conv_float(self, v) -> Optional[str]:
+        try:
+            ts = float(v)
+            if ts > 1e12:  # ms → s
+                ts /= 1000.0
+            dt = datetime.fromtimestamp(ts, tz=UTC)
+        except (OverflowError, OSError, ValueError):
+            return None
+        return self._render(dt, naive_is_utc=True)
+
+    def _convert_str(self, v: str) -> Optional[str]:
+        dt = _parse_str(v)
+        return None if dt is None else self._render(dt, naive_is_utc=False)
+
+    def _conv_dict(self, v: dict) -> Optional[str]:
+        dt = _parse_dict(v)
+        return None if dt is None else self._render(dt, naive_is_utc=True)
+
+    def _converter(self, v: Any) -> Optional[Converter]:
+        t = type(v)
+        if t is str:
+            return self._conv_str
+        if t is int:
+            return self._conv_int
+        if t is bool:
+            return None
+        if isinstance(v, (int, float)):
+            return self._conv_float
+        if isinstance(v, (list, tuple)):
+            return self._conv_array
+        if isinstance(v, dict):
+            return self._conv_dict
+        return None
+
+    # ── 진입점 ───────────────────────────────────────────────────────────────
+    def __call__(self, v: Any) -> str:
+        if v is None or v == "":
+            return "-"
+        conv = self._converter(v)
+        out = conv(v) if conv is not None else None
+        if out is None:
+            self.stats["unparsed"] += 1
+            if isinstance(v, dict):
+                return json.dumps(v, ensure_ascii=False)
+            return v if isinstance(v, str) else str(v)
+        return out
+
+    def epoch(self, v: Any) -> Optional[float]:
+        """
+        값 → UTC epoch 초 (dedup 시간 구간용, 표시 형식/타임존과 무관). 해석 불가면 None.
+        오프셋 없는 값은 표시할 때와 같은 기준 (display_tz 가 없으면 UTC, 있으면 source_tz).
+        """
+        t = type(v)
+        if t is bool or v is None:
+            return None
+        if isinstance(v, (int, float)):
+            ts = float(v)
+            return ts / 1000.0 if ts > 1e12 else ts
+        if t is str:
+            dt = _parse_str(v)
+        elif isinstance(v, (list, tuple)):
+            dt = _parse_array(v)
+        elif isinstance(v, dict):
+            dt = _parse_dict(v)
+        else:
+            return None
+        if dt is None:
+            return None
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=UTC if self.display_tz is None else self.source_tz)
+        try:
+            return dt.timestamp()
+        except (OverflowError, OSError, ValueError):
+            return None
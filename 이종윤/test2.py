@@ -2,79 +2,296 @@ import discord
 import os
 from dotenv import load_dotenv
 from discord.ext import commands
-from flask import Flask, request, jsonify
+from aiohttp import web
 import logging
 import asyncio
-import threading
+import hmac
+import signal
+import sys
+import time
+from datetime import datetime
 
 load_dotenv()
+
+# IP 허용 목록은 alert_bot 과 같은 모듈을 쓴다 (복사본을 따로 두지 않음).
+# 기본은 저장소 구조 그대로 ../alert_bot, 따로 배포하면 ALERT_BOT_DIR 로 allowlist.py 가 있는 경로 지정 (README.md)
+ALERT_BOT_DIR = os.getenv('ALERT_BOT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'alert_bot')
+if not os.path.isfile(os.path.join(ALERT_BOT_DIR, 'allowlist.py')):
+    sys.exit(f"allowlist.py 를 찾을 수 없음: {os.path.abspath(ALERT_BOT_DIR)}\n"
+             "이 릴레이는 alert_bot/allowlist.py 를 함께 배포해야 합니다 → ALERT_BOT_DIR 에 그 디렉터리를 지정하세요.")
+sys.path.append(ALERT_BOT_DIR)
+import allowlist  # noqa: E402
+
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 CHANNEL_ID = int(os.getenv('DISCORD_CHANNEL_ID'))
 API_KEY = os.getenv('API_KEY')
+HOST = os.getenv('RELAY_HOST', '0.0.0.0')
+PORT = int(os.getenv('RELAY_PORT', '8080'))
+SEND_TIMEOUT = float(os.getenv('SEND_TIMEOUT', '10'))  # channel.send 최대 대기(초)
+# 수신 후 이 시간(초) 동안 모아서 풀이 시각 순으로 정렬 → 같은 초에 난 first blood 는 한 메시지(embed 최대 10개)로.
+# 모든 알림에 그대로 더해지는 지연이므로 짧게 (동시에 몰리는 요청만 묶이면 충분)
+COALESCE_WINDOW = float(os.getenv('COALESCE_WINDOW', '0.05'))
+MAX_EMBEDS = 10
 logging.basicConfig(level=logging.INFO)
 # Discord 봇의 인텐트 설정
 intents = discord.Intents.default()
 intents.guilds = True
 intents.messages = True
 intents.message_content = True
-bot = commands.Bot(command_prefix='!', intents=intents)
-
-app = Flask(__name__)
-@app.route('/')
-def hello():
-    return "Hello, Discordbot Test!"
-ALLOWED_IPS = ['192.168.0.2','127.0.0.1']
-@app.route('/send', methods=['POST'])
-def send_message():
+
+# 허용 IP/CIDR (IPv4/IPv6, 쉼표 구분) + 파일(수정하면 자동 재로드, SIGHUP 도 가능)
+ALLOWED_IPS = os.getenv('ALLOWED_IPS', '192.168.0.2,127.0.0.1,::1')
+ALLOWED_IPS_FILE = os.getenv('ALLOWED_IPS_FILE', '')
+# 이 주소(CIDR)에서 온 연결만 X-Forwarded-For 를 믿는다 (Docker 네트워크 게이트웨이 / 리버스 프록시)
+TRUSTED_PROXIES = os.getenv('TRUSTED_PROXIES', '')
+ip_allowlist = allowlist.Allowlist(ALLOWED_IPS, ALLOWED_IPS_FILE, TRUSTED_PROXIES)
+
+
+class RelayBot(commands.Bot):
+    """
+    /send 중계 서버(aiohttp)를 봇과 같은 이벤트 루프에서 실행.
+    setup_hook 은 로그인 후 한 번만 호출되므로, 게이트웨이 재연결로 on_ready 가 다시 불려도 서버는 하나.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runner = None
+
+    async def setup_hook(self):
+        self.runner = web.AppRunner(create_app())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, HOST, PORT).start()
+        try:
+            # kill -HUP <pid> → 허용 목록 즉시 재로드
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, ip_allowlist.reload)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass  # Windows / 메인 스레드가 아닌 loop
+        logging.info(f'relay server listening on {HOST}:{PORT}')
+
+    async def close(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+        await super().close()
+
+
+bot = RelayBot(command_prefix='!', intents=intents)
+
+
+def parse_solved_at(v, default):
+    """풀이 시각(epoch 초/밀리초 또는 ISO 문자열) → epoch 초. 없거나 해석 불가면 default(수신 시각)."""
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return v / 1000.0 if v > 1e12 else float(v)
+    if isinstance(v, str) and v.strip():
+        try:
+            return datetime.fromisoformat(v.strip().replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+class FirstBlood:
+    __slots__ = ('problem', 'person', 'school', 'solved_at', 'received', 'seq', 'future')
+
+    def __init__(self, problem, person, school, solved_at, received, seq):
+        self.problem = problem
+        self.person = person
+        self.school = school
+        self.solved_at = solved_at    # epoch 초 (정렬/묶음 기준)
+        self.received = received      # monotonic, 수신 시각 (지연 측정 기준)
+        self.seq = seq                # 같은 시각이면 수신 순
+        self.future = asyncio.get_running_loop().create_future()
+
+    def text(self):
+        return f"problem:{self.problem}-{self.school}:{self.person}님"
+
+    def embed(self):
+        embed = discord.Embed(
+                title='First Blood',
+                description=self.problem,
+                color=int('3498db', 16)
+                )
+        embed.add_field(
+            name=self.person,
+            value=self.school,
+            inline=False
+        )
+        return embed
+
+
+class ChannelQueue:
+    """
+    채널 하나의 순서 보장 전송 큐 (워커 1개 → 보낸 순서 = 채널에 보이는 순서).
+    첫 이벤트 수신 후 COALESCE_WINDOW 동안 모은 것을 (풀이 시각, 수신 순) 으로 정렬하고,
+    풀이 시각이 같은 초인 것끼리 embed 최대 10개짜리 메시지 하나로 보낸다.
+    각 이벤트의 future 에 (message id, 지연 초) 또는 예외를 넣는다.
+    """
+
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+        self.pending = []
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.latencies = []     # 최근 전송 지연(초)
+        self.sent = 0
+        self.failed = 0
+
+    def put(self, ev):
+        self.pending.append(ev)
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.worker())
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+            # 가장 먼저 들어온 이벤트 기준으로 window 가 지날 때까지 대기 (그 사이 들어온 것도 함께 정렬)
+            first = min(ev.received for ev in self.pending)
+            await asyncio.sleep(max(0.0, first + COALESCE_WINDOW - loop.time()))
+            batch = sorted(self.pending, key=lambda ev: (ev.solved_at, ev.seq))
+            self.pending = []
+            group = []
+            for ev in batch:
+                if group and (int(ev.solved_at) != int(group[0].solved_at) or len(group) >= MAX_EMBEDS):
+                    await self.deliver(group)
+                    group = []
+                group.append(ev)
+            await self.deliver(group)
+
+    async def deliver(self, group):
+        # 호출 측이 이미 504 로 응답한(future 취소) 이벤트는 보내지 않는다 → 백엔드 재시도와 중복 전송 방지
+        group = [ev for ev in group if not ev.future.done()]
+        if not group:
+            return
+        try:
+            channel = await get_channel()
+            content = '\n'.join(ev.text() for ev in group)[:2000]
+            sent = await asyncio.wait_for(channel.send(content, embeds=[ev.embed() for ev in group]),
+                                          timeout=SEND_TIMEOUT)
+        except Exception as e:
+            self.failed += len(group)
+            logging.error(f'channel {self.channel_id}: {len(group)} first blood(s) failed: {e!r}')
+            for ev in group:
+                if not ev.future.done():
+                    ev.future.set_exception(e)
+                    ev.future.exception()  # 연결이 끊겨 아무도 await 하지 않아도 "never retrieved" 로그가 남지 않게
+            return
+        now = asyncio.get_running_loop().time()
+        self.sent += len(group)
+        for ev in group:
+            latency = now - ev.received
+            self.latencies.append(latency)
+            logging.info(f'first blood delivered: problem={ev.problem} latency={latency * 1000:.0f}ms '
+                         f'batch={len(group)}')
+            if not ev.future.done():
+                ev.future.set_result((sent.id, latency))
+        del self.latencies[:-1000]
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000, 1) if lat else None
+        return {'channel_id': str(self.channel_id), 'sent': self.sent, 'failed': self.failed,
+                'pending': len(self.pending), 'latency_ms': {'p50': pct(50), 'p95': pct(95), 'max': pct(100)}}
+
+
+queues = {}
+_seq = 0
+
+
+def enqueue_first_blood(problem, person, school, solved_at, channel_id=CHANNEL_ID):
+    global _seq
+    _seq += 1
+    loop = asyncio.get_running_loop()
+    ev = FirstBlood(problem, person, school, parse_solved_at(solved_at, time.time()), loop.time(), _seq)
+    q = queues.get(channel_id)
+    if q is None:
+        q = queues[channel_id] = ChannelQueue(channel_id)
+    q.put(ev)
+    return ev
+
+
+async def hello(request):
+    return web.Response(text="Hello, Discordbot Test!")
+
+
+async def get_channel():
+    # 로그인 직후(캐시가 차기 전)에 들어온 요청은 준비될 때까지 잠깐 대기
+    if not bot.is_ready():
+        await asyncio.wait_for(bot.wait_until_ready(), timeout=SEND_TIMEOUT)
+    channel = bot.get_channel(CHANNEL_ID)
+    if channel is None:
+        channel = await bot.fetch_channel(CHANNEL_ID)
+    return channel
+
+
+async def send_message(request):
     try:
-        client_ip = request.remote_addr
-        if client_ip not in ALLOWED_IPS:
+        allowed, client_ip = ip_allowlist.check(request.remote, request.headers.get('X-Forwarded-For', ''))
+        if not allowed:
             logging.warning(f'Unauthorized IP: {client_ip}')
-            return jsonify({'error': 'Forbidden'}), 403
-        received_api_key=request.headers.get('X-API-Key')
-        if received_api_key!=API_KEY:
-            logging.WARNING('API키가 실패하였습니다!')
-            return jsonify({'error': '인증실패'}), 401
-        data=request.get_json()
+            return web.json_response({'error': 'Forbidden'}, status=403)
+        received_api_key = request.headers.get('X-API-Key', '')
+        if not API_KEY or not hmac.compare_digest(received_api_key.encode(), API_KEY.encode()):
+            logging.warning('API키가 실패하였습니다!')
+            return web.json_response({'error': '인증실패'}, status=401)
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
         mesasage=['first_blood_problem','first_blood_person','first_blood_school']
         for m in mesasage:
-            if not data or m not in data :
-                return jsonify({'error': '메시지가 존재하지 않습니다.'}), 400
+            if not isinstance(data, dict) or m not in data:
+                return web.json_response({'error': '메시지가 존재하지 않습니다.'}, status=400)
         first_blood_problem=data['first_blood_problem']
         first_blood_person=data['first_blood_person']
         first_blood_school=data['first_blood_school']
-        message=f"problem:{first_blood_problem}-{first_blood_school}:{first_blood_person}님"
-        
-        channel = bot.get_channel(CHANNEL_ID)
-        if channel:
-            embed = discord.Embed(
-                    title='First Blood',
-                    description=first_blood_problem,
-                    color=int('3498db', 16)
-                    )
-            embed.add_field(
-                name=first_blood_person,
-                value=first_blood_school,
-                inline=False
-            )
-            asyncio.run_coroutine_threadsafe(channel.send(message, embed=embed), bot.loop)
-            logging.info(f'Message sent to channel ID {CHANNEL_ID}')
-            return jsonify({'status':'메시지가 전송됨'}), 200
-        else:
+        solved_at = data.get('solved_at', data.get('solvedAt'))
+
+        # 채널 큐에 넣고 전송 결과를 기다려서 응답 (실패/지연이 호출 측에 보이도록)
+        ev = enqueue_first_blood(first_blood_problem, first_blood_person, first_blood_school, solved_at)
+        try:
+            # 호출 측이 먼저 끊겨도(shield) 이벤트는 순서대로 전송된다
+            message_id, latency = await asyncio.wait_for(asyncio.shield(ev.future),
+                                                         timeout=COALESCE_WINDOW + 2 * SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            ev.future.cancel()  # 아직 안 보냈으면 취소 → 504 후 재시도가 와도 두 번 올라가지 않음
+            logging.error('봇이 준비되지 않았거나 channel.send 시간 초과')
+            return web.json_response({'error': '전송 시간 초과'}, status=504)
+        except (discord.NotFound, discord.Forbidden):
             logging.error(f'Channel ID:{CHANNEL_ID}를 찾을 수 없음')
-            return jsonify({'error':'채널을 찾을 수 없음'}),404
-        #return jsonify({'first_blood':f"problem:{first_blood_problem}-{first_blood_school}:{first_blood_person}님"})
+            return web.json_response({'error':'채널을 찾을 수 없음'}, status=404)
+        except discord.HTTPException as e:
+            logging.error(f'channel.send failed: {e.status} {e.text}')
+            return web.json_response({'error': f'전송 실패: {e.status}'}, status=502)
+        logging.info(f'Message sent to channel ID {CHANNEL_ID}')
+        return web.json_response({'status':'메시지가 전송됨', 'message_id': str(message_id),
+                                  'latency_ms': round(latency * 1000, 1)}, status=200)
     except Exception as e:
         logging.exception('Error while processing /send request.')
-        return jsonify({'error: str(e)'}), 500
+        return web.json_response({'error': str(e)}, status=500)
+
+
+async def stats(request):
+    if not ip_allowlist.check(request.remote, request.headers.get('X-Forwarded-For', ''))[0]:
+        return web.json_response({'error': 'Forbidden'}, status=403)
+    return web.json_response({'channels': [q.stats() for q in queues.values()]})
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_get('/', hello)
+    app.router.add_post('/send', send_message)
+    app.router.add_get('/stats', stats)
+    return app
 
-def run_flask():
-    app.run(host='0.0.0.0', port=8080,debug=False, use_reloader=False)
 
 @bot.event
 async def on_ready():
     logging.info(f'Logged in as {bot.user}')
 
-    flask_thread = threading.Thread(target=run_flask)
-    flask_thread.start()
-bot.run(TOKEN)
\ No newline at end of file
+if __name__ == '__main__':
+    bot.run(TOKEN)
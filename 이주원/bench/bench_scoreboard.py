@@ -0,0 +1,121 @@
+# bench_scoreboard.py — 리더보드 top-N: 읽을 때마다 전체 정렬(기존 top_n) vs Scoreboard 정렬 인덱스
+#
+#   python bench/bench_scoreboard.py --teams 10000 --updates 200 --reads 20
+#
+# 대회 중처럼 "몇 팀 점수 변경(델타 또는 전체 스냅샷) → top 3 읽기" 를 반복하고,
+# 스냅샷/델타 적용 + 읽기에 걸린 시간을 비교한다. 결과가 기존 정렬과 같은지도 확인.
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scoreboard import Scoreboard, rank_key  # noqa: E402
+
+
+def legacy_top_n(entries, n=3):
+    """역할봇2.top_n 과 같음 (매번 전체 정렬)"""
+    return sorted(entries, key=lambda x: (x.get("rank", 10**9), -x.get("totalPoint", 0)))[:n]
+
+
+def make_teams(n, rng):
+    teams = [{"teamId": i, "teamName": f"team{i}", "totalPoint": rng.randint(0, 5000),
+              "solvedCount": rng.randint(0, 20)} for i in range(n)]
+    rerank(teams)
+    return teams
+
+
+def rerank(teams):
+    for r, t in enumerate(sorted(teams, key=lambda t: -t["totalPoint"]), 1):
+        t["rank"] = r
+
+
+def solve(teams, rng, k):
+    """k 팀이 문제를 풀어 점수가 오름 → 바뀐 팀(푼 팀 + 순위가 밀린 팀) 목록 (서버가 보낼 델타)"""
+    before = {t["teamId"]: t["rank"] for t in teams}
+    solved = set()
+    for t in rng.sample(teams, k):
+        t["totalPoint"] += rng.choice((100, 200, 300))
+        t["solvedCount"] += 1
+        solved.add(t["teamId"])
+    rerank(teams)
+    return [dict(t) for t in teams if t["teamId"] in solved or t["rank"] != before[t["teamId"]]]
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    print(f"  {label:<34} {dt * 1000:9.1f} ms")
+    return dt, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--teams", type=int, default=10_000)
+    ap.add_argument("--updates", type=int, default=200, help="점수 변경 횟수")
+    ap.add_argument("--solves", type=int, default=1, help="변경 한 번에 문제를 푸는 팀 수")
+    ap.add_argument("--reads", type=int, default=20, help="변경 한 번마다 top 3 읽기 횟수")
+    args = ap.parse_args()
+    rng = random.Random(7)
+    teams = make_teams(args.teams, rng)
+
+    # 변경 시나리오 미리 생성: (델타, 그 시점 전체 스냅샷)
+    steps = []
+    for _ in range(args.updates):
+        changed = solve(teams, rng, args.solves)
+        steps.append((changed, [dict(t) for t in teams]))
+    print(f"{args.teams:,} teams, {args.updates:,} updates x {args.reads} reads of top 3 "
+          f"(avg {sum(len(c) for c, _ in steps) / len(steps):.0f} teams changed per update)")
+
+    def legacy():
+        out = None
+        for _, snap in steps:
+            for _ in range(args.reads):
+                out = legacy_top_n(snap, 3)
+        return out
+
+    def snapshot():
+        b = Scoreboard()
+        b.apply_snapshot(make_teams(args.teams, random.Random(7)))
+        out = None
+        for _, snap in steps:
+            b.apply_snapshot(snap)
+            for _ in range(args.reads):
+                out = b.top(3)
+        return out
+
+    def delta():
+        b = Scoreboard()
+        b.apply_snapshot(make_teams(args.teams, random.Random(7)))
+        out = None
+        for changed, _ in steps:
+            b.apply_delta(changed)
+            for _ in range(args.reads):
+                out = b.top(3)
+        return out
+
+    base, expect = timed("full sort per read (legacy)", legacy)
+    t_snap, got_snap = timed("Scoreboard snapshot + index", snapshot)
+    t_delta, got_delta = timed("Scoreboard delta + index", delta)
+    assert [t["teamId"] for t in got_snap] == [t["teamId"] for t in expect]
+    assert [t["teamId"] for t in got_delta] == [t["teamId"] for t in expect]
+    print(f"  speedup: snapshot {base / t_snap:.1f}x, delta {base / t_delta:.1f}x")
+
+    b = Scoreboard()
+    b.apply_snapshot(steps[-1][1])
+    n = 100_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        b.top(3)
+    t_top = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for _ in range(20):
+        sorted(steps[-1][1], key=rank_key)[:3]
+    t_sort = (time.perf_counter() - t0) / 20
+    print(f"  top(3) read: {t_top * 1e6:.2f} us vs full sort {t_sort * 1e6:,.0f} us")
+
+
+if __name__ == "__main__":
+    main()
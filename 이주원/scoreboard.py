@@ -0,0 +1,235 @@
+# scoreboard.py — 리더보드 SSE 상시 구독(자동 재연결, Last-Event-ID / retry) + 메모리 스코어보드(정렬 인덱스)
+import json
+import time
+import asyncio
+import random
+import bisect
+import aiohttp
+
+DELTA_TYPES = ("delta", "update", "patch")
+
+
+def rank_key(t: dict):
+    """정렬 기준: rank 오름차순, 같으면 totalPoint 내림차순"""
+    return (t.get("rank", 10**9), -t.get("totalPoint", 0))
+
+
+def _num(v, default):
+    return v if isinstance(v, (int, float)) and not isinstance(v, bool) else default
+
+
+def team_key(t: dict) -> str:
+    """팀 식별자: teamId 가 있으면 그것, 없으면 teamName"""
+    k = t.get("teamId")
+    return str(k if k is not None else t.get("teamName"))
+
+
+def parse_event(payload, event: str = "") -> tuple[str, list, list] | None:
+    """
+    SSE 이벤트 → ("snapshot" | "delta", 팀 배열, 삭제할 팀 key 목록). 알 수 없으면 None
+    - 스냅샷: [팀...] 또는 {"data": [팀...]}  (기존 형식)
+    - 델타  : {"type": "delta", "data": [바뀐 팀...], "removed": [teamId...]}  또는 event: delta
+    """
+    if isinstance(payload, str) and payload.startswith("data:"):
+        payload = payload.split("data:", 1)[1].strip()
+    try:
+        data = json.loads(payload) if payload else None
+    except Exception:
+        return None
+    if isinstance(data, list):
+        return ("delta" if event in DELTA_TYPES else "snapshot"), data, []
+    if isinstance(data, dict) and isinstance(data.get("data"), list):
+        kind = "delta" if (data.get("type") in DELTA_TYPES or event in DELTA_TYPES) else "snapshot"
+        removed = data.get("removed") if isinstance(data.get("removed"), list) else []
+        return kind, data["data"], [str(k) for k in removed]
+    return None
+
+
+class Scoreboard:
+    """
+    SSE 로 받은 최신 팀 목록 + (rank, -totalPoint, key) 로 정렬된 인덱스.
+    - 스냅샷/델타 모두 바뀐 팀만 인덱스에서 빼고(bisect) 다시 넣는다 (insort)
+    - 한 번에 많이 바뀌면(rebuild_ratio 이상) 통째로 다시 정렬하는 쪽이 빠르므로 재구축
+    - top(n) 은 인덱스 앞 n 개만 읽는다 → 팀 수와 무관하게 O(n)
+    """
+    def __init__(self, rebuild_ratio: float = 0.125):
+        self.by_key: dict[str, dict] = {}
+        self.entries: dict[str, tuple] = {}     # key → 인덱스 항목
+        self.index: list[tuple] = []            # 정렬된 (rank, -totalPoint, key)
+        self.rebuild_ratio = rebuild_ratio
+        self.updated_at: float | None = None   # monotonic
+        self.version = 0
+
+    def __len__(self):
+        return len(self.by_key)
+
+    @property
+    def teams(self) -> list[dict]:
+        return [self.by_key[e[2]] for e in self.index]
+
+    @staticmethod
+    def _entry(key: str, t: dict) -> tuple:
+        return (_num(t.get("rank"), 10**9), -_num(t.get("totalPoint"), 0), key)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key)
+        del self.index[bisect.bisect_left(self.index, entry)]
+        del self.by_key[key]
+
+    def _upsert(self, key: str, t: dict):
+        entry = self._entry(key, t)
+        old = self.entries.get(key)
+        self.by_key[key] = t
+        if old == entry:
+            return  # 순위/점수 그대로 → 인덱스 위치도 그대로
+        if old is not None:
+            del self.index[bisect.bisect_left(self.index, old)]
+        self.entries[key] = entry
+        bisect.insort(self.index, entry)
+
+    def _touch(self):
+        self.updated_at = time.monotonic()
+        self.version += 1
+
+    def apply_snapshot(self, teams: list[dict]):
+        """전체 목록으로 교체 (목록에 없는 팀은 삭제)"""
+        new = {team_key(t): t for t in teams if isinstance(t, dict)}
+        entries = {k: self._entry(k, t) for k, t in new.items()}
+        old = self.entries
+        changed = [k for k, e in entries.items() if old.get(k) != e]
+        gone = [k for k in old if k not in new]
+        if len(changed) + len(gone) > max(16, len(new) * self.rebuild_ratio):
+            self.index = sorted(entries.values())
+        else:
+            for k in gone:
+                del self.index[bisect.bisect_left(self.index, old[k])]
+            for k in changed:
+                if k in old:
+                    del self.index[bisect.bisect_left(self.index, old[k])]
+                bisect.insort(self.index, entries[k])
+        self.by_key, self.entries = new, entries
+        self._touch()
+
+    def apply_delta(self, teams: list[dict], removed: list[str] = ()):
+        """바뀐 팀만 반영 (필드 일부만 와도 기존 값에 덮어씀)"""
+        for k in removed:
+            if k in self.by_key:
+                self._remove(k)
+        for t in teams:
+            if not isinstance(t, dict):
+                continue
+            k = team_key(t)
+            old = self.by_key.get(k)
+            self._upsert(k, {**old, **t} if old else t)
+        self._touch()
+
+    def top(self, n: int = 3) -> list[dict]:
+        return [self.by_key[e[2]] for e in self.index[:n]]
+
+
+class LeaderboardSubscriber:
+    """
+    API_URL SSE 에 계속 붙어 있으면서 이벤트마다 Scoreboard 갱신.
+    - 끊기면 retry 초 후 재연결 (서버가 'retry:' 로 바꿀 수 있음, 연속 실패 시 max_retry 까지 2배씩)
+    - 재연결 시 마지막 'id:' 를 Last-Event-ID 헤더로 보내 놓친 이벤트부터 받는다
+    - read_timeout 동안 아무것도(heartbeat 포함) 안 오면 죽은 연결로 보고 재연결
+    """
+    def __init__(self, url: str, board: Scoreboard, retry: float = 3.0, max_retry: float = 60.0,
+                 read_timeout: float = 120.0):
+        self.url = url
+        self.board = board
+        self.retry = retry
+        self.max_retry = max_retry
+        self.read_timeout = read_timeout
+        self.last_event_id = ""
+        self.connected = False
+        self.task: asyncio.Task | None = None
+        self.stats = {"connects": 0, "events": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if not self.running:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=self.read_timeout)
+        failures = 0
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                received = 0
+                try:
+                    received = await self._consume(session)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    print(f"[SSE] 연결 끊김: {e!r}")
+                finally:
+                    self.connected = False
+                # 이벤트를 받았으면 정상 종료로 보고 retry 그대로, 아니면 연속 실패로 보고 늘림
+                failures = 0 if received else failures + 1
+                delay = min(self.max_retry, self.retry * (2 ** max(0, failures - 1)))
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    async def _consume(self, session: aiohttp.ClientSession) -> int:
+        """연결 하나가 끝날 때까지 이벤트 처리. 처리한 이벤트 수를 돌려준다."""
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        received = 0
+        async with session.get(self.url, headers=headers) as r:
+            if r.status != 200:
+                raise ConnectionError(f"HTTP {r.status}")
+            self.connected = True
+            self.stats["connects"] += 1
+            data: list[str] = []
+            event_id: str | None = None
+            event = ""
+            async for raw in r.content:
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                if not line:
+                    # 빈 줄 = 이벤트 끝
+                    if event_id is not None:
+                        self.last_event_id = event_id
+                    if data:
+                        received += 1
+                        self._dispatch("\n".join(data), event)
+                    data, event_id, event = [], None, ""
+                    continue
+                if line.startswith(":"):
+                    continue  # 주석 / heartbeat
+                name, _, value = line.partition(":")
+                if value.startswith(" "):
+                    value = value[1:]
+                if name == "data":
+                    data.append(value)
+                elif name == "event":
+                    event = value
+                elif name == "id" and "\0" not in value:
+                    event_id = value
+                elif name == "retry" and value.isdigit():
+                    self.retry = int(value) / 1000
+        return received
+
+    def _dispatch(self, payload: str, event: str = ""):
+        parsed = parse_event(payload, event)
+        if parsed is None:
+            return
+        kind, teams, removed = parsed
+        if kind == "delta":
+            self.board.apply_delta(teams, removed)
+        else:
+            self.board.apply_snapshot(teams)
+        self.stats["events"] += 1
@@ -9,6 +9,7 @@ from discord.ext import commands, tasks
 from dotenv import load_dotenv
 from aiohttp_sse_client import client as sse_client
 import aiohttp
+from scoreboard import Scoreboard, LeaderboardSubscriber, rank_key
 
 load_dotenv()
 
@@ -20,6 +21,8 @@ CHALANGE_DISCORD_CHANNEL_ID = int(os.getenv("CHALANGE_DISCORD_CHANNEL_ID") or 0)
 API_URL = os.getenv("API_URL") or "https://msgctf.kr/api/leaderboard/stream"      # 팀 랭킹 SSE
 CONTEST_TIME_URL = os.getenv("CONTEST_TIME_URL") or "https://msgctf.kr/api/contest-time"
 DEFAULT_ROUND = int(os.getenv("CONTEST_ROUND") or 0)  # 회차 기본값(선택)
+SSE_RETRY_SECONDS = float(os.getenv("SSE_RETRY_SECONDS") or 3)      # 재연결 대기(서버 retry: 가 우선)
+SSE_READ_TIMEOUT = float(os.getenv("SSE_READ_TIMEOUT") or 120)      # 이 시간 동안 아무것도 안 오면 재연결
 
 # ====== Discord 기본 ======
 intents = discord.Intents.default()
@@ -123,8 +126,12 @@ async def ensure_channel_closed(guild: discord.Guild):
     await ch.set_permissions(guild.default_role, overwrite=overwrite)
 
 # ====== 리더보드 SSE ======
+# 상시 구독: on_ready 에서 시작, 끊기면 자동 재연결. 종료 공지는 여기서 바로 TOP3 를 읽는다
+scoreboard = Scoreboard()
+leaderboard = LeaderboardSubscriber(API_URL, scoreboard, retry=SSE_RETRY_SECONDS, read_timeout=SSE_READ_TIMEOUT)
+
 async def fetch_data_from_sse():
-    """리더보드 SSE에서 첫 유효 데이터(팀 배열) 1회 수신"""
+    """리더보드 SSE에서 첫 유효 데이터(팀 배열) 1회 수신 (상시 구독이 끊겨 있을 때의 대체 경로)"""
     if not API_URL:
         return None
     try:
@@ -151,7 +158,7 @@ def top_n(entries: list[dict], n: int = 3) -> list[dict]:
     if not entries:
         return []
     try:
-        ranked = sorted(entries, key=lambda x: (x.get("rank", 10**9), -x.get("totalPoint", 0)))
+        ranked = sorted(entries, key=rank_key)
     except Exception:
         ranked = entries
     return ranked[:n]
@@ -171,11 +178,15 @@ async def send_start_announcement(guild: discord.Guild, n: int | None, end_at: d
 
 async def post_winner_embed(guild: discord.Guild, n: int | None, when: datetime.datetime):
     """우승 공지: 팀 랭킹 상위 3팀 공지 → 채널 닫기"""
-    teams = await fetch_data_from_sse()
+    # 구독 중이면 메모리 스코어보드에서 바로, 끊겨 있으면 1회 수신 (그것도 실패하면 마지막으로 받은 값)
+    if leaderboard.connected and len(scoreboard):
+        tops = scoreboard.top(3)
+    else:
+        teams = await fetch_data_from_sse()
+        tops = top_n(teams, 3) if teams else scoreboard.top(3)
     ch = await channel_by_pref(guild)
 
-    if teams and ch:
-        tops = top_n(teams, 3)
+    if tops and ch:
         rt = round_text(n)
         embed = discord.Embed(
             title=f"🏆 **{rt} MSG CTF 최종 결과 (TOP 3)**",
@@ -350,6 +361,10 @@ async def on_ready():
     if ch:
         await ch.send('CONNECTED')
 
+    # 리더보드 상시 구독 (재연결로 on_ready 가 다시 불려도 하나만)
+    if API_URL:
+        leaderboard.start()
+
     # 시작 시 동기화 + 감시 루프 시작
     if guild:
         await schedule_from_api(guild, DEFAULT_ROUND, DISCORD_CHANNEL_ID)